@@ -0,0 +1,114 @@
+import time
+import random
+import asyncio
+import argparse
+import statistics
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from app.utils import text_process
+
+
+# --- CONFIGURATION ---
+PAGE_COUNTS = [10, 100, 500]
+WORDS_PER_PAGE = 350
+WORDS_PER_CHUNK = 800
+CHUNK_OVERLAP = 200
+WORDS = (
+    "sinh viên học kỳ tín chỉ điểm trung bình học bổng khen thưởng kỷ luật quy chế đào tạo "
+    "trường đại học Tôn Đức Thắng khoa phòng ban hội đồng xét duyệt thời gian đăng ký môn học "
+    "học phí miễn giảm tốt nghiệp ngoại ngữ chuẩn đầu ra theo quy định của hiệu trưởng"
+).split()
+
+
+# --- SUPPORTING FUNCTIONS ---
+# Build a synthetic regulation with chapters, articles, clauses and points
+def build_regulation(pages: int, seed: int) -> str:
+    rng = random.Random(seed)
+    parts = []
+    words = 0
+    chapter = article = 0
+    while words < pages * WORDS_PER_PAGE:
+        if article % 8 == 0:
+            chapter += 1
+            parts.append(f"Chương {chapter}. {' '.join(rng.choice(WORDS) for _ in range(6)).upper()}")
+        article += 1
+        parts.append(f"Điều {article}. {' '.join(rng.choice(WORDS) for _ in range(rng.randint(4, 10)))}")
+        for clause in range(1, rng.randint(2, 6)):
+            sentence = " ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 90)))
+            parts.append(f"{clause}. {sentence};")
+            words += len(sentence.split())
+            if rng.random() < 0.3:
+                parts.extend(f"({point}) {' '.join(rng.choice(WORDS) for _ in range(rng.randint(10, 30)))}." for point in range(1, 4))
+    return " ".join(parts)
+
+
+# Previous implementation: langchain's recursive splitter re-encodes every candidate split, then every merge re-encodes
+async def legacy_split_text_into_chunks(text: str, words_per_chunk: int, overlap: int) -> list[str]:
+    text = text.strip()
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=words_per_chunk,
+        chunk_overlap=overlap,
+        separators=text_process.LEGAL_SEPARATORS,
+        length_function=lambda x: len(text_process.enc.encode(x))
+    )
+    chunks = splitter.split_text(text)
+    return await legacy_merge_chunks(chunks, target_max_length=words_per_chunk)
+
+
+async def legacy_merge_chunks(chunks: list[str], target_max_length: int) -> list[str]:
+    merged_chunks = []
+    current_chunk = ""
+    for chunk in chunks:
+        if len(text_process.enc.encode(current_chunk + " " + chunk)) <= target_max_length:
+            current_chunk = current_chunk + " " + chunk if current_chunk else chunk
+        else:
+            if current_chunk:
+                merged_chunks.append(current_chunk.strip())
+            current_chunk = chunk
+    if current_chunk:
+        merged_chunks.append(current_chunk.strip())
+
+    final_chunks = []
+    buffer = ""
+    for chunk in merged_chunks:
+        if len(text_process.enc.encode(chunk)) < target_max_length * 0.5:
+            buffer = buffer + " " + chunk if buffer else chunk
+        else:
+            if buffer:
+                final_chunks.append(buffer.strip())
+                buffer = ""
+            final_chunks.append(chunk.strip())
+    if buffer:
+        final_chunks.append(buffer.strip())
+    return final_chunks
+
+
+# --- BENCHMARK ---
+async def run(runs: int):
+    print(f"{'pages':>5} | {'chars':>9} | {'chunks':>6} | {'legacy ms':>10} | {'linear ms':>10} | {'speedup':>7} | same chunks")
+    for pages in PAGE_COUNTS:
+        text = build_regulation(pages, seed=pages)
+        legacy_samples = []
+        linear_samples = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            legacy_chunks = await legacy_split_text_into_chunks(text, WORDS_PER_CHUNK, CHUNK_OVERLAP)
+            legacy_samples.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            chunks = await text_process.split_text_into_chunks(text, WORDS_PER_CHUNK, CHUNK_OVERLAP)
+            linear_samples.append(time.perf_counter() - start)
+
+        legacy_ms = statistics.median(legacy_samples) * 1000
+        linear_ms = statistics.median(linear_samples) * 1000
+        print(
+            f"{pages:>5} | {len(text):>9} | {len(chunks):>6} | {legacy_ms:>10.1f} | {linear_ms:>10.1f} | "
+            f"{legacy_ms / linear_ms:>6.1f}x | {chunks == legacy_chunks}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the langchain-based and the linear token chunker on synthetic regulations.")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(run(args.runs))
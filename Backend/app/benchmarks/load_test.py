@@ -0,0 +1,242 @@
+import os
+import base64
+
+# Point the app at local, disposable services before it is imported
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("MONGO_DB_NAME", "university_qa_loadtest")
+os.environ.setdefault("CHROMA_USE_LOCAL", "true")
+os.environ.setdefault("LOCAL_LLM_ENABLED", "true")
+os.environ.setdefault("INGEST_IN_PROCESS_WORKERS", "1")
+os.environ.setdefault("SECRET_KEY", "loadtest-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_EXPIRATION_TIME_MINUTES", "600")
+os.environ.setdefault("API_KEY_SECRET", base64.urlsafe_b64encode(b"loadtest" * 4).decode())
+
+import json
+import time
+import random
+import asyncio
+import argparse
+import fitz
+import httpx
+import numpy as np
+from datetime import datetime, timezone
+
+from app.main import app
+from app.databases import mongo
+from app.daos.api_key_dao import APIKeyDAO
+from app.utils.basic_information import Role
+from app.services import auth_service, llm_service, warmup_service
+from app.schemas.api_key_schema import APIKeyProvider
+
+
+# --- CONFIGURATION ---
+BASE_URL = "http://loadtest"
+LOCAL_API_KEY = "local-loadtest"
+FACULTY = "Công nghệ thông tin"
+QUESTIONS = [
+    "Điều kiện xét học bổng khuyến khích học tập là gì?",
+    "Sinh viên cần bao nhiêu tín chỉ để tốt nghiệp?",
+    "Học phí học kỳ hè được tính như thế nào?",
+    "Khi nào sinh viên bị cảnh báo học vụ?",
+    "Thủ tục bảo lưu kết quả học tập gồm những gì?",
+    "What are the requirements for the English graduation standard?",
+    "How do I register for a retake course?"
+]
+PARAGRAPH = (
+    "Điều {n}. Sinh viên được xét học bổng khuyến khích học tập khi có điểm trung bình học kỳ từ 7.0 trở lên, "
+    "điểm rèn luyện từ loại khá trở lên và không bị kỷ luật trong học kỳ xét học bổng. Mức học bổng được "
+    "xác định theo kết quả học tập và rèn luyện, số tín chỉ đăng ký tối thiểu là 14 tín chỉ mỗi học kỳ. "
+)
+
+
+# --- SETUP ---
+# Create (or reuse) an admin and a student and mint access tokens for them
+async def create_users() -> dict:
+    users = mongo.get_users_collection()
+    tokens = {}
+    for sub, role, faculty in [("loadtest-admin", Role.ADMIN.value, None), ("loadtest-student", Role.STUDENT.value, FACULTY)]:
+        user = {
+            "sub": sub,
+            "name": sub,
+            "email": f"{sub}@loadtest.local",
+            "image": "https://placehold.co/400",
+            "role": role,
+            "faculty": faculty,
+            "is_faculty_manager": False,
+            "system_role_assigned": True,
+            "banned": False
+        }
+        await users.update_one(
+            {"sub": sub},
+            {"$set": user, "$setOnInsert": {"created_at": datetime.now(timezone.utc)}},
+            upsert=True
+        )
+        access_token, _ = await auth_service.generate_tokens(user)
+        tokens[role] = {"Authorization": f"Bearer {access_token}"}
+    return tokens
+
+
+# Activate a key of the local stub provider
+async def activate_local_api_key():
+    api_keys = await APIKeyDAO().get_api_keys(0, 1, provider=APIKeyProvider.LOCAL.value)
+    if api_keys:
+        api_key = api_keys[0].model_dump()
+    else:
+        api_key = await llm_service.create_api_key({
+            "name": "Load test",
+            "description": "Local stub provider",
+            "api_key": LOCAL_API_KEY,
+            "provider": APIKeyProvider.LOCAL.value
+        })
+    if api_key["using_model"] is None:
+        await llm_service.update_api_key(api_key["id"], {"using_model": "local-stub"})
+    if not api_key["is_using"]:
+        await llm_service.toggle_api_key_status(api_key["id"])
+
+
+# Generate a text PDF with the given number of pages
+def build_pdf(pages: int) -> bytes:
+    document = fitz.open()
+    for page_idx in range(pages):
+        page = document.new_page()
+        text = "".join(PARAGRAPH.format(n=page_idx * 4 + i + 1) for i in range(4))
+        page.insert_htmlbox(fitz.Rect(50, 50, 545, 790), f"<p>{text}</p>")
+    content = document.tobytes()
+    document.close()
+    return content
+
+
+# --- SCENARIOS ---
+# Drive requests at a fixed concurrency and record per-request latency and status
+async def run_scenario(total: int, concurrency: int, send) -> dict:
+    latencies = []
+    statuses = []
+    counter = iter(range(total))
+
+    async def worker():
+        for request_idx in counter:
+            start = time.perf_counter()
+            try:
+                status = await send(request_idx)
+            except Exception:
+                status = None
+            latencies.append(time.perf_counter() - start)
+            statuses.append(status)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, statuses, time.perf_counter() - start)
+
+
+# Summarize latency samples, throughput and error rate
+def summarize(latencies: list[float], statuses: list[int | None], wall_seconds: float) -> dict:
+    values = np.asarray(latencies) * 1000
+    errors = sum(1 for status in statuses if status is None or status >= 400)
+    return {
+        "requests": len(statuses),
+        "errors": errors,
+        "error_rate": round(errors / len(statuses), 4) if statuses else 0.0,
+        "throughput_rps": round(len(statuses) / wall_seconds, 2) if wall_seconds else 0.0,
+        "p50_ms": round(float(np.percentile(values, 50)), 1) if len(values) else None,
+        "p95_ms": round(float(np.percentile(values, 95)), 1) if len(values) else None,
+        "p99_ms": round(float(np.percentile(values, 99)), 1) if len(values) else None
+    }
+
+
+# Poll upload jobs until they finish; returns the end-to-end ingestion time of each
+async def wait_for_ingestion(client: httpx.AsyncClient, headers: dict, job_ids: list[str]) -> tuple[list[float], list[int | None]]:
+    durations, statuses = [], []
+    for job_id in job_ids:
+        while True:
+            job = (await client.get(f"/api/documents/jobs/{job_id}", headers=headers)).json()["details"]
+            if job["status"] in ("completed", "failed"):
+                break
+            await asyncio.sleep(0.5)
+        created_at = datetime.fromisoformat(job["created_at"])
+        finished_at = datetime.fromisoformat(job["finished_at"])
+        durations.append((finished_at - created_at).total_seconds())
+        statuses.append(200 if job["status"] == "completed" else 500)
+    return durations, statuses
+
+
+# --- LOAD TEST ---
+async def run(args) -> dict:
+    results = {}
+    async with app.router.lifespan_context(app):
+        # Wait for the models so warm-up is not measured
+        while not warmup_service.get_readiness()["ready"]:
+            if any(state["status"] == "failed" for state in warmup_service.component_states.values()):
+                raise RuntimeError(f"Warm-up failed: {warmup_service.get_readiness()}")
+            await asyncio.sleep(1)
+
+        tokens = await create_users()
+        await activate_local_api_key()
+        pdf = build_pdf(args.pages)
+        job_ids = []
+        uploaded_ids = []
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url=BASE_URL, timeout=None) as client:
+            async def upload(request_idx: int) -> int:
+                response = await client.post(
+                    "/api/documents/upload",
+                    headers=tokens[Role.ADMIN.value],
+                    data={
+                        "doc_type": "Quy chế",
+                        "faculty": FACULTY,
+                        "file_url": f"https://example.com/loadtest-{request_idx}.pdf"
+                    },
+                    files={"file": (f"loadtest-{request_idx}.pdf", pdf, "application/pdf")}
+                )
+                if response.status_code < 400:
+                    job_ids.append(response.json()["details"]["id"])
+                    uploaded_ids.append(response.json()["details"]["doc_id"])
+                return response.status_code
+
+            async def ask(request_idx: int) -> int:
+                response = await client.post(
+                    "/api/qa/ask",
+                    headers=tokens[Role.STUDENT.value],
+                    json={"question": random.choice(QUESTIONS)}
+                )
+                return response.status_code
+
+            if args.uploads:
+                start = time.perf_counter()
+                results["POST /api/documents/upload"] = await run_scenario(args.uploads, args.upload_concurrency, upload)
+                durations, statuses = await wait_for_ingestion(client, tokens[Role.ADMIN.value], job_ids)
+                results["ingestion (queued -> done)"] = summarize(durations, statuses, time.perf_counter() - start)
+            if args.requests:
+                results["POST /api/qa/ask"] = await run_scenario(args.requests, args.concurrency, ask)
+
+            if not args.keep_documents:
+                for doc_id in uploaded_ids:
+                    await client.delete(f"/api/documents/{doc_id}", headers=tokens[Role.ADMIN.value])
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test /qa/ask and /documents/upload against local Mongo, local Chroma and the stub LLM.")
+    parser.add_argument("--requests", type=int, default=200, help="Number of /qa/ask requests")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent /qa/ask clients")
+    parser.add_argument("--uploads", type=int, default=2, help="Number of uploads")
+    parser.add_argument("--upload-concurrency", type=int, default=1)
+    parser.add_argument("--pages", type=int, default=5, help="Pages of the generated PDF")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--keep-documents", action="store_true", help="Do not delete the uploaded documents afterwards")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    results = asyncio.run(run(args))
+
+    print(f"{'endpoint':<28} | {'reqs':>5} | {'err %':>6} | {'rps':>7} | {'p50 ms':>8} | {'p95 ms':>8} | {'p99 ms':>8}")
+    for endpoint, summary in results.items():
+        print(
+            f"{endpoint:<28} | {summary['requests']:>5} | {summary['error_rate'] * 100:>6.2f} | {summary['throughput_rps']:>7} | "
+            f"{summary['p50_ms']:>8} | {summary['p95_ms']:>8} | {summary['p99_ms']:>8}"
+        )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results}, f, ensure_ascii=False, indent=2)
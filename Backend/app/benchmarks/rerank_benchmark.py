@@ -0,0 +1,83 @@
+import time
+import random
+import asyncio
+import argparse
+import numpy as np
+
+from app.services import rerank_service
+
+
+# --- CONFIGURATION ---
+QUESTION = "Điều kiện để sinh viên được xét học bổng khuyến khích học tập là gì?"
+CANDIDATE_COUNTS = [20, 50, 100]
+WORDS = (
+    "sinh viên học kỳ tín chỉ điểm trung bình học bổng khen thưởng kỷ luật quy chế đào tạo "
+    "trường đại học Tôn Đức Thắng khoa phòng ban hội đồng xét duyệt điều khoản chương mục "
+    "thời gian đăng ký môn học học phí miễn giảm tốt nghiệp ngoại ngữ chuẩn đầu ra"
+).split()
+
+
+# --- SUPPORTING FUNCTIONS ---
+# Build synthetic candidate chunks of varying length
+def build_candidates(count: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    return [
+        " ".join(rng.choice(WORDS) for _ in range(rng.randint(40, 400)))
+        for _ in range(count)
+    ]
+
+
+# Previous implementation: one forward pass per chunk on the calling thread
+def legacy_rerank(question: str, chunks: list[str], top_k: int) -> list[str]:
+    model = rerank_service._load_cross_encoder_model()
+    scored_chunks = {}
+    for chunk in chunks:
+        score = model.predict([[question, chunk]])[0]
+        scored_chunks[chunk] = float(score)
+    sorted_scored_chunks = sorted(scored_chunks, key=scored_chunks.get, reverse=True)
+    return sorted_scored_chunks[:top_k]
+
+
+# Summarize latency samples in milliseconds
+def summarize(samples: list[float]) -> dict:
+    values = np.asarray(samples) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(values, 50)), 2),
+        "p95_ms": round(float(np.percentile(values, 95)), 2)
+    }
+
+
+# --- BENCHMARK ---
+async def run(runs: int, top_k: int):
+    # Warm up the model so loading time is not measured
+    rerank_service.score_chunks(QUESTION, build_candidates(4, seed=0))
+
+    print(f"{'candidates':>10} | {'legacy p50':>10} | {'legacy p95':>10} | {'batched p50':>11} | {'batched p95':>11}")
+    for count in CANDIDATE_COUNTS:
+        legacy_samples = []
+        batched_samples = []
+        for run_idx in range(runs):
+            chunks = build_candidates(count, seed=run_idx)
+
+            start = time.perf_counter()
+            legacy_rerank(QUESTION, chunks, top_k)
+            legacy_samples.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            await rerank_service.rerank(QUESTION, chunks, top_k)
+            batched_samples.append(time.perf_counter() - start)
+
+        legacy = summarize(legacy_samples)
+        batched = summarize(batched_samples)
+        print(
+            f"{count:>10} | {legacy['p50_ms']:>10} | {legacy['p95_ms']:>10} | "
+            f"{batched['p50_ms']:>11} | {batched['p95_ms']:>11}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare per-chunk and batched cross-encoder reranking latency.")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--top-k", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args.runs, args.top_k))
@@ -0,0 +1,221 @@
+import json
+import time
+import random
+import asyncio
+import argparse
+import subprocess
+import numpy as np
+from datetime import datetime, timezone
+
+from app.databases import chroma
+from app.daos.document_chunk_dao import DocumentChunkDAO
+from app.utils.inference_backend import InferenceBackend, load_sentence_transformer, load_cross_encoder
+from app.databases.mongo import connect_to_mongo, close_mongo_connection
+from app.services import embedding_service, document_chunk_service, rerank_service, qa_service
+
+
+# --- CONFIGURATION ---
+RECALL_AT = [1, 5, 10, 20]
+FINAL_TOP_K = 20                    # Chunks kept after reranking, as in qa_service.retrieve_context
+CHROMA_DEFAULT_SEARCH_EF = 100      # hnsw:search_ef of a collection that never set it
+
+
+# --- EVALUATION SET ---
+# Every stored potential question is a query whose answer chunk is known
+async def sample_questions(sample_size: int, seed: int) -> list[dict]:
+    questions = []
+    for record in await DocumentChunkDAO().get_all_document_chunks():
+        for chunk_index, chunk in record["chunks"].items():
+            for question, embedding_id in zip(chunk.get("potential_questions", []), chunk.get("embedding_ids", [])):
+                questions.append({
+                    "question": question,
+                    "embedding_id": embedding_id,
+                    "doc_id": record["doc_id"],
+                    "chunk_index": int(chunk_index)
+                })
+
+    rng = random.Random(seed)
+    questions = rng.sample(questions, min(sample_size, len(questions)))
+
+    # Search with the same faculty scope as the document of the question
+    collection = chroma.get_embeddings_collection()
+    stored = collection.get(ids=[q["embedding_id"] for q in questions], include=["metadatas"])
+    faculties = {embedding_id: metadata.get("faculty", "") for embedding_id, metadata in zip(stored["ids"], stored["metadatas"])}
+    return [
+        {**q, "faculty": faculties[q["embedding_id"]]}
+        for q in questions if q["embedding_id"] in faculties
+    ]
+
+
+# --- SETTINGS ---
+def use_backends(embedding_backend: str, reranker_backend: str):
+    embedding_service.embedding_model = load_sentence_transformer(embedding_service.EMBEDDING_MODEL, embedding_backend)
+    rerank_service.cross_encoder_model = load_cross_encoder(
+        rerank_service.CROSS_ENCODER_MODEL,
+        max_length=rerank_service.RERANK_MAX_LENGTH,
+        backend=reranker_backend
+    )
+
+
+# Change the HNSW query beam width of the collection; returns the previous value
+def set_search_ef(search_ef: int) -> int | None:
+    collection = chroma.get_embeddings_collection()
+    previous = ((collection.configuration or {}).get("hnsw") or {}).get("ef_search")
+    collection.modify(configuration={"hnsw": {"ef_search": search_ef}})
+    return previous
+
+
+# --- METRICS ---
+# 1-based rank of the answer chunk, or None when it was not retrieved
+def rank_of(ranked_keys: list[tuple[str, int]], relevant: tuple[str, int]) -> int | None:
+    try:
+        return ranked_keys.index(relevant) + 1
+    except ValueError:
+        return None
+
+
+def quality(ranks: list[int | None], ks: list[int]) -> dict:
+    total = len(ranks)
+    return {
+        **{f"recall@{k}": round(sum(1 for r in ranks if r is not None and r <= k) / total, 4) for k in ks},
+        "mrr": round(sum(1 / r for r in ranks if r is not None) / total, 4)
+    }
+
+
+def latency(samples: list[float]) -> dict:
+    values = np.asarray(samples) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(values, 50)), 2),
+        "p95_ms": round(float(np.percentile(values, 95)), 2)
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+# --- BENCHMARK ---
+async def evaluate(questions: list[dict], vectors: list[list[float]], top_k: int, rerank_depths: list[int]) -> list[dict]:
+    search_samples, fetch_samples = [], []
+    retrieval_ranks = []
+    candidates = []
+    for question, vector in zip(questions, vectors):
+        # Leave-one-out: ask for one extra hit and drop the question's own embedding
+        start = time.perf_counter()
+        hits = await embedding_service.find_relevant_potential_questions(top_k + 1, vector, question["faculty"])
+        search_samples.append(time.perf_counter() - start)
+        hits = [hit for hit in hits if hit["embedding_id"] != question["embedding_id"]][:top_k]
+
+        start = time.perf_counter()
+        chunks = await document_chunk_service.get_document_chunks_by_hits(hits)
+        fetch_samples.append(time.perf_counter() - start)
+
+        relevant = (question["doc_id"], question["chunk_index"])
+        keys = [(chunk["doc_id"], chunk["chunk_index"]) for chunk in chunks]
+        retrieval_ranks.append(rank_of(keys, relevant))
+        candidates.append((relevant, keys, [qa_service.build_chunk_content(chunk) for chunk in chunks]))
+
+    loop = asyncio.get_running_loop()
+    results = []
+    for depth in rerank_depths:
+        rerank_samples = []
+        ranks = []
+        for question, (relevant, keys, contents) in zip(questions, candidates):
+            keys, contents = keys[:depth], contents[:depth]
+            start = time.perf_counter()
+            scores = await loop.run_in_executor(rerank_service.rerank_executor, rerank_service.score_chunks, question["question"], contents)
+            order = rerank_service.top_k_indices(scores, FINAL_TOP_K)
+            rerank_samples.append(time.perf_counter() - start)
+            ranks.append(rank_of([keys[i] for i in order], relevant))
+
+        results.append({
+            "rerank_depth": depth,
+            "candidate_recall": quality(retrieval_ranks, [top_k])[f"recall@{top_k}"],
+            "quality": quality(ranks, RECALL_AT),
+            "latency": {
+                "vector_search": latency(search_samples),
+                "chunk_fetch": latency(fetch_samples),
+                "rerank": latency(rerank_samples)
+            }
+        })
+    return results
+
+
+async def run(args) -> dict:
+    await connect_to_mongo()
+    chroma.connect_to_chroma()
+    try:
+        questions = await sample_questions(args.sample_size, args.seed)
+        if not questions:
+            raise RuntimeError("No potential questions with embeddings found.")
+        print(f"Evaluating {len(questions)} potential questions")
+
+        runs = []
+        for embedding_backend in args.embedding_backends:
+            for reranker_backend in args.reranker_backends:
+                use_backends(embedding_backend, reranker_backend)
+                await embedding_service.get_embedding(questions[0]["question"])
+
+                embedding_samples = []
+                vectors = []
+                for question in questions:
+                    start = time.perf_counter()
+                    vectors.append(await embedding_service.get_embedding(question["question"]))
+                    embedding_samples.append(time.perf_counter() - start)
+
+                for search_ef in args.search_ef or [None]:
+                    previous_ef = set_search_ef(search_ef) if search_ef else None
+                    try:
+                        for top_k in args.top_k:
+                            depths = sorted({min(depth, top_k) for depth in args.rerank_depth}, reverse=True)
+                            for result in await evaluate(questions, vectors, top_k, depths):
+                                result["latency"]["embedding"] = latency(embedding_samples)
+                                runs.append({
+                                    "embedding_backend": embedding_backend,
+                                    "reranker_backend": reranker_backend,
+                                    "search_ef": search_ef,
+                                    "top_k": top_k,
+                                    **result
+                                })
+                                print(
+                                    f"emb={embedding_backend:<9} rr={reranker_backend:<9} ef={search_ef or '-':<4} "
+                                    f"top_k={top_k:<4} depth={result['rerank_depth']:<4} "
+                                    f"R@1={result['quality']['recall@1']:.3f} R@5={result['quality']['recall@5']:.3f} "
+                                    f"MRR={result['quality']['mrr']:.3f} rerank p95={result['latency']['rerank']['p95_ms']}ms"
+                                )
+                    finally:
+                        if search_ef:
+                            set_search_ef(previous_ef or CHROMA_DEFAULT_SEARCH_EF)
+
+        return {
+            "git_commit": git_commit(),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "sample_size": len(questions),
+            "seed": args.seed,
+            "final_top_k": FINAL_TOP_K,
+            "runs": runs
+        }
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    backends = [backend.value for backend in InferenceBackend]
+    parser = argparse.ArgumentParser(description="Measure retrieval quality (recall@k, MRR) and stage latency on stored potential questions.")
+    parser.add_argument("--sample-size", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--top-k", type=int, nargs="+", default=[100, 50, 20], help="Vector search depth")
+    parser.add_argument("--rerank-depth", type=int, nargs="+", default=[100, 50, 20], help="Candidate chunks passed to the reranker")
+    parser.add_argument("--embedding-backends", nargs="+", choices=backends, default=[InferenceBackend.TORCH.value])
+    parser.add_argument("--reranker-backends", nargs="+", choices=backends, default=[InferenceBackend.TORCH.value])
+    parser.add_argument("--search-ef", type=int, nargs="*", help="HNSW ef_search values (temporarily applied to the collection)")
+    parser.add_argument("--output", default="retrieval_benchmark.json")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Results written to {args.output}")
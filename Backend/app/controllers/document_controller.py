@@ -6,11 +6,11 @@ from fastapi import UploadFile, Form
 from fastapi.responses import StreamingResponse
 
 
-from app.utils import text_process
 from app.utils.basic_information import Role
-from app.services import document_service, user_service
+from app.schemas.ingestion_schema import IngestionKind
+from app.services import document_service, user_service, ingestion_service
 from app.utils.api_response import UserError, AuthException
-from app.services import llm_service, embedding_service, document_chunk_service
+from app.services import embedding_service, document_chunk_service, answer_cache_service
 
 
 # --- ROUTERS ---
@@ -44,80 +44,7 @@ async def upload_document(
         department = None
         faculty = current_user["faculty"]
    
-    file_path = None
-    new_document = None
-    
-    try:
-        # Extract text content from the uploaded PDF file
-        document_content = await document_service.extract_file_content(file)
-        await file.seek(0)
-        
-        # Save file to server
-        file_path = await document_service.save_document_file(file)
-        
-        # Create document record in database
-        file_name = os.path.splitext(file.filename)[0]
-        document_record = {
-            "file_name": file_name,
-            "doc_type": doc_type,
-            "department": department,
-            "faculty": faculty,
-            "file_url": file_url,
-            "uploaded_by": current_user["_id"],
-            "file_path": file_path
-        }
-        new_document = await document_service.store_document_record(document_record)
-        
-        # Split text into chunks
-        chunks = await text_process.split_text_into_chunks(document_content, words_per_chunk=800, overlap=200)
-        
-        # Generate chunk potential questions
-        api_key = await llm_service.get_current_api_key()
-        if not api_key:
-            raise UserError("No active API key found. Please activate an API key to proceed.")
-        
-        document_chunks_record = {
-            "doc_id": new_document["id"],
-            "chunks": {}
-        }
-        for idx, chunk in enumerate(chunks):
-            potential_questions = await llm_service.generate_potential_questions(
-                api_key=api_key,
-                context=chunk,
-                num_questions=5
-            )
-            document_chunks_record["chunks"][str(idx)] = {
-                "text": chunk,
-                "potential_questions": potential_questions,
-                "embedding_ids": []
-            }
-                    
-        # Convert potential question and store in ChromaDB
-        for idx, chunk_data in document_chunks_record["chunks"].items():
-            for question in chunk_data["potential_questions"]:
-                embedding = await embedding_service.store_embedding(
-                    text=question,
-                    metadatas={
-                        "doc_id": new_document["id"],
-                        "chunk_index": int(idx),
-                        "faculty": faculty if faculty else ""
-                    }
-                )
-                chunk_data["embedding_ids"].append(embedding["embedding_id"])               
-                
-        # Store document chunks record in database
-        await document_chunk_service.store_document_chunks_record(document_chunks_record)
-        return new_document
-        
-    except Exception as e:
-        if file_path:
-            await document_service.delete_document_file(file_path)
-        if new_document:
-            await document_service.delete_document_record(new_document["id"])        
-            await embedding_service.delete_embeddings_by_doc_id(new_document["id"])
-            await document_chunk_service.delete_document_chunks_by_doc_id(new_document["id"])
-        
-        raise Exception(f"Failed to upload document: {str(e)}")
+    return await _queue_ingestion(IngestionKind.DOCUMENT, file, doc_type, department, faculty, file_url, current_user)
     
     
 # Upload an appendix document
@@ -150,82 +77,16 @@ async def upload_appendix_document(
         department = None
         faculty = current_user["faculty"]
    
-    file_path = None
-    new_document = None
+    return await _queue_ingestion(IngestionKind.APPENDIX, file, doc_type, department, faculty, file_url, current_user)
     
-    try:
-        # Extract appendix content from the uploaded PDF file
-        file_content = await document_service.extract_pdf_appendix_content(file)
-        await file.seek(0)
-        
-        # Save file to server
-        file_path = await document_service.save_document_file(file)
-        
-        # Create document record in database
-        file_name = os.path.splitext(file.filename)[0]
-        document_record = {
-            "file_name": file_name,
-            "doc_type": doc_type,
-            "department": department,
-            "faculty": faculty,
-            "file_url": file_url,
-            "uploaded_by": current_user["_id"],
-            "file_path": file_path
-        }
-        new_document = await document_service.store_document_record(document_record)
-        
-        # Split text into chunks
-        appendix_description = file_content["description"]
-        tables = file_content["tables"]
-        chunks = await text_process.split_appendix_into_chunks(appendix_description, tables, table_header_rows=2)
-        
-        # Generate chunk potential questions
-        api_key = await llm_service.get_current_api_key()
-        if not api_key:
-            raise UserError("No active API key found. Please activate an API key to proceed.")
-        
-        document_chunks_record = {
-            "doc_id": new_document["id"],
-            "chunks": {}
-        }
-        for idx, chunk in enumerate(chunks):
-            potential_questions = await llm_service.generate_potential_questions_appendix(
-                api_key=api_key,
-                context=chunk,
-                num_questions=5
-            )
-            document_chunks_record["chunks"][str(idx)] = {
-                "text": chunk,
-                "potential_questions": potential_questions,
-                "embedding_ids": []
-            }
-        
-        # Convert potential question and store in ChromaDB
-        for idx, chunk_data in document_chunks_record["chunks"].items():
-            for question in chunk_data["potential_questions"]:
-                embedding = await embedding_service.store_embedding(
-                    text=question,
-                    metadatas={
-                        "doc_id": new_document["id"],
-                        "chunk_index": int(idx),
-                        "faculty": faculty if faculty else ""
-                    }
-                )
-                chunk_data["embedding_ids"].append(embedding["embedding_id"])               
-                
-        # Store document chunks record in database
-        await document_chunk_service.store_document_chunks_record(document_chunks_record)
-        return new_document
-        
-    except Exception as e:
-        if file_path:
-            await document_service.delete_document_file(file_path)
-        if new_document:
-            await document_service.delete_document_record(new_document["id"])        
-            await embedding_service.delete_embeddings_by_doc_id(new_document["id"])
-            await document_chunk_service.delete_document_chunks_by_doc_id(new_document["id"])
-        
-        raise Exception(f"Failed to upload document: {str(e)}")
+
+# Get ingestion job progress
+async def get_ingestion_job(job_id: str, current_user: dict = None):
+    job = await ingestion_service.get_job(job_id)
+    if current_user["role"] != Role.ADMIN.value:
+        if not (current_user["is_faculty_manager"] and job["faculty"] == current_user["faculty"]) and job["uploaded_by"] != current_user["_id"]:
+            raise AuthException("You do not have permission to view this ingestion job.")
+    return job
     
 
 # Get general documents
@@ -317,9 +178,51 @@ async def update_document(
     }
     
     updated_document = await document_service.update_document_record(doc_id, data)
+    await answer_cache_service.publish_corpus_change(document["faculty"])
+    if updated_document["faculty"] != document["faculty"]:
+        await answer_cache_service.publish_corpus_change(updated_document["faculty"])
     return updated_document
 
 
+# Upload a new version of a document's PDF; only its new and changed chunks are processed again
+async def replace_document_content(
+    doc_id: str,
+    file: UploadFile,
+    appendix: bool = False,
+    current_user: dict = None
+):
+    document = await document_service.get_document_by_id(doc_id)
+    
+    if not (current_user["role"] == Role.ADMIN.value or current_user["is_faculty_manager"]):
+        raise AuthException("You do not have permission to update documents.")
+    if current_user["is_faculty_manager"] and not current_user["role"] == Role.ADMIN.value:
+        if document["faculty"] != current_user["faculty"]:
+            raise AuthException("You do not have permission to update this document.")
+        if document["department"] is not None:
+            raise AuthException("You do not have permission to update department documents.")
+    
+    if file.content_type != "application/pdf":
+        raise UserError("Only PDF files are allowed.")
+    
+    file_path, staged_path = await document_service.save_document_file(file)
+    try:
+        document_record = {
+            "file_name": document["file_name"],
+            "faculty": document["faculty"],
+            "uploaded_by": current_user["_id"],
+            "updated_by": current_user["_id"],
+            "file_path": file_path
+        }
+        kind = IngestionKind.APPENDIX if appendix else IngestionKind.DOCUMENT
+        job = await ingestion_service.create_update_job(kind, doc_id, document_record, document["file_path"])
+    except Exception:
+        await document_service.release_staged_file(file_path, staged_path)
+        await document_service.delete_document_file(file_path)
+        raise
+    await document_service.release_staged_file(file_path, staged_path)
+    return job
+
+
 # Delete a document
 async def delete_document(
     doc_id: str,
@@ -335,17 +238,18 @@ async def delete_document(
         if document["department"] is not None:
             raise AuthException("You do not have permission to delete department documents.")
     
-    # Delete document file from server
-    await document_service.delete_document_file(document["file_path"])
-    
     # Delete document record from database
     await document_service.delete_document_record(doc_id)
     
+    # Delete document file from server, unless another document has the same content
+    await document_service.delete_document_file(document["file_path"])
+    
     # Delete document chunks from database
     await document_chunk_service.delete_document_chunks_by_doc_id(doc_id)
     
     # Delete embeddings from ChromaDB
     await embedding_service.delete_embeddings_by_doc_id(doc_id)
+    await answer_cache_service.publish_corpus_change(document["faculty"])
     
     return True
 
@@ -388,4 +292,35 @@ async def view_document_file(doc_id: str, current_user: dict = None):
             "X-Frame-Options": "SAMEORIGIN",
             "X-Download-Options": "noopen"
         }
-    )
\ No newline at end of file
+    )
+
+
+# --- SUPPORTING FUNCTIONS ---
+# Save the uploaded file and queue it for background ingestion
+async def _queue_ingestion(
+    kind: IngestionKind,
+    file: UploadFile,
+    doc_type: str,
+    department: str,
+    faculty: str,
+    file_url: str,
+    current_user: dict
+):
+    file_path, staged_path = await document_service.save_document_file(file)
+    try:
+        document_record = {
+            "file_name": os.path.splitext(file.filename)[0],
+            "doc_type": doc_type,
+            "department": department,
+            "faculty": faculty,
+            "file_url": file_url,
+            "uploaded_by": current_user["_id"],
+            "file_path": file_path
+        }
+        job = await ingestion_service.create_job(kind, document_record)
+    except Exception:
+        await document_service.release_staged_file(file_path, staged_path)
+        await document_service.delete_document_file(file_path)
+        raise
+    await document_service.release_staged_file(file_path, staged_path)
+    return job
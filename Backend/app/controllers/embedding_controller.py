@@ -16,4 +16,10 @@ async def reset_embeddings():
 # Recreate embeddings for document chunks
 async def recreate_embeddings():
     success = await embedding_service.recreate_embeddings()
-    return success
\ No newline at end of file
+    return success
+
+
+# Get embedding batcher metrics
+async def get_embedding_batcher_stats():
+    stats = embedding_service.get_embedding_batcher_stats()
+    return stats
\ No newline at end of file
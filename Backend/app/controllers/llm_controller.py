@@ -40,6 +40,24 @@ async def get_current_api_key():
     return api_key
 
 
+# Get runtime statistics of the API key pool
+async def get_api_key_pool_stats():
+    stats = await llm_service.get_api_key_pool_stats()
+    return stats
+
+
+# Get LLM output cache statistics
+async def get_llm_output_cache_stats():
+    stats = await llm_service.get_llm_output_cache_stats()
+    return stats
+
+
+# Purge the LLM output cache
+async def purge_llm_output_cache(model: str = None):
+    result = await llm_service.purge_llm_output_cache(model)
+    return result
+
+
 # Update an existing API key
 async def update_api_key(
     key_id: str,
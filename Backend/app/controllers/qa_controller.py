@@ -1,31 +1,39 @@
+import time
+import asyncio
+import logging
 from langdetect import detect
 from fastapi.encoders import jsonable_encoder
 
-from app.schemas.qa_schema import Feedback
+from app.schemas.qa_schema import Feedback, QAStatus
+from app.utils import metrics
 from app.utils.basic_information import Role
-from app.utils.api_response import UserError
-from app.services import qa_service, user_service
+from app.utils.api_response import UserError, sse_event
+from app.services import qa_service, qa_queue_service, user_service, answer_cache_service, translation_service
+
+
+# --- CONFIGURATION ---
+QA_EVENTS_POLL_SECONDS = 1.0
+QA_EVENTS_HEARTBEAT_SECONDS = 15.0
 
 
 # Question-Answering
 async def get_answer(question: str, current_user: dict):    
-    question_language = detect(question)
+    if qa_queue_service.QA_QUEUE_MODE:
+        return await enqueue_question(question, current_user)
     
+    await qa_service.get_active_api_key()
     question_record = jsonable_encoder(await qa_service.create_question_record(
         question=question,
         user_id=current_user["_id"],
         user_sub=current_user["sub"],
         user_faculty=current_user["faculty"]
     ))
-    
-    user_faculty = current_user["faculty"] if current_user["faculty"] is not None else ""
-    if question_language == "vi":
-        answer = await qa_service.get_answer(question, question, user_faculty, "vi")
-    else:
-        question_in_vietnamese = await qa_service.translate_to_vietnamese(question)
-        answer = await qa_service.get_answer(question, question_in_vietnamese, user_faculty, "en")
-        
-    question_record = await qa_service.update_question_record_with_answer(question_record["_id"], answer)
+    try:
+        question_record = await answer_question_record(question_record, current_user)
+    except (Exception, asyncio.CancelledError):
+        # A cancelled request (client disconnect) must not leave the record processing
+        await qa_service.update_question_record_status(question_record["_id"], QAStatus.FAILED.value)
+        raise
         
     return {
         "question_id": question_record["_id"],
@@ -34,6 +42,162 @@ async def get_answer(question: str, current_user: dict):
     }
 
 
+# Queue a question for the worker pool (queued mode)
+async def enqueue_question(question: str, current_user: dict):
+    await qa_service.get_active_api_key()
+    priority = qa_queue_service.admit(current_user["_id"])
+    try:
+        question_record = jsonable_encoder(await qa_service.create_question_record(
+            question=question,
+            user_id=current_user["_id"],
+            user_sub=current_user["sub"],
+            user_faculty=current_user["faculty"],
+            status=QAStatus.QUEUED.value
+        ))
+    except Exception:
+        qa_queue_service.cancel(current_user["_id"])
+        raise
+    
+    async def process():
+        await qa_service.update_question_record_status(question_record["_id"], QAStatus.PROCESSING.value)
+        try:
+            await answer_question_record(question_record, current_user)
+        except Exception:
+            await qa_service.update_question_record_status(question_record["_id"], QAStatus.FAILED.value)
+            raise
+    
+    qa_queue_service.enqueue(question_record["_id"], current_user["_id"], priority, process)
+    return {
+        "question_id": question_record["_id"],
+        "question": question_record["question"],
+        "status": QAStatus.QUEUED.value
+    }
+
+
+# Run the pipeline for a question record and store the answer
+async def answer_question_record(question_record: dict, current_user: dict) -> dict:
+    question = question_record["question"]
+    start = time.perf_counter()
+    api_key = await qa_service.get_active_api_key()
+    langdetect_start = time.perf_counter()
+    question_language = detect(question)
+    answer_language = "vi" if question_language == "vi" else "en"
+    user_faculty = current_user["faculty"] if current_user["faculty"] is not None else ""
+    labels = metrics.qa_labels(answer_language, user_faculty, api_key)
+    metrics.QA_STAGE_SECONDS.labels(stage="langdetect", **labels).observe(time.perf_counter() - langdetect_start)
+    
+    outcome = "error"
+    try:
+        if answer_language == "vi":
+            answer = await qa_service.get_answer(question, question, user_faculty, "vi")
+        else:
+            with metrics.observe_stage("translation", labels):
+                question_in_vietnamese = await qa_service.translate_to_vietnamese(question)
+            answer = await qa_service.get_answer(question, question_in_vietnamese, user_faculty, "en")
+            
+        updated_record = await qa_service.update_question_record_with_answer(question_record["_id"], answer)
+        outcome = "success"
+    finally:
+        metrics.QA_REQUESTS_TOTAL.labels(outcome=outcome, **labels).inc()
+        metrics.QA_REQUEST_SECONDS.labels(**labels).observe(time.perf_counter() - start)
+    return updated_record
+
+
+# Subscribe to status changes of a question record (Server-Sent Events)
+async def stream_question_events(qa_record_id: str, current_user: dict):
+    await get_qa_record_by_id(qa_record_id, current_user)
+    
+    async def event_stream():
+        last_status = None
+        while True:
+            qa_record = jsonable_encoder(await qa_service.get_qa_record_by_id(qa_record_id))
+            status = qa_record.get("status")
+            if status in (QAStatus.QUEUED.value, QAStatus.PROCESSING.value):
+                if status != last_status:
+                    yield sse_event("status", {"question_id": qa_record_id, "status": status})
+                    last_status = status
+            elif status == QAStatus.FAILED.value or (status is None and qa_record.get("answer") is None):
+                # Records from before statuses were tracked have no status; without an answer they never finished
+                yield sse_event("error", {"question_id": qa_record_id, "message": "Failed to generate answer."})
+                return
+            else:
+                yield sse_event("done", {
+                    "question_id": qa_record_id,
+                    "question": qa_record["question"],
+                    "answer": qa_record["answer"]
+                })
+                return
+            
+            # Questions queued in this process wake the stream directly, others are polled
+            event = qa_queue_service.get_job_event(qa_record_id)
+            waiter = event.wait() if event else asyncio.sleep(QA_EVENTS_POLL_SECONDS)
+            try:
+                await asyncio.wait_for(waiter, timeout=QA_EVENTS_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+    
+    return event_stream()
+
+
+# Question-Answering with streamed answer (Server-Sent Events)
+async def stream_answer(question: str, current_user: dict):
+    start = time.perf_counter()
+    api_key = await qa_service.get_active_api_key()
+    langdetect_start = time.perf_counter()
+    question_language = detect(question)
+    
+    question_record = jsonable_encoder(await qa_service.create_question_record(
+        question=question,
+        user_id=current_user["_id"],
+        user_sub=current_user["sub"],
+        user_faculty=current_user["faculty"]
+    ))
+    
+    user_faculty = current_user["faculty"] if current_user["faculty"] is not None else ""
+    answer_language = "vi" if question_language == "vi" else "en"
+    labels = metrics.qa_labels(answer_language, user_faculty, api_key)
+    metrics.QA_STAGE_SECONDS.labels(stage="langdetect", **labels).observe(time.perf_counter() - langdetect_start)
+    
+    async def event_stream():
+        yield sse_event("question", {"question_id": question_record["_id"], "question": question_record["question"]})
+        outcome = "error"
+        try:
+            if answer_language == "vi":
+                question_in_vietnamese = question
+            else:
+                with metrics.observe_stage("translation", labels):
+                    question_in_vietnamese = await qa_service.translate_to_vietnamese(question)
+            
+            answer = None
+            async for event, payload in qa_service.stream_answer(question, question_in_vietnamese, user_faculty, answer_language):
+                if event == "answer":
+                    answer = payload
+                else:
+                    yield sse_event(event, payload)
+            
+            updated_record = await qa_service.update_question_record_with_answer(question_record["_id"], answer)
+            outcome = "success"
+            yield sse_event("done", {
+                "question_id": updated_record["_id"],
+                "question": updated_record["question"],
+                "answer": updated_record["answer"]
+            })
+        except Exception as e:
+            logging.error(f"Streaming answer failed for question {question_record['_id']}: {e}", exc_info=True)
+            yield sse_event("error", {"question_id": question_record["_id"], "message": "Failed to generate answer."})
+        finally:
+            # Also covers a client that disconnected before the answer was saved
+            if outcome != "success":
+                try:
+                    await qa_service.update_question_record_status(question_record["_id"], QAStatus.FAILED.value)
+                except Exception as e:
+                    logging.error(f"Failed to mark question {question_record['_id']} as failed: {e}")
+            metrics.QA_REQUESTS_TOTAL.labels(outcome=outcome, **labels).inc()
+            metrics.QA_REQUEST_SECONDS.labels(**labels).observe(time.perf_counter() - start)
+    
+    return event_stream()
+
+
 # Leave feedback for a question
 async def leave_feedback(qa_record_id: str, feedback: str, current_user: dict):
     qa_record = jsonable_encoder(await qa_service.get_qa_record_by_id(qa_record_id))
@@ -44,6 +208,8 @@ async def leave_feedback(qa_record_id: str, feedback: str, current_user: dict):
         raise UserError("Invalid feedback value.")
     
     success = await qa_service.leave_feedback_for_question(qa_record_id, feedback, current_user["_id"])
+    if feedback == Feedback.Dislike.value:
+        answer_cache_service.invalidate_answer(qa_record["answer"])
     return success
 
 
@@ -107,6 +273,26 @@ async def get_qa_record_by_id(qa_record_id: str, current_user: dict):
     return qa_record
 
 
+# Get answer cache metrics
+async def get_answer_cache_stats():
+    return answer_cache_service.get_cache_stats()
+
+
+# Get question queue metrics
+async def get_queue_stats():
+    return qa_queue_service.get_queue_stats()
+
+
+# Get translation metrics
+async def get_translation_stats():
+    return translation_service.get_translation_stats()
+
+
+# Get single-flight coalescing metrics
+async def get_coalescing_stats():
+    return qa_service.get_coalescing_stats()
+
+
 # Reply to a question (Admin/Faculty Manager)
 async def reply_to_question(qa_record_id: str, manager_answer: str, current_user: dict):
     if current_user["role"] != Role.ADMIN.value and not current_user["is_faculty_manager"]:
@@ -16,6 +16,7 @@ class APIKeyDAO:
         api_key_data["created_at"] = datetime.now(timezone.utc)
         api_key_data["is_using"] = False
         api_key_data["using_model"] = None
+        api_key_data.setdefault("weight", 1.0)
         
         result = await self.api_keys_collection.insert_one(api_key_data)
         created_key = await self.api_keys_collection.find_one({"_id": result.inserted_id})
@@ -83,6 +84,15 @@ class APIKeyDAO:
             return api_key_schema.APIKeyRecord(**api_key_serialize(api_key))
         return None
     
+    
+    # Get all using API keys (key pool mode)
+    async def get_all_using_api_keys(self) -> list[api_key_schema.APIKeyRecord]:
+        api_keys = []
+        cursor = self.api_keys_collection.find({"is_using": True, "using_model": {"$ne": None}})
+        async for key in cursor:
+            api_keys.append(api_key_schema.APIKeyRecord(**api_key_serialize(key)))
+        return api_keys
+    
 
     # Update an existing API key record
     async def update_api_key(self, key_id: str, update_data: dict) -> dict:
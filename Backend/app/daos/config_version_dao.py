@@ -0,0 +1,26 @@
+from datetime import datetime, timezone
+from pymongo import ReturnDocument
+
+from app.databases import mongo
+
+
+class ConfigVersionDAO:
+    def __init__(self):
+        self.config_versions_collection = mongo.get_config_versions_collection()
+
+
+    # Get the current version of a configuration
+    async def get_version(self, name: str) -> int:
+        record = await self.config_versions_collection.find_one({"_id": name}, {"version": 1})
+        return record["version"] if record else 0
+
+
+    # Increase the version of a configuration so every process reloads it
+    async def bump_version(self, name: str) -> int:
+        record = await self.config_versions_collection.find_one_and_update(
+            {"_id": name},
+            {"$inc": {"version": 1}, "$set": {"updated_at": datetime.now(timezone.utc)}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return record["version"]
@@ -20,6 +20,21 @@ class DocumentChunkDAO:
         return serializer.document_chunk_serialize(created_record)
     
     
+    # Create or replace the document chunks record of a document
+    async def replace_document_chunks_record(self, document_chunks_record: dict) -> dict:
+        document_chunks_record["created_at"] = datetime.now(timezone.utc)
+        await self.document_chunks_collection.replace_one(
+            {"doc_id": document_chunks_record["doc_id"]},
+            document_chunks_record,
+            upsert=True
+        )
+        created_record = await self.document_chunks_collection.find_one({"doc_id": document_chunks_record["doc_id"]})
+        if not created_record:
+            raise DatabaseException("Failed to create document chunks record")
+
+        return serializer.document_chunk_serialize(created_record)
+
+
     # Update document chunks record
     async def update_document_chunks_record(self, doc_id: str, updated_chunks_record: dict):
         result = await self.document_chunks_collection.update_one(
@@ -62,6 +77,14 @@ class DocumentChunkDAO:
         return paginated_chunks
     
     
+    # Get every chunk of a document, keyed by chunk index
+    async def get_chunks_by_doc_id(self, doc_id: str) -> dict:
+        chunks_record = await self.document_chunks_collection.find_one({"doc_id": doc_id}, {"chunks": 1})
+        if not chunks_record:
+            raise DatabaseException(f"Document chunks record with doc_id {doc_id} not found")
+        return chunks_record.get("chunks", {})
+    
+    
     # Get document chunk by document ID and chunk index
     async def get_document_chunk_by_index(self, doc_id: str, chunk_index: int) -> dict:
         chunks_record = await self.document_chunks_collection.find_one({"doc_id": doc_id})
@@ -76,6 +99,31 @@ class DocumentChunkDAO:
         return chunk_data
     
     
+    # Get chunk texts for many (doc_id, chunk_index) pairs in a single query
+    async def get_chunk_texts_by_indices(self, chunk_indices: dict[str, set[int]]) -> dict[tuple[str, int], str]:
+        if not chunk_indices:
+            return {}
+        
+        projection = {"_id": 0, "doc_id": 1}
+        for indices in chunk_indices.values():
+            for chunk_index in indices:
+                projection[f"chunks.{chunk_index}.text"] = 1
+        
+        cursor = self.document_chunks_collection.find(
+            {"doc_id": {"$in": list(chunk_indices.keys())}},
+            projection
+        )
+        chunk_texts = {}
+        async for chunks_record in cursor:
+            doc_id = chunks_record["doc_id"]
+            chunks = chunks_record.get("chunks", {})
+            for chunk_index in chunk_indices.get(doc_id, ()):
+                chunk_data = chunks.get(str(chunk_index))
+                if chunk_data and "text" in chunk_data:
+                    chunk_texts[(doc_id, chunk_index)] = chunk_data["text"]
+        return chunk_texts
+    
+    
     # Update chunk's embedding_id by document ID and chunk index
     async def update_chunk_embedding_id(
         self,
@@ -115,6 +115,11 @@ class DocumentDAO:
         return serializer.document_serialize(document)
     
     
+    # Count documents stored under a file path
+    async def count_documents_by_file_path(self, file_path: str) -> int:
+        return await self.documents_collection.count_documents({"file_path": file_path})
+    
+    
     # Get document file info by ID
     async def get_document_file_info(self, doc_id: str) -> tuple[str, str]:
         document = await self.documents_collection.find_one({"_id": ObjectId(doc_id)})
@@ -125,6 +130,19 @@ class DocumentDAO:
         return file_name, file_url
     
     
+    # Get file info for many documents in a single query
+    async def get_documents_file_info(self, doc_ids: list[str]) -> dict[str, tuple[str, str]]:
+        object_ids = [ObjectId(doc_id) for doc_id in doc_ids]
+        cursor = self.documents_collection.find(
+            {"_id": {"$in": object_ids}},
+            {"file_name": 1, "file_url": 1}
+        )
+        file_info = {}
+        async for document in cursor:
+            file_info[str(document["_id"])] = (document.get("file_name", ""), document.get("file_url", ""))
+        return file_info
+    
+    
     # Update a document by ID
     async def update_document(self, doc_id: str, data: dict) -> dict:
         data["updated_at"] = datetime.now(timezone.utc)
@@ -4,10 +4,14 @@ from app.databases import chroma
 from app.utils.api_response import DatabaseException
 
 class EmbeddingDAO:
+    def __init__(self):
+        self.embeddings_collection = chroma.get_embeddings_collection()
+        
+        
     # Create a new embedding
     async def create_embedding(self, embedding: dict) -> dict:        
         embedding_id = str(uuid.uuid4())
-        chroma.embeddings_collection.add(
+        self.embeddings_collection.add(
             ids=[embedding_id],
             embeddings=[embedding["vector"]],
             metadatas=[embedding["metadatas"]]
@@ -17,17 +21,30 @@ class EmbeddingDAO:
             "vector": embedding["vector"],
             "metadatas": embedding["metadatas"]
         }
-        
-        
+
+
+    # Create many embeddings with a single insert; returns their IDs in input order.
+    # Given IDs are upserted, so writing the same embeddings again is harmless.
+    async def create_embeddings(self, vectors: list[list[float]], metadatas: list[dict], embedding_ids: list[str] = None) -> list[str]:
+        if not vectors:
+            return []
+        if embedding_ids is None:
+            embedding_ids = [str(uuid.uuid4()) for _ in vectors]
+            self.embeddings_collection.add(ids=embedding_ids, embeddings=vectors, metadatas=metadatas)
+        else:
+            self.embeddings_collection.upsert(ids=embedding_ids, embeddings=vectors, metadatas=metadatas)
+        return embedding_ids
+
+
     # Count total embeddings
     async def count_embeddings(self) -> int:
-        count = chroma.embeddings_collection.count()
+        count = self.embeddings_collection.count()
         return count
     
     
     # Get embedding vectors with pagination
     async def get_embedding_vectors(self, skip: int, limit: int) -> list:
-        all_embeddings = chroma.embeddings_collection.get(
+        all_embeddings = self.embeddings_collection.get(
             include=["embeddings", "metadatas"],
             offset=skip,
             limit=limit
@@ -49,7 +66,7 @@ class EmbeddingDAO:
     
     # Delete embeddings by document ID
     async def delete_embeddings_by_doc_id(self, doc_id: str):
-        all_data = chroma.embeddings_collection.get(include=["metadatas"])
+        all_data = self.embeddings_collection.get(include=["metadatas"])
         ids_to_delete = []
         
         for idx, metadata in enumerate(all_data["metadatas"]):
@@ -57,21 +74,28 @@ class EmbeddingDAO:
                 ids_to_delete.append(all_data["ids"][idx])
         
         if ids_to_delete:
-            chroma.embeddings_collection.delete(ids=ids_to_delete)
+            self.embeddings_collection.delete(ids=ids_to_delete)
             
         
     # Delete embedding by embedding ID
     async def delete_embedding_by_id(self, embedding_id: str):
-        chroma.embeddings_collection.delete(ids=[embedding_id])
+        self.embeddings_collection.delete(ids=[embedding_id])
+
+
+    # Delete many embeddings by ID with a single delete
+    async def delete_embeddings_by_ids(self, embedding_ids: list[str]):
+        if embedding_ids:
+            self.embeddings_collection.delete(ids=embedding_ids)
             
             
     # Reset embeddings collection
     async def reset_embeddings(self):
         try:
-            chroma.client.delete_collection(name="embeddings")
+            chroma.get_client().delete_collection(name="embeddings")
         except Exception:
             raise DatabaseException("Failed to reset embeddings collection.")
-        chroma.embeddings_collection = chroma.client.get_or_create_collection(name="embeddings")
+        chroma.embeddings_collection = chroma.open_embeddings_collection()
+        self.embeddings_collection = chroma.embeddings_collection
         return True
     
     
@@ -93,7 +117,7 @@ class EmbeddingDAO:
             }
         
         # Perform semantic search with ChromaDB
-        results = chroma.embeddings_collection.query(
+        results = self.embeddings_collection.query(
             query_embeddings=[embedded_question],
             n_results=top_k,
             where=where_filter,
@@ -0,0 +1,87 @@
+from bson import ObjectId
+from pymongo import ReturnDocument
+from datetime import datetime, timezone, timedelta
+
+from app.databases import mongo
+from app.utils.api_response import DatabaseException
+from app.schemas.ingestion_schema import IngestionStatus
+
+
+class IngestionJobDAO:
+    def __init__(self):
+        self.ingestion_jobs_collection = mongo.get_ingestion_jobs_collection()
+
+
+    # Create a new ingestion job
+    async def create_job(self, job: dict) -> dict:
+        now = datetime.now(timezone.utc)
+        job["created_at"] = now
+        job["available_at"] = now
+        result = await self.ingestion_jobs_collection.insert_one(job)
+        created_job = await self.ingestion_jobs_collection.find_one({"_id": result.inserted_id})
+        if not created_job:
+            raise DatabaseException("Failed to create ingestion job.")
+        return created_job
+
+
+    # Get ingestion job by ID, optionally only the projected fields
+    async def get_job_by_id(self, job_id: str, projection: dict = None) -> dict:
+        job = await self.ingestion_jobs_collection.find_one({"_id": ObjectId(job_id)}, projection)
+        if not job:
+            raise DatabaseException("Ingestion job not found.")
+        return job
+
+
+    # Claim the oldest queued job, or a running job whose worker stopped renewing its lease
+    async def claim_next_job(self, worker_id: str, lease_seconds: float) -> dict | None:
+        now = datetime.now(timezone.utc)
+        return await self.ingestion_jobs_collection.find_one_and_update(
+            {
+                "$or": [
+                    {"status": IngestionStatus.QUEUED.value, "available_at": {"$lte": now}},
+                    {"status": IngestionStatus.RUNNING.value, "lease_until": {"$lt": now}}
+                ]
+            },
+            {
+                "$set": {
+                    "status": IngestionStatus.RUNNING.value,
+                    "worker_id": worker_id,
+                    "lease_until": now + timedelta(seconds=lease_seconds),
+                    "updated_at": now
+                },
+                "$inc": {"attempts": 1}
+            },
+            sort=[("created_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+
+    # Extend the lease of a job held by a worker
+    async def renew_lease(self, job_id, worker_id: str, lease_seconds: float) -> bool:
+        now = datetime.now(timezone.utc)
+        return await self.update_job(job_id, worker_id, {"lease_until": now + timedelta(seconds=lease_seconds)})
+
+
+    # Update a job only while the given worker still holds it
+    async def update_job(self, job_id, worker_id: str, fields: dict) -> bool:
+        result = await self.ingestion_jobs_collection.update_one(
+            {"_id": ObjectId(job_id), "worker_id": worker_id, "status": IngestionStatus.RUNNING.value},
+            {"$set": {**fields, "updated_at": datetime.now(timezone.utc)}}
+        )
+        return result.matched_count > 0
+
+
+    # Count unfinished jobs ingesting a file path
+    async def count_unfinished_jobs_by_file_path(self, file_path: str) -> int:
+        return await self.ingestion_jobs_collection.count_documents({
+            "document.file_path": file_path,
+            "status": {"$in": [IngestionStatus.QUEUED.value, IngestionStatus.RUNNING.value]}
+        })
+
+
+    # Count unfinished jobs writing to a document
+    async def count_unfinished_jobs_by_doc_id(self, doc_id: str) -> int:
+        return await self.ingestion_jobs_collection.count_documents({
+            "doc_id": doc_id,
+            "status": {"$in": [IngestionStatus.QUEUED.value, IngestionStatus.RUNNING.value]}
+        })
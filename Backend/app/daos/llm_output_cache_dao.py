@@ -0,0 +1,49 @@
+from datetime import datetime, timezone
+
+from app.databases import mongo
+
+
+class LLMOutputCacheDAO:
+    def __init__(self):
+        self.llm_output_cache_collection = mongo.get_llm_output_cache_collection()
+
+
+    # Get the cached output of any of the cache keys and count the hit
+    async def get_output(self, cache_keys: list[str]):
+        record = await self.llm_output_cache_collection.find_one_and_update(
+            {"_id": {"$in": cache_keys}},
+            {"$inc": {"hits": 1}, "$set": {"last_hit_at": datetime.now(timezone.utc)}},
+            projection={"output": 1}
+        )
+        return record["output"] if record else None
+
+
+    # Store an output under its cache key
+    async def store_output(self, cache_key: str, output, metadata: dict):
+        await self.llm_output_cache_collection.update_one(
+            {"_id": cache_key},
+            {
+                "$set": {**metadata, "output": output, "created_at": datetime.now(timezone.utc)},
+                "$setOnInsert": {"hits": 0}
+            },
+            upsert=True
+        )
+
+
+    # Count cached outputs, optionally of one model
+    async def count_outputs(self, model: str = None) -> int:
+        return await self.llm_output_cache_collection.count_documents({"model": model} if model else {})
+
+
+    # Total hits served by stored outputs, across every process
+    async def sum_hits(self) -> int:
+        cursor = self.llm_output_cache_collection.aggregate([{"$group": {"_id": None, "hits": {"$sum": "$hits"}}}])
+        async for result in cursor:
+            return result["hits"]
+        return 0
+
+
+    # Delete cached outputs, optionally only those of one model
+    async def purge_outputs(self, model: str = None) -> int:
+        result = await self.llm_output_cache_collection.delete_many({"model": model} if model else {})
+        return result.deleted_count
@@ -26,7 +26,11 @@ class QADao:
     async def update_qa_answer(self, qa_id: str, answer: str) -> dict:
         result = await self.qa_collection.update_one(
             {"_id": ObjectId(qa_id)},
-            {"$set": {"answer": answer, "updated_at": datetime.now(timezone.utc)}}
+            {"$set": {
+                "answer": answer,
+                "status": qa_schema.QAStatus.ANSWERED.value,
+                "updated_at": datetime.now(timezone.utc)
+            }}
         )
         if result.matched_count == 0:
             raise DatabaseException(f"QA record with qa_id {qa_id} not found")
@@ -35,6 +39,17 @@ class QADao:
         return qa_schema.QARecordSchema(**serializer.qa_session_serialize(updated_record))
     
     
+    # Update QA record status by ID
+    async def update_qa_status(self, qa_id: str, status: str) -> bool:
+        result = await self.qa_collection.update_one(
+            {"_id": ObjectId(qa_id)},
+            {"$set": {"status": status, "updated_at": datetime.now(timezone.utc)}}
+        )
+        if result.matched_count == 0:
+            raise DatabaseException(f"QA record with qa_id {qa_id} not found")
+        return True
+    
+    
     # Count all QA records
     async def count_all_qa_records(self, feedback: str, faculty: str, keyword: str, has_manager_answer: bool) -> int:
         query = {}
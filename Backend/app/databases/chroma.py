@@ -1,4 +1,5 @@
 import os
+import logging
 import chromadb
 from chromadb.config import Settings
 
@@ -10,24 +11,51 @@ use_local = os.getenv("CHROMA_USE_LOCAL", "true").lower() == "true"
 
 
 # --- CLIENT ---
-if use_local:
-    # Use persistent local client for development
-    client = chromadb.PersistentClient(
-        path="./chroma_data",
-        settings=Settings(allow_reset=True)
-    )
-else:
-    # Use HTTP client for production/Docker
-    client = chromadb.HttpClient(
-        host=chroma_host,
-        port=chroma_port,
-        settings=Settings(allow_reset=True)
-    )
+# Connect to ChromaDB
+client = None
+embeddings_collection = None
+
+def connect_to_chroma():
+    global client, embeddings_collection
+    if client is not None:
+        return client
+    
+    if use_local:
+        # Use persistent local client for development
+        client = chromadb.PersistentClient(
+            path="./chroma_data",
+            settings=Settings(allow_reset=True)
+        )
+        logging.info("Opened local ChromaDB at ./chroma_data")
+    else:
+        # Use HTTP client for production/Docker
+        client = chromadb.HttpClient(
+            host=chroma_host,
+            port=chroma_port,
+            settings=Settings(allow_reset=True)
+        )
+        logging.info(f"Connected to ChromaDB at {chroma_host}:{chroma_port}")
+    embeddings_collection = open_embeddings_collection()
+    return client
+
+
+# Get the ChromaDB client, connecting on first use
+def get_client():
+    if client is None:
+        connect_to_chroma()
+    return client
 
 
 # --- COLLECTIONS ---
 # Question embeddings collection
-embeddings_collection = client.get_or_create_collection(
-    name="embeddings",
-    metadata={"hnsw:space": "cosine"}
-)
\ No newline at end of file
+def open_embeddings_collection():
+    return get_client().get_or_create_collection(
+        name="embeddings",
+        metadata={"hnsw:space": "cosine"}
+    )
+
+
+def get_embeddings_collection():
+    if embeddings_collection is None:
+        connect_to_chroma()
+    return embeddings_collection
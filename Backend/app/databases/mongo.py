@@ -97,3 +97,30 @@ def get_popular_questions_collection():
         raise RuntimeError("Database has not been initialized.")
     logging.info(f"Accessing collection: popular_questions in database: {DB_NAME}")
     return db.get_collection("popular_questions")
+
+
+# Configuration versions collection
+def get_config_versions_collection():
+    global db
+    if db is None:
+        raise RuntimeError("Database has not been initialized.")
+    logging.info(f"Accessing collection: config_versions in database: {DB_NAME}")
+    return db.get_collection("config_versions")
+
+
+# Document ingestion jobs collection
+def get_ingestion_jobs_collection():
+    global db
+    if db is None:
+        raise RuntimeError("Database has not been initialized.")
+    logging.info(f"Accessing collection: ingestion_jobs in database: {DB_NAME}")
+    return db.get_collection("ingestion_jobs")
+
+
+# LLM output cache collection
+def get_llm_output_cache_collection():
+    global db
+    if db is None:
+        raise RuntimeError("Database has not been initialized.")
+    logging.info(f"Accessing collection: llm_output_cache in database: {DB_NAME}")
+    return db.get_collection("llm_output_cache")
@@ -1,12 +1,17 @@
+import asyncio
 import logging
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Response
 from contextlib import asynccontextmanager
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
 from app.routes import llm_route
-from app.utils.api_response import api_response, UserError, NotFoundException, DatabaseException, AuthException
+from app.utils.metrics import register_stats
+from app.utils.process_pool import shutdown_process_pool
+from app.services import warmup_service, llm_clients, llm_service, qa_service, qa_queue_service, ingestion_service, answer_cache_service, embedding_service, translation_service
+from app.utils.api_response import api_response, UserError, NotFoundException, DatabaseException, AuthException, TooManyRequestsException, ServiceUnavailableException, PayloadTooLargeException
 from app.databases.mongo import connect_to_mongo, close_mongo_connection
 from app.routes import auth_route, user_route, document_route, document_chunk_route, embedding_route, qa_route, statistical_route
 
@@ -18,15 +23,35 @@ logger = logging.getLogger("SystemLogger")
 # --- FILTER OUT HEALTH CHECK LOGS ---
 class HealthCheckFilter(logging.Filter):
     def filter(self, record: logging.LogRecord) -> bool:
-        return record.getMessage().find("GET / ") == -1
+        message = record.getMessage()
+        return message.find("GET / ") == -1 and message.find("GET /ready ") == -1 and message.find("GET /metrics ") == -1
 logger.addFilter(HealthCheckFilter())
 
 
+# --- METRICS SETUP ---
+register_stats("answer_cache", answer_cache_service.get_cache_stats)
+register_stats("embedding_batcher", embedding_service.get_embedding_batcher_stats)
+register_stats("translation", translation_service.get_translation_stats)
+register_stats("qa_coalescing", qa_service.get_coalescing_stats)
+register_stats("qa_queue", qa_queue_service.get_queue_stats)
+register_stats("llm_output_cache", llm_service.get_llm_output_cache_counters)
+
+
 # --- LIFESPAN EVENT ---
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    await connect_to_mongo()
+    await warmup_service.track_component("mongo", connect_to_mongo, required=True)
+    warm_up_task = asyncio.create_task(warmup_service.warm_up())
+    if qa_queue_service.QA_QUEUE_MODE:
+        qa_queue_service.start_workers()
+    if ingestion_service.INGEST_IN_PROCESS_WORKERS:
+        ingestion_service.start_workers(ingestion_service.INGEST_IN_PROCESS_WORKERS)
     yield
+    warm_up_task.cancel()
+    await qa_queue_service.stop_workers()
+    await ingestion_service.stop_workers()
+    shutdown_process_pool()
+    await llm_clients.close_clients()
     await close_mongo_connection()
 
 
@@ -85,6 +110,38 @@ async def not_found_handler(request, exc: NotFoundException):
 
 
 
+# Payload Too Large Exception
+@app.exception_handler(PayloadTooLargeException)
+async def payload_too_large_handler(request: Request, exc: PayloadTooLargeException):
+    return api_response(
+        status_code=413,
+        message="Payload Too Large",
+        details=exc.message
+    )
+
+
+# Too Many Requests Exception
+@app.exception_handler(TooManyRequestsException)
+async def too_many_requests_handler(request: Request, exc: TooManyRequestsException):
+    return api_response(
+        status_code=429,
+        message="Too Many Requests",
+        details=exc.message,
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+
+# Service Unavailable Exception
+@app.exception_handler(ServiceUnavailableException)
+async def service_unavailable_handler(request: Request, exc: ServiceUnavailableException):
+    return api_response(
+        status_code=503,
+        message="Service Unavailable",
+        details=exc.message,
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+
 # Validation Error
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
@@ -133,6 +190,23 @@ async def home():
     return {"msg": "Welcome to the TDTU QA System API"}
 
 
+# --- READINESS ENDPOINT ---
+@app.get("/ready")
+async def ready():
+    readiness = warmup_service.get_readiness()
+    return api_response(
+        status_code=200 if readiness["ready"] else 503,
+        message="Service is ready." if readiness["ready"] else "Service is warming up.",
+        details=readiness
+    )
+
+
+# --- METRICS ENDPOINT ---
+@app.get("/metrics")
+async def metrics():
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
 # --- ROUTES ---
 # Authentication routes
 app.include_router(auth_route.router, prefix="/api")
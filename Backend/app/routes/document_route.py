@@ -30,7 +30,7 @@ async def upload_document(
     current_user = Depends(auth_service.get_current_user)
 ):
     current_user = jsonable_encoder(current_user)
-    uploaded_document = await document_controller.upload_document(
+    ingestion_job = await document_controller.upload_document(
         file=file,
         doc_type=doc_type,
         department=department,
@@ -39,9 +39,9 @@ async def upload_document(
         current_user=current_user
     )
     return api_response(
-        status_code=201,
-        message="Document uploaded successfully.",
-        details=uploaded_document
+        status_code=202,
+        message="Document uploaded and queued for processing.",
+        details=ingestion_job
     )
     
     
@@ -56,7 +56,7 @@ async def upload_appendix_document(
     current_user = Depends(auth_service.get_current_user)
 ):
     current_user = jsonable_encoder(current_user)
-    uploaded_document = await document_controller.upload_appendix_document(
+    ingestion_job = await document_controller.upload_appendix_document(
         file=file,
         doc_type=doc_type,
         department=department,
@@ -65,11 +65,26 @@ async def upload_appendix_document(
         current_user=current_user
     )
     return api_response(
-        status_code=201,
-        message="Document uploaded successfully.",
-        details=uploaded_document
+        status_code=202,
+        message="Document uploaded and queued for processing.",
+        details=ingestion_job
     )
     
+# Get the progress of an upload
+@router.get("/jobs/{job_id}")
+async def get_ingestion_job(
+    job_id: str,
+    current_user = Depends(auth_service.get_current_user)
+):
+    current_user = jsonable_encoder(current_user)
+    ingestion_job = await document_controller.get_ingestion_job(job_id, current_user)
+    return api_response(
+        status_code=200,
+        message="Ingestion job retrieved successfully.",
+        details=ingestion_job
+    )
+    
+    
 # Get general documents
 @router.get("/general")
 async def get_documents(
@@ -156,6 +171,28 @@ async def update_document(
     )
     
     
+# Upload a new version of a document
+@router.put("/{doc_id}/content")
+async def replace_document_content(
+    doc_id: str,
+    file: UploadFile,
+    appendix: bool = Form(False),
+    current_user = Depends(auth_service.get_current_user)
+):
+    current_user = jsonable_encoder(current_user)
+    ingestion_job = await document_controller.replace_document_content(
+        doc_id=doc_id,
+        file=file,
+        appendix=appendix,
+        current_user=current_user
+    )
+    return api_response(
+        status_code=202,
+        message="New document version uploaded and queued for processing.",
+        details=ingestion_job
+    )
+    
+    
 # Delete a document
 @router.delete("/{doc_id}")
 async def delete_document(
@@ -31,6 +31,17 @@ async def get_embedding_vectors(
     )
     
     
+# Get embedding batcher metrics
+@router.get("/batcher-stats")
+async def get_embedding_batcher_stats():
+    stats = await embedding_controller.get_embedding_batcher_stats()
+    return api_response(
+        status_code=200,
+        message="Get embedding batcher statistics successfully.",
+        details=stats
+    )
+    
+    
 # Reset collection
 @router.delete("/reset")
 async def reset_embeddings():
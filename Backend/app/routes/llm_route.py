@@ -57,6 +57,39 @@ async def get_current_api_key():
     )
     
     
+# Get API key pool statistics (in-flight, latency, errors, cooldowns)
+@router.get("/api-keys/pool-stats")
+async def get_api_key_pool_stats():
+    stats = await llm_controller.get_api_key_pool_stats()
+    return api_response(
+        status_code=200,
+        message="Get API key pool statistics successfully.",
+        details=stats
+    )
+    
+    
+# Get LLM output cache statistics (hit rate, stored outputs)
+@router.get("/output-cache/stats")
+async def get_llm_output_cache_stats():
+    stats = await llm_controller.get_llm_output_cache_stats()
+    return api_response(
+        status_code=200,
+        message="Get LLM output cache statistics successfully.",
+        details=stats
+    )
+    
+    
+# Purge the LLM output cache, optionally only for one model ("provider:model")
+@router.delete("/output-cache")
+async def purge_llm_output_cache(model: Optional[str] = Query(None)):
+    result = await llm_controller.purge_llm_output_cache(model)
+    return api_response(
+        status_code=200,
+        message="LLM output cache purged successfully.",
+        details=result
+    )
+    
+    
 # Get a single API Key by ID
 @router.get("/api-keys/{key_id}")
 async def get_api_key_by_id(key_id: str):
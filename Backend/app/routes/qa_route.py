@@ -1,8 +1,10 @@
 from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
 from fastapi.encoders import jsonable_encoder
 
 from app.schemas import qa_schema
 from app.services import auth_service
+from app.utils.basic_information import Role
 from app.controllers import qa_controller
 from app.utils.api_response import api_response
 
@@ -25,6 +27,12 @@ async def qa(
     data = jsonable_encoder(data)
     current_user = jsonable_encoder(current_user)
     answer = await qa_controller.get_answer(data["question"], current_user)
+    if answer.get("status") == qa_schema.QAStatus.QUEUED.value:
+        return api_response(
+            status_code=202,
+            message="Question queued. Poll the Q&A record or subscribe to its events for the answer.",
+            details=answer
+        )
     return api_response(
         status_code=200,
         message="Get answer successfully.",
@@ -32,6 +40,25 @@ async def qa(
 )
     
     
+# Question-Answering with streamed answer (Server-Sent Events)
+@router.post("/ask/stream")
+async def qa_stream(
+    data: qa_schema.QuestionSchema,
+    current_user = Depends(auth_service.get_current_user)
+):
+    data = jsonable_encoder(data)
+    current_user = jsonable_encoder(current_user)
+    event_stream = await qa_controller.stream_answer(data["question"], current_user)
+    return StreamingResponse(
+        event_stream,
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+    
+    
 # Leave feedback for a question
 @router.post("/feedback/{qa_record_id}")
 async def leave_feedback(
@@ -94,6 +121,68 @@ async def get_all_question_records(
     )
     
     
+# Get answer cache metrics (Admin)
+@router.get("/cache/stats", dependencies=[Depends(auth_service.require_role([Role.ADMIN.value]))])
+async def get_answer_cache_stats():
+    stats = await qa_controller.get_answer_cache_stats()
+    return api_response(
+        status_code=200,
+        message="Get answer cache statistics successfully.",
+        details=stats
+    )
+    
+    
+# Get translation metrics (Admin)
+@router.get("/translation/stats", dependencies=[Depends(auth_service.require_role([Role.ADMIN.value]))])
+async def get_translation_stats():
+    stats = await qa_controller.get_translation_stats()
+    return api_response(
+        status_code=200,
+        message="Get translation statistics successfully.",
+        details=stats
+    )
+    
+    
+# Get question queue metrics (Admin)
+@router.get("/queue/stats", dependencies=[Depends(auth_service.require_role([Role.ADMIN.value]))])
+async def get_queue_stats():
+    stats = await qa_controller.get_queue_stats()
+    return api_response(
+        status_code=200,
+        message="Get question queue statistics successfully.",
+        details=stats
+    )
+    
+    
+# Get coalescing metrics of identical in-flight questions (Admin)
+@router.get("/coalescing/stats", dependencies=[Depends(auth_service.require_role([Role.ADMIN.value]))])
+async def get_coalescing_stats():
+    stats = await qa_controller.get_coalescing_stats()
+    return api_response(
+        status_code=200,
+        message="Get coalescing statistics successfully.",
+        details=stats
+    )
+    
+    
+# Subscribe to the status and answer of a question record (Server-Sent Events)
+@router.get("/{qa_record_id}/events")
+async def stream_question_events(
+    qa_record_id: str,
+    current_user = Depends(auth_service.get_current_user)
+):
+    current_user = jsonable_encoder(current_user)
+    event_stream = await qa_controller.stream_question_events(qa_record_id, current_user)
+    return StreamingResponse(
+        event_stream,
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+    
+    
 # Get qa record by ID
 @router.get("/{qa_record_id}")
 async def get_qa_record_by_id(
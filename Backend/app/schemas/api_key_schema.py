@@ -14,6 +14,7 @@ class APIKeyRecord(BaseModel):
     provider: str
     is_using: bool
     using_model: Optional[str] = None
+    weight: float = 1.0
     created_at: datetime
     updated_at: Optional[datetime] = None
     class Config:
@@ -37,6 +38,7 @@ class APIKeyCreationSchema(BaseModel):
 class APIKeyInformationUpdateSchema(BaseModel):
     name: Optional[str] = None
     description: Optional[str] = None
+    weight: Optional[float] = Field(None, gt=0)
     class Config:
         from_attributes = True
         extra = "forbid"
@@ -54,6 +56,7 @@ class APIKeyAddModelSchema(BaseModel):
 class APIKeyProvider(str, Enum):
     OPENAI = "OpenAI"
     GEMINI = "Google"
+    LOCAL = "Local"                 # In-process stub for load testing
     
     
 # Get Available Models Schema
@@ -0,0 +1,38 @@
+from enum import Enum
+
+
+# Ingestion Job Kind Enum
+class IngestionKind(str, Enum):
+    DOCUMENT = "document"
+    APPENDIX = "appendix"
+
+
+# Ingestion Job Mode Enum: a new document, or a new version of an existing one
+class IngestionMode(str, Enum):
+    CREATE = "create"
+    UPDATE = "update"
+
+
+# Ingestion Job Status Enum
+class IngestionStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+# Ingestion Stage Enum, in pipeline order
+class IngestionStage(str, Enum):
+    EXTRACT = "extract"
+    CHUNK = "chunk"
+    GENERATE = "generate"
+    EMBED = "embed"
+    PERSIST = "persist"
+    DONE = "done"
+
+
+# How the text of a PDF page is extracted
+class PageExtractionMethod(str, Enum):
+    TEXT = "text"
+    OCR = "ocr"
+    EMPTY = "empty"
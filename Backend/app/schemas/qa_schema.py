@@ -23,6 +23,7 @@ class QARecordSchema(BaseModel):
     answer: Optional[str] = None
     feedback: Optional[str] = None
     manager_answer: Optional[str] = None
+    status: Optional[str] = None
     created_at: datetime
     updated_at: Optional[datetime] = None
 
@@ -32,6 +33,14 @@ class QARecordSchema(BaseModel):
         json_encoders = { ObjectId: str }
         
         
+# Question Status Enum
+class QAStatus(str, Enum):
+    QUEUED = "queued"
+    PROCESSING = "processing"
+    ANSWERED = "answered"
+    FAILED = "failed"
+    
+    
 # Feedback Enum
 class Feedback(str, Enum):
     Like = "Like"
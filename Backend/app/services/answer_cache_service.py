@@ -0,0 +1,223 @@
+import os
+import time
+import itertools
+import numpy as np
+from collections import OrderedDict
+
+from app.daos.config_version_dao import ConfigVersionDAO
+
+
+# --- CONFIGURATION ---
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+ANSWER_CACHE_MAX_SIZE = int(os.getenv("ANSWER_CACHE_MAX_SIZE") or 1000)
+ANSWER_CACHE_TTL_SECONDS = float(os.getenv("ANSWER_CACHE_TTL_SECONDS") or 3600)
+ANSWER_CACHE_SIMILARITY_THRESHOLD = float(os.getenv("ANSWER_CACHE_SIMILARITY_THRESHOLD") or 0.95)
+ANSWER_CACHE_CORPUS_CHECK_SECONDS = float(os.getenv("ANSWER_CACHE_CORPUS_CHECK_SECONDS") or 5)
+CORPUS_CONFIG = "documents"
+
+GENERAL_SCOPE = ""
+
+
+# --- SEMANTIC ANSWER CACHE ---
+class SemanticAnswerCache:
+    def __init__(self, max_size: int, ttl_seconds: float, similarity_threshold: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.entries: OrderedDict[int, dict] = OrderedDict()
+        self.ids = itertools.count()
+
+        # Corpus versions: one per faculty scope plus a global one.
+        # Faculty-scoped questions see their faculty and general documents,
+        # questions without a faculty see every document.
+        self.global_version = 0
+        self.scope_versions: dict[str, int] = {}
+
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0
+        }
+
+
+    # Snapshot the corpus version a question is answered against
+    def corpus_version(self, faculty: str) -> tuple:
+        if faculty == GENERAL_SCOPE:
+            return (self.global_version,)
+        return (self.scope_versions.get(GENERAL_SCOPE, 0), self.scope_versions.get(faculty, 0))
+
+
+    # Find a cached answer for a semantically equivalent question
+    def lookup(self, vector: list[float], faculty: str, language: str, model: str) -> str | None:
+        now = time.monotonic()
+        current_version = self.corpus_version(faculty)
+
+        candidate_ids = []
+        candidate_vectors = []
+        for entry_id, entry in list(self.entries.items()):
+            if now - entry["created_at"] > self.ttl_seconds:
+                del self.entries[entry_id]
+                self.stats["expirations"] += 1
+                continue
+            if entry["faculty"] != faculty or entry["language"] != language or entry["model"] != model:
+                continue
+            if entry["corpus_version"] != current_version:
+                continue
+            candidate_ids.append(entry_id)
+            candidate_vectors.append(entry["vector"])
+
+        if candidate_ids:
+            similarities = np.stack(candidate_vectors) @ _normalize(vector)
+            best = int(np.argmax(similarities))
+            if similarities[best] >= self.similarity_threshold:
+                entry_id = candidate_ids[best]
+                self.entries.move_to_end(entry_id)
+                self.stats["hits"] += 1
+                return self.entries[entry_id]["answer"]
+
+        self.stats["misses"] += 1
+        return None
+
+
+    # Store an answer computed against the given corpus version
+    def store(self, vector: list[float], faculty: str, language: str, model: str, answer: str, corpus_version: tuple):
+        if corpus_version != self.corpus_version(faculty):
+            return
+
+        self.entries[next(self.ids)] = {
+            "vector": _normalize(vector),
+            "faculty": faculty,
+            "language": language,
+            "model": model,
+            "answer": answer,
+            "corpus_version": corpus_version,
+            "created_at": time.monotonic()
+        }
+        self.stats["stores"] += 1
+
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+
+    # Invalidate answers that may depend on a faculty's documents
+    def invalidate_faculty(self, faculty: str | None):
+        faculty = faculty or GENERAL_SCOPE
+        self.global_version += 1
+        self.scope_versions[faculty] = self.scope_versions.get(faculty, 0) + 1
+
+        stale_ids = [
+            entry_id for entry_id, entry in self.entries.items()
+            if entry["corpus_version"] != self.corpus_version(entry["faculty"])
+        ]
+        for entry_id in stale_ids:
+            del self.entries[entry_id]
+        self.stats["invalidations"] += len(stale_ids)
+
+
+    # Invalidate every entry, whatever its faculty scope
+    def invalidate_all(self):
+        self.global_version += 1
+        self.scope_versions[GENERAL_SCOPE] = self.scope_versions.get(GENERAL_SCOPE, 0) + 1
+        self.stats["invalidations"] += len(self.entries)
+        self.entries.clear()
+
+
+    # Invalidate every entry holding a given answer
+    def invalidate_answer(self, answer: str):
+        stale_ids = [entry_id for entry_id, entry in self.entries.items() if entry["answer"] == answer]
+        for entry_id in stale_ids:
+            del self.entries[entry_id]
+        self.stats["invalidations"] += len(stale_ids)
+
+
+    # Get cache metrics
+    def get_stats(self) -> dict:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "size": len(self.entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "similarity_threshold": self.similarity_threshold,
+            "hit_rate": self.stats["hits"] / lookups if lookups else 0.0
+        }
+
+
+# --- SUPPORTING FUNCTIONS ---
+# L2-normalize a vector so dot products are cosine similarities
+def _normalize(vector: list[float]) -> np.ndarray:
+    array = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(array)
+    return array / norm if norm > 0 else array
+
+
+# --- SERVICE FUNCTIONS ---
+answer_cache = SemanticAnswerCache(
+    max_size=ANSWER_CACHE_MAX_SIZE,
+    ttl_seconds=ANSWER_CACHE_TTL_SECONDS,
+    similarity_threshold=ANSWER_CACHE_SIMILARITY_THRESHOLD
+)
+
+
+# Last seen version of the shared corpus stamp, written by processes that change documents
+corpus_sync = {
+    "version": None,
+    "checked_at": 0.0
+}
+
+
+# Get corpus version for a faculty scope
+def get_corpus_version(faculty: str) -> tuple:
+    return answer_cache.corpus_version(faculty)
+
+
+# Look up a cached answer
+def get_cached_answer(vector: list[float], faculty: str, language: str, model: str) -> str | None:
+    if not ANSWER_CACHE_ENABLED:
+        return None
+    return answer_cache.lookup(vector, faculty, language, model)
+
+
+# Cache an answer
+def cache_answer(vector: list[float], faculty: str, language: str, model: str, answer: str, corpus_version: tuple):
+    if not ANSWER_CACHE_ENABLED or not answer or not isinstance(answer, str):
+        return
+    answer_cache.store(vector, faculty, language, model, answer, corpus_version)
+
+
+# Invalidate cached answers after a faculty's documents change
+def invalidate_faculty(faculty: str | None):
+    answer_cache.invalidate_faculty(faculty)
+
+
+# Invalidate cached answers in every process after documents were changed outside this one
+async def publish_corpus_change(faculty: str | None):
+    answer_cache.invalidate_faculty(faculty)
+    await ConfigVersionDAO().bump_version(CORPUS_CONFIG)
+
+
+# Drop cached answers once another process has published a corpus change
+async def sync_corpus_version():
+    now = time.monotonic()
+    if not ANSWER_CACHE_ENABLED or now - corpus_sync["checked_at"] < ANSWER_CACHE_CORPUS_CHECK_SECONDS:
+        return
+    corpus_sync["checked_at"] = now
+    version = await ConfigVersionDAO().get_version(CORPUS_CONFIG)
+    if corpus_sync["version"] is not None and version != corpus_sync["version"]:
+        answer_cache.invalidate_all()
+    corpus_sync["version"] = version
+
+
+# Invalidate a cached answer after negative feedback
+def invalidate_answer(answer: str | None):
+    if answer:
+        answer_cache.invalidate_answer(answer)
+
+
+# Get cache metrics
+def get_cache_stats() -> dict:
+    return {"enabled": ANSWER_CACHE_ENABLED, **answer_cache.get_stats()}
@@ -1,3 +1,6 @@
+import asyncio
+import logging
+
 from app.services import embedding_service
 from app.daos.document_dao import DocumentDAO
 from app.utils.api_response import DatabaseException
@@ -17,17 +20,17 @@ async def add_potential_question(doc_id: str, chunk_index: int, question: str):
     if str(chunk_index) not in chunks_record:
         raise DatabaseException(f"Chunk index {chunk_index} not found in document chunks for doc_id {doc_id}")
     
-    new_embedding = await embedding_service.store_embedding(
-        text=question,
-        metadatas={
+    embedding_ids = await embedding_service.store_embeddings(
+        texts=[question],
+        metadatas=[{
             "doc_id": doc_id,
             "chunk_index": chunk_index,
             "faculty": chunks_record[str(chunk_index)].get("faculty", "")
-        }
+        }]
     )
     
     chunks_record[str(chunk_index)]["potential_questions"].append(question)
-    chunks_record[str(chunk_index)]["embedding_ids"].append(new_embedding["embedding_id"])
+    chunks_record[str(chunk_index)]["embedding_ids"].append(embedding_ids[0])
     await DocumentChunkDAO().update_document_chunks_record(doc_id, chunks_record)
     return chunks_record
 
@@ -55,6 +58,41 @@ async def get_document_chunk_by_index(doc_id: str, chunk_index: int):
     chunk["file_url"] = file_url
     return chunk
 
+
+# Resolve chunks for many semantic search hits with deduplicated bulk queries
+async def get_document_chunks_by_hits(hits: list[dict]) -> list[dict]:
+    unique_keys = []
+    chunk_indices = {}
+    for hit in hits:
+        metadata = hit["metadata"]
+        key = (metadata["doc_id"], int(metadata["chunk_index"]))
+        if key[1] in chunk_indices.get(key[0], ()):
+            continue
+        chunk_indices.setdefault(key[0], set()).add(key[1])
+        unique_keys.append(key)
+    if not unique_keys:
+        return []
+    
+    file_info, chunk_texts = await asyncio.gather(
+        DocumentDAO().get_documents_file_info(list(chunk_indices.keys())),
+        DocumentChunkDAO().get_chunk_texts_by_indices(chunk_indices)
+    )
+    
+    chunks = []
+    for doc_id, chunk_index in unique_keys:
+        if doc_id not in file_info or (doc_id, chunk_index) not in chunk_texts:
+            logging.warning(f"Skipping stale search hit: doc_id {doc_id}, chunk_index {chunk_index}")
+            continue
+        file_name, file_url = file_info[doc_id]
+        chunks.append({
+            "doc_id": doc_id,
+            "chunk_index": chunk_index,
+            "text": chunk_texts[(doc_id, chunk_index)],
+            "file_name": file_name,
+            "file_url": file_url
+        })
+    return chunks
+
     
 # Delete document chunks by document ID
 async def delete_document_chunks_by_doc_id(doc_id: str):
@@ -1,127 +1,136 @@
 import os
-import re
-import fitz
-import shutil
-import camelot
+import uuid
 import asyncio
+import hashlib
+import logging
 import aiofiles
-import tempfile
-import pytesseract
 from io import BytesIO
 from fastapi import UploadFile
-from pdf2image import convert_from_path
 from fastapi.encoders import jsonable_encoder
 
-from app.utils import text_process
+from app.utils import text_process, ocr_engine, pdf_analysis, process_pool
 from app.daos.document_dao import DocumentDAO
+from app.daos.ingestion_job_dao import IngestionJobDAO
+from app.utils.api_response import PayloadTooLargeException
+from app.schemas.ingestion_schema import PageExtractionMethod
 
 
 # --- CONFIGURATION ---
 UPLOAD_DIRECTORY = "uploads/documents"
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES") or 50 * 1024 * 1024)
+UPLOAD_CHUNK_BYTES = 1024 * 1024
 
 
 # --- SERVICE FUNCTIONS ---
-# Extract text content from PDF documents, handling both text-based and scanned PDFs.
-async def extract_file_content(file: UploadFile):
-    document_content = ""
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-        shutil.copyfileobj(file.file, tmp)
-        tmp_path = tmp.name
+# Extract text content from PDF documents page by page: text pages use their text layer, scanned pages are OCRed.
+# Returns the text in page order and a per-page extraction report.
+async def extract_file_content(file_path: str):
+    pages = await asyncio.to_thread(text_process.classify_pdf_pages, file_path)
     
-    try:
-        # Scanned
-        is_text_pdf = await asyncio.to_thread(text_process.is_text_based_pdf, tmp_path)
-        if not is_text_pdf:
-            try:
-                images = await asyncio.to_thread(convert_from_path, tmp_path)
-                for img in images:
-                    page_text = await asyncio.to_thread(pytesseract.image_to_string, img, 'vie+eng')
-                    clean_text = re.sub(r'\s+', ' ', page_text)
-                    document_content += clean_text
-            except Exception as e:
-                raise Exception("Failed to convert scanned PDF to text.") from e
-            
-        # Text-based
-        else:
-            try:
-                # Run PDF text extraction in thread pool
-                def extract_text_from_pdf(path):
-                    doc = fitz.open(path)
-                    content = ""
-                    for page in doc:
-                        page_text = page.get_text().strip()
-                        clean_text = re.sub(r'\s+', ' ', page_text)
-                        content += clean_text
-                    doc.close()
-                    return content
-                
-                document_content = await asyncio.to_thread(extract_text_from_pdf, tmp_path)
-            except Exception as e:
-                raise Exception("Failed to extract text from PDF.") from e
-    finally:
-        # Clean up temp file
-        if os.path.exists(tmp_path):
-            os.remove(tmp_path)
-        
-    return document_content
+    # Scanned pages
+    ocr_page_numbers = [page["page"] for page in pages if page["method"] == PageExtractionMethod.OCR.value]
+    if ocr_page_numbers:
+        try:
+            ocr_texts, timings = await ocr_engine.ocr_pdf(file_path, ocr_page_numbers)
+        except Exception as e:
+            raise Exception("Failed to convert scanned PDF to text.") from e
+        for page in pages:
+            if page["page"] in ocr_texts:
+                page["text"] = ocr_texts[page["page"]]
+                page["seconds"] = timings["page_seconds"][page["page"]]
+        logging.info(
+            f"OCR of {file_path}: {timings['pages']} pages in {timings['wall_seconds']}s "
+            f"(render {timings['render']}, ocr {timings['ocr']})"
+        )
+    
+    document_content = " ".join(page["text"] for page in pages if page["text"])
+    report = [{key: value for key, value in page.items() if key != "text"} for page in pages]
+    logging.info(
+        f"Extracted {file_path}: "
+        + ", ".join(f"{sum(1 for page in pages if page['method'] == method.value)} {method.value} pages" for method in PageExtractionMethod)
+    )
+    return {
+        "text": document_content,
+        "pages": report
+    }
 
 
-# Extract text and tables from appendix PDF documents
-async def extract_pdf_appendix_content(file: UploadFile):
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-        shutil.copyfileobj(file.file, tmp)
-        tmp_path = tmp.name
-        
-    if not text_process.is_text_based_pdf(tmp_path):
-        raise RuntimeError("Appendix must be a text-based PDF.")
-    
-    try: 
-        # Extract appendix description
-        appendix_description = text_process.extract_appendix_description(tmp_path)
-        appendix_description = text_process.normalize_text(appendix_description)
-        
-        # Extract tables using Camelot
-        tables_data = []
-        tables = camelot.read_pdf(tmp_path, pages='all', flavor='lattice')
-        for table in tables:
-            df = table.df
-            df = df.map(text_process.normalize_cell)
-            tables_data.append(df.values.tolist())
-        flattened_tables = [row for table in tables_data for row in table]
-        
-        # Remove duplicate rows
-        unique_rows = []
-        seen = set()
-        
-        for row in flattened_tables:
-            row_tuple = tuple(row)
-            if row_tuple not in seen:
-                seen.add(row_tuple)
-                unique_rows.append(row)        
-
-        return {
-            "description": appendix_description,
-            "tables": unique_rows
-        }
+# Extract text and tables from appendix PDF documents in a single parse, off the event loop
+async def extract_pdf_appendix_content(file_path: str):
+    try:
+        appendix = await process_pool.run_in_process(pdf_analysis.analyze_appendix, file_path)
+    except pdf_analysis.AppendixNotTextBasedError:
+        raise
     except Exception as e:
         raise Exception("Failed to extract text and tables from appendix PDF.") from e
 
+    logging.info(f"Appendix analysis of {file_path}: {appendix['timings']}")
+    return {
+        "description": appendix["description"],
+        "tables": appendix["tables"]
+    }
+
 
-# Save uploaded document file to server
-async def save_document_file(file: UploadFile):
+# Save uploaded document file to server under its SHA-256, streaming it in chunks; identical files are stored once.
+# The upload stays staged until release_staged_file, so a file deleted before the upload's job exists can be put back.
+async def save_document_file(file: UploadFile) -> tuple[str, str]:
     os.makedirs(UPLOAD_DIRECTORY, exist_ok=True)
-    file_path = os.path.join(UPLOAD_DIRECTORY, file.filename)
-    contents = await file.read()
-    async with aiofiles.open(file_path, "wb") as f:
-        await f.write(contents)
+    digest = hashlib.sha256()
+    size = 0
+    tmp_path = os.path.join(UPLOAD_DIRECTORY, f".upload-{uuid.uuid4().hex}")
+    try:
+        async with aiofiles.open(tmp_path, "wb") as f:
+            while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+                size += len(chunk)
+                if size > UPLOAD_MAX_BYTES:
+                    raise PayloadTooLargeException(f"File exceeds the upload limit of {UPLOAD_MAX_BYTES // (1024 * 1024)} MB.")
+                digest.update(chunk)
+                await f.write(chunk)
+        
+        sha256 = digest.hexdigest()
+        file_path = os.path.join(UPLOAD_DIRECTORY, sha256[:2], f"{sha256}.pdf")
+        if not os.path.exists(file_path):
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            try:
+                os.link(tmp_path, file_path)
+            except FileExistsError:
+                pass
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
         
-    return file_path
+    return file_path, tmp_path
 
 
-# Delete document file from server
-async def delete_document_file(file_path: str):
+# Drop the staged copy of an upload once its job refers to the stored file, restoring the file if it was deleted meanwhile
+async def release_staged_file(file_path: str, staged_path: str):
     if os.path.exists(file_path):
-        os.remove(file_path)
+        os.remove(staged_path)
+    else:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        os.replace(staged_path, file_path)
+
+
+# Delete document file from server once no document or unfinished upload refers to it. The file is moved aside
+# before a second check, so an upload that started referring to it in between gets it back.
+async def delete_document_file(file_path: str):
+    if await _count_file_references(file_path):
+        return
+    deleted_path = f"{file_path}.deleted-{uuid.uuid4().hex}"
+    try:
+        os.replace(file_path, deleted_path)
+    except FileNotFoundError:
+        return
+    try:
+        referenced = await _count_file_references(file_path)
+    except BaseException:
+        os.replace(deleted_path, file_path)
+        raise
+    if referenced:
+        os.replace(deleted_path, file_path)
+    else:
+        os.remove(deleted_path)
 
 
 # Store document in MongoDB
@@ -201,3 +210,12 @@ async def view_document_file(doc_id: str):
     file_size = os.path.getsize(file_path)
 
     return file_name, file_path, file_size
+
+
+# --- SUPPORTING FUNCTIONS ---
+# Documents and unfinished uploads that use a stored file
+async def _count_file_references(file_path: str) -> int:
+    return (
+        await DocumentDAO().count_documents_by_file_path(file_path)
+        + await IngestionJobDAO().count_unfinished_jobs_by_file_path(file_path)
+    )
@@ -2,12 +2,14 @@ import os
 import re
 import asyncio
 import logging
+import threading
 from pyvi.ViTokenizer import tokenize
 from fastapi.encoders import jsonable_encoder
-from sentence_transformers import SentenceTransformer
 
 from app.daos.document_dao import DocumentDAO
 from app.daos.embedding_dao import EmbeddingDAO
+from app.utils.micro_batcher import MicroBatcher
+from app.utils.inference_backend import load_sentence_transformer
 from app.daos.document_chunk_dao import DocumentChunkDAO
 
 
@@ -16,7 +18,39 @@ logging.getLogger("sentence_transformers").setLevel(logging.WARNING)
 
 # --- CONFIGURATION ---
 EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "dangvantuan/vietnamese-embedding")
-embedding_model = SentenceTransformer(EMBEDDING_MODEL)
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE") or 32)
+EMBEDDING_BATCH_WAIT_MS = float(os.getenv("EMBEDDING_BATCH_WAIT_MS") or 5)
+EMBEDDING_QUEUE_SIZE = int(os.getenv("EMBEDDING_QUEUE_SIZE") or 1024)
+EMBEDDING_INGEST_BATCH_SIZE = int(os.getenv("EMBEDDING_INGEST_BATCH_SIZE") or 64)
+
+# Lazy loading for model
+embedding_model = None
+_model_lock = threading.Lock()
+
+
+def _load_embedding_model():
+    global embedding_model
+    with _model_lock:
+        if embedding_model is None:
+            embedding_model = load_sentence_transformer(EMBEDDING_MODEL)
+    return embedding_model
+
+
+# Segment and encode a batch of texts in one forward pass
+def _encode_batch(texts: list[str]) -> list[list[float]]:
+    model = _load_embedding_model()
+    texts_tokenized = [tokenize(text) for text in texts]
+    embedding_vectors = model.encode(texts_tokenized, batch_size=len(texts_tokenized))
+    return embedding_vectors.tolist()
+
+
+# Concurrent get_embedding calls are encoded together
+embedding_batcher = MicroBatcher(
+    process_batch=_encode_batch,
+    max_batch_size=EMBEDDING_BATCH_SIZE,
+    max_wait_ms=EMBEDDING_BATCH_WAIT_MS,
+    max_queue_size=EMBEDDING_QUEUE_SIZE
+)
 
 
 # --- MAIN SERVICE FUNCTIONS ---
@@ -34,15 +68,19 @@ async def get_embedding_vectors(page: int, limit: int):
     }
     
     
-# Store embedding in the ChromaDB
-async def store_embedding(text: str, metadatas: dict):
-    embedding = await get_embedding(text)
-    embedding_data = {
-        "vector": embedding,
-        "metadatas": metadatas
-    }
-    embedding =  await EmbeddingDAO().create_embedding(embedding_data)
-    return embedding
+# Store embeddings of many texts in the ChromaDB, encoding and inserting them batch by batch; returns the IDs in input order
+async def store_embeddings(texts: list[str], metadatas: list[dict], embedding_ids: list[str] = None) -> list[str]:
+    stored_ids = []
+    for start in range(0, len(texts), EMBEDDING_INGEST_BATCH_SIZE):
+        end = start + EMBEDDING_INGEST_BATCH_SIZE
+        batch_texts = [_normalize_text(text) for text in texts[start:end]]
+        vectors = await asyncio.to_thread(_encode_batch, batch_texts)
+        stored_ids.extend(await EmbeddingDAO().create_embeddings(
+            vectors,
+            metadatas[start:end],
+            embedding_ids[start:end] if embedding_ids is not None else None
+        ))
+    return stored_ids
 
 
 # Reset embeddings collection
@@ -61,33 +99,31 @@ async def recreate_embeddings():
         document = jsonable_encoder(await DocumentDAO().get_document_by_id(doc_id))
         
         chunks = chunks_record["chunks"]
+        texts, metadatas = [], []
         for chunk_index_str, chunk in chunks.items():
-            chunk_index = int(chunk_index_str)
-            potential_questions = chunk["potential_questions"]
-            
-            for embedding_id_index, text in enumerate(potential_questions):
-                embedding = await get_embedding(text)
-                embedding_data = {
-                    "vector": embedding,
-                    "metadatas": {
-                        "doc_id": doc_id,
-                        "chunk_index": chunk_index,
-                        "faculty": document["faculty"] if document["faculty"] else ""
-                    }
-                }
-                
-                new_embedding = await EmbeddingDAO().create_embedding(embedding_data)
-                await DocumentChunkDAO().update_chunk_embedding_id(
-                    doc_id,
-                    chunk_index,
-                    embedding_id_index,
-                    new_embedding["embedding_id"]
-                )
+            for text in chunk["potential_questions"]:
+                texts.append(text)
+                metadatas.append({
+                    "doc_id": doc_id,
+                    "chunk_index": int(chunk_index_str),
+                    "faculty": document["faculty"] if document["faculty"] else ""
+                })
+
+        # Embed the whole document in batches and write its new embedding IDs back in one update
+        embedding_ids = iter(await store_embeddings(texts, metadatas))
+        for chunk in chunks.values():
+            chunk["embedding_ids"] = [next(embedding_ids) for _ in chunk["potential_questions"]]
+        await DocumentChunkDAO().update_document_chunks_record(doc_id, chunks)
     
 
 # Delete embeddings by ID
 async def delete_embedding_by_id(embedding_id: str):
     await EmbeddingDAO().delete_embedding_by_id(embedding_id)
+
+
+# Delete many embeddings by ID
+async def delete_embeddings_by_ids(embedding_ids: list[str]):
+    await EmbeddingDAO().delete_embeddings_by_ids(embedding_ids)
     
     
 # Semantic search embeddings
@@ -106,15 +142,18 @@ async def find_relevant_potential_questions(
 # --- SUPPORTING FUNCTIONS ---
 # Get embedding for a given text
 async def get_embedding(text: str):
-    text = text.strip()
-    text = re.sub(r'\s+', ' ', text)
-    
-    text_tokenized = await asyncio.to_thread(tokenize, text)
-    embedding_vector = await asyncio.to_thread(embedding_model.encode, text_tokenized)
-    embedding = embedding_vector.tolist()
-
+    embedding = await embedding_batcher.submit(_normalize_text(text))
     return embedding
 
+
+def _normalize_text(text: str) -> str:
+    return re.sub(r'\s+', ' ', text.strip())
+
+
+# Get embedding batcher metrics
+def get_embedding_batcher_stats() -> dict:
+    return embedding_batcher.get_stats()
+
 # Delete embeddings by document ID
 async def delete_embeddings_by_doc_id(doc_id: str):
     await EmbeddingDAO().delete_embeddings_by_doc_id(doc_id)
\ No newline at end of file
@@ -0,0 +1,497 @@
+import os
+import time
+import uuid
+import socket
+import hashlib
+import asyncio
+import logging
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+from datetime import datetime, timezone, timedelta
+
+from app.utils import text_process, serializer, pdf_analysis
+from app.utils.api_response import UserError
+from app.daos.document_dao import DocumentDAO
+from app.daos.ingestion_job_dao import IngestionJobDAO
+from app.daos.document_chunk_dao import DocumentChunkDAO
+from app.schemas.ingestion_schema import IngestionKind, IngestionMode, IngestionStatus, IngestionStage, PageExtractionMethod
+from app.services import document_service, llm_service, embedding_service, document_chunk_service, answer_cache_service
+
+
+# --- CONFIGURATION ---
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS") or 1)                              # Concurrent jobs of a worker process
+INGEST_IN_PROCESS_WORKERS = int(os.getenv("INGEST_IN_PROCESS_WORKERS") or 0)        # Concurrent jobs run inside the API process
+INGEST_JOB_LEASE_SECONDS = float(os.getenv("INGEST_JOB_LEASE_SECONDS") or 60)
+INGEST_JOB_MAX_ATTEMPTS = int(os.getenv("INGEST_JOB_MAX_ATTEMPTS") or 3)
+INGEST_JOB_RETRY_BACKOFF_SECONDS = float(os.getenv("INGEST_JOB_RETRY_BACKOFF_SECONDS") or 30)
+INGEST_POLL_SECONDS = float(os.getenv("INGEST_POLL_SECONDS") or 2)
+INGEST_CHECKPOINT_CHUNKS = int(os.getenv("INGEST_CHECKPOINT_CHUNKS") or 32)         # Chunks generated between two checkpoints
+
+NUM_POTENTIAL_QUESTIONS = 5
+WORDS_PER_CHUNK = 800
+CHUNK_OVERLAP = 200
+TABLE_HEADER_ROWS = 2
+
+# Word-trigram Jaccard similarity above which a changed chunk of a new document version keeps its chunk index
+REINGEST_SIMILARITY_THRESHOLD = float(os.getenv("REINGEST_SIMILARITY_THRESHOLD") or 0.8)
+
+# Job fields read by the status endpoint; the other checkpoints hold the extracted text, chunks and questions
+JOB_STATUS_PROJECTION = {
+    "kind": 1,
+    "mode": 1,
+    "doc_id": 1,
+    "document": 1,
+    "status": 1,
+    "stage": 1,
+    "progress": 1,
+    "timings": 1,
+    "attempts": 1,
+    "error": 1,
+    "checkpoints.extract.pages": 1,
+    "created_at": 1,
+    "updated_at": 1,
+    "finished_at": 1
+}
+
+# Embedding IDs are derived from (doc_id, chunk, question), so a resumed embed stage overwrites instead of duplicating
+EMBEDDING_ID_NAMESPACE = uuid.UUID("6f1c2a4e-5b7d-4c1e-9a3f-2d8e0b6c4a17")
+
+workers: list[asyncio.Task] = []
+
+
+# Raised when another worker has taken over the job
+class LeaseLostError(Exception):
+    pass
+
+
+# Raised when no API key is active, which another attempt would not change
+class NoActiveAPIKeyError(Exception):
+    pass
+
+
+# Errors that fail a job at once instead of retrying it
+NON_RETRYABLE_ERRORS = (NoActiveAPIKeyError, pdf_analysis.AppendixNotTextBasedError)
+
+
+# --- JOB FUNCTIONS ---
+# Queue a saved document file for ingestion; the document ID is allocated up front so every attempt persists the same document
+async def create_job(kind: IngestionKind, document_record: dict) -> dict:
+    job = await IngestionJobDAO().create_job(_new_job(kind, IngestionMode.CREATE, str(ObjectId()), document_record))
+    return serializer.ingestion_job_serialize(job)
+
+
+# Queue a new version of an existing document; chunks that did not change keep their questions and embeddings
+async def create_update_job(kind: IngestionKind, doc_id: str, document_record: dict, previous_file_path: str) -> dict:
+    if await IngestionJobDAO().count_unfinished_jobs_by_doc_id(doc_id):
+        raise UserError("This document is still being processed. Please wait until its current upload finishes.")
+    job = await IngestionJobDAO().create_job({
+        **_new_job(kind, IngestionMode.UPDATE, doc_id, document_record),
+        "previous_file_path": previous_file_path
+    })
+    return serializer.ingestion_job_serialize(job)
+
+
+# Get ingestion job progress by ID
+async def get_job(job_id: str) -> dict:
+    job = await IngestionJobDAO().get_job_by_id(job_id, JOB_STATUS_PROJECTION)
+    return serializer.ingestion_job_serialize(job)
+
+
+# --- PIPELINE ---
+# Run the remaining stages of a job, starting from its last checkpoint
+async def run_job(job: dict, worker_id: str):
+    stages = list(IngestionStage)
+    for position in range(stages.index(IngestionStage(job["stage"])), stages.index(IngestionStage.DONE)):
+        stage = stages[position]
+        start = time.perf_counter()
+        await STAGE_HANDLERS[stage](job, worker_id)
+        elapsed = round(time.perf_counter() - start, 3)
+
+        job["stage"] = stages[position + 1].value
+        await _update(job, worker_id, {"stage": job["stage"], f"timings.{stage.value}": elapsed})
+        logging.info(f"Ingestion job {job['_id']}: {stage.value} finished in {elapsed}s")
+
+    await _update(job, worker_id, {
+        "status": IngestionStatus.COMPLETED.value,
+        "error": None,
+        "lease_until": None,
+        "finished_at": datetime.now(timezone.utc)
+    })
+
+
+# Extract the text (or appendix description and tables) of the PDF
+async def _extract(job: dict, worker_id: str):
+    file_path = job["document"]["file_path"]
+    if job["kind"] == IngestionKind.APPENDIX.value:
+        extracted = await document_service.extract_pdf_appendix_content(file_path)
+        await _checkpoint(job, worker_id, {"extract": extracted})
+        return
+
+    extracted = await document_service.extract_file_content(file_path)
+    await _checkpoint(job, worker_id, {"extract": extracted}, progress={
+        f"{method.value}_pages": sum(1 for page in extracted["pages"] if page["method"] == method.value)
+        for method in PageExtractionMethod
+    })
+
+
+# Split the extracted content into chunks
+async def _chunk(job: dict, worker_id: str):
+    extracted = job["checkpoints"]["extract"]
+    if job["kind"] == IngestionKind.APPENDIX.value:
+        chunks = await text_process.split_appendix_into_chunks(extracted["description"], extracted["tables"], table_header_rows=TABLE_HEADER_ROWS)
+    else:
+        chunks = await text_process.split_text_into_chunks(extracted["text"], words_per_chunk=WORDS_PER_CHUNK, overlap=CHUNK_OVERLAP)
+    if job.get("mode") != IngestionMode.UPDATE.value:
+        await _checkpoint(job, worker_id, {"chunks": chunks}, progress={"chunks": len(chunks), "generated_chunks": 0})
+        return
+
+    # New version: unchanged chunks start with their current questions, so only new and changed chunks are generated
+    plan = _plan_chunk_reuse(await DocumentChunkDAO().get_chunks_by_doc_id(job["doc_id"]), chunks)
+    reused_questions = {position: chunk["potential_questions"] for position, chunk in plan["reused"].items()}
+    await _checkpoint(
+        job,
+        worker_id,
+        {"chunks": chunks, "plan": plan, "potential_questions": reused_questions},
+        progress={"chunks": len(chunks), "generated_chunks": len(reused_questions), "diff": plan["diff"]}
+    )
+
+
+# Generate potential questions, checkpointing every few chunks so a resumed job skips what was already generated
+async def _generate(job: dict, worker_id: str):
+    chunks = job["checkpoints"]["chunks"]
+    generated = job["checkpoints"].setdefault("potential_questions", {})
+    pending = [idx for idx in range(len(chunks)) if str(idx) not in generated]
+    if not pending:
+        return
+
+    api_key = await llm_service.get_current_api_key()
+    if not api_key:
+        raise NoActiveAPIKeyError("No active API key found. Please activate an API key to proceed.")
+
+    for start in range(0, len(pending), INGEST_CHECKPOINT_CHUNKS):
+        batch = pending[start:start + INGEST_CHECKPOINT_CHUNKS]
+        chunk_potential_questions = await llm_service.generate_potential_questions_for_chunks(
+            api_key=api_key,
+            chunks=[chunks[idx] for idx in batch],
+            num_questions=NUM_POTENTIAL_QUESTIONS,
+            appendix=job["kind"] == IngestionKind.APPENDIX.value
+        )
+        batch_questions = {str(idx): questions for idx, questions in zip(batch, chunk_potential_questions)}
+        generated.update(batch_questions)
+        await _checkpoint(
+            job,
+            worker_id,
+            {f"potential_questions.{idx}": questions for idx, questions in batch_questions.items()},
+            progress={"generated_chunks": len(generated)}
+        )
+
+
+# Embed every potential question under deterministic IDs; reused chunks keep the embeddings they already have
+async def _embed(job: dict, worker_id: str):
+    faculty = job["document"]["faculty"]
+    potential_questions = job["checkpoints"]["potential_questions"]
+    reused = job["checkpoints"].get("plan", {}).get("reused", {})
+
+    texts, metadatas, new_embedding_ids, embedding_ids = [], [], [], {}
+    for position in range(len(job["checkpoints"]["chunks"])):
+        if str(position) in reused:
+            embedding_ids[str(position)] = reused[str(position)]["embedding_ids"]
+            continue
+        chunk_index = _chunk_index(job, position)
+        embedding_ids[str(position)] = []
+        for question_idx, question in enumerate(potential_questions[str(position)]):
+            embedding_id = _embedding_id(job, chunk_index, question_idx)
+            texts.append(question)
+            metadatas.append({
+                "doc_id": job["doc_id"],
+                "chunk_index": chunk_index,
+                "faculty": faculty if faculty else ""
+            })
+            new_embedding_ids.append(embedding_id)
+            embedding_ids[str(position)].append(embedding_id)
+
+    await embedding_service.store_embeddings(texts, metadatas, new_embedding_ids)
+    await _checkpoint(job, worker_id, {"embedding_ids": embedding_ids}, progress={"embeddings": len(texts)})
+
+
+# Store the chunks record and then the document record, which makes the document visible
+async def _persist(job: dict, worker_id: str):
+    doc_id = job["doc_id"]
+    checkpoints = job["checkpoints"]
+    chunks = {
+        str(_chunk_index(job, position)): {
+            "text": chunk,
+            "potential_questions": checkpoints["potential_questions"][str(position)],
+            "embedding_ids": checkpoints["embedding_ids"][str(position)]
+        }
+        for position, chunk in enumerate(checkpoints["chunks"])
+    }
+    if job.get("mode") == IngestionMode.UPDATE.value:
+        await _persist_update(job, worker_id, chunks)
+        return
+
+    await DocumentChunkDAO().replace_document_chunks_record({"doc_id": doc_id, "chunks": chunks})
+    try:
+        await DocumentDAO().create_document({"_id": ObjectId(doc_id), **job["document"]})
+    except DuplicateKeyError:
+        # Persisted by an earlier attempt that stopped before finishing the job
+        pass
+    await answer_cache_service.publish_corpus_change(job["document"]["faculty"])
+
+
+# Swap in the chunks of the new version, drop the embeddings of removed chunks and point the document at the new file
+async def _persist_update(job: dict, worker_id: str, chunks: dict):
+    doc_id = job["doc_id"]
+    removed_embedding_ids = job["checkpoints"]["plan"]["removed_embedding_ids"]
+    await DocumentChunkDAO().update_document_chunks_record(doc_id, chunks)
+    await embedding_service.delete_embeddings_by_ids(removed_embedding_ids)
+    await DocumentDAO().update_document(doc_id, {
+        "file_path": job["document"]["file_path"],
+        "updated_by": job["document"]["updated_by"]
+    })
+    await _checkpoint(job, worker_id, {}, progress={"deleted_embeddings": len(removed_embedding_ids)})
+    await document_service.delete_document_file(job["previous_file_path"])
+    await answer_cache_service.publish_corpus_change(job["document"]["faculty"])
+
+
+STAGE_HANDLERS = {
+    IngestionStage.EXTRACT: _extract,
+    IngestionStage.CHUNK: _chunk,
+    IngestionStage.GENERATE: _generate,
+    IngestionStage.EMBED: _embed,
+    IngestionStage.PERSIST: _persist
+}
+
+
+# --- WORKERS ---
+# Process a claimed job while keeping its lease alive
+async def process_job(job: dict, worker_id: str):
+    if job["attempts"] > INGEST_JOB_MAX_ATTEMPTS:
+        await _fail_job(job, worker_id, RuntimeError(f"Gave up after {INGEST_JOB_MAX_ATTEMPTS} attempts."))
+        return
+
+    heartbeat = asyncio.create_task(_keep_lease(job, worker_id))
+    try:
+        await run_job(job, worker_id)
+    except LeaseLostError:
+        logging.warning(f"Ingestion job {job['_id']} was taken over by another worker")
+    except asyncio.CancelledError:
+        # Hand the job back on shutdown so another worker resumes it from the last checkpoint
+        await IngestionJobDAO().update_job(job["_id"], worker_id, {
+            "status": IngestionStatus.QUEUED.value,
+            "worker_id": None,
+            "lease_until": None,
+            "attempts": job["attempts"] - 1,
+            "available_at": datetime.now(timezone.utc)
+        })
+        raise
+    except Exception as e:
+        logging.error(f"Ingestion job {job['_id']} failed at stage {job['stage']}: {e}", exc_info=True)
+        await _fail_job(job, worker_id, e)
+    finally:
+        heartbeat.cancel()
+
+
+def start_workers(count: int):
+    for worker_idx in range(count):
+        worker_id = f"{socket.gethostname()}:{os.getpid()}:{worker_idx}"
+        workers.append(asyncio.create_task(_worker(worker_id)))
+    logging.info(f"Started {count} ingestion workers")
+
+
+async def stop_workers():
+    for worker in workers:
+        worker.cancel()
+    await asyncio.gather(*workers, return_exceptions=True)
+    workers.clear()
+
+
+async def _worker(worker_id: str):
+    while True:
+        try:
+            job = await IngestionJobDAO().claim_next_job(worker_id, INGEST_JOB_LEASE_SECONDS)
+        except Exception as e:
+            logging.error(f"Failed to claim an ingestion job: {e}")
+            job = None
+        if job is None:
+            await asyncio.sleep(INGEST_POLL_SECONDS)
+            continue
+
+        logging.info(f"Ingestion job {job['_id']} claimed by {worker_id} at stage {job['stage']} (attempt {job['attempts']})")
+        try:
+            await process_job(job, worker_id)
+        except Exception as e:
+            # The job keeps its lease until it expires and is then claimed again
+            logging.error(f"Failed to process ingestion job {job['_id']}: {e}", exc_info=True)
+
+
+# --- SUPPORTING FUNCTIONS ---
+def _new_job(kind: IngestionKind, mode: IngestionMode, doc_id: str, document_record: dict) -> dict:
+    return {
+        "kind": kind.value,
+        "mode": mode.value,
+        "doc_id": doc_id,
+        "document": document_record,
+        "status": IngestionStatus.QUEUED.value,
+        "stage": IngestionStage.EXTRACT.value,
+        "checkpoints": {},
+        "progress": {},
+        "timings": {},
+        "attempts": 0,
+        "error": None
+    }
+
+
+# Match the chunks of a new version to the current ones: identical text first, then the most similar remaining chunk.
+# Matched chunks keep their index, and unchanged ones also their questions and embeddings. Changed chunks are generated
+# and embedded again, replacing their old embeddings; new chunks get indices after the current ones.
+def _plan_chunk_reuse(old_chunks: dict, new_chunks: list[str]) -> dict:
+    by_hash = {}
+    for chunk_index in sorted(old_chunks, key=int):
+        by_hash.setdefault(_chunk_hash(old_chunks[chunk_index]["text"]), []).append(chunk_index)
+
+    diff = {"unchanged": 0, "near_duplicate": 0, "added": 0, "removed": 0}
+    matches = {}
+    for position, chunk in enumerate(new_chunks):
+        candidates = by_hash.get(_chunk_hash(chunk))
+        if candidates:
+            matches[position] = candidates.pop(0)
+            diff["unchanged"] += 1
+
+    unchanged = set(matches)
+    matched = set(matches.values())
+    unmatched = {chunk_index: _shingles(chunk["text"]) for chunk_index, chunk in old_chunks.items() if chunk_index not in matched}
+    for position, chunk in enumerate(new_chunks):
+        if position in matches or not unmatched:
+            continue
+        shingles = _shingles(chunk)
+        chunk_index, similarity = max(
+            ((chunk_index, _jaccard(shingles, old_shingles)) for chunk_index, old_shingles in unmatched.items()),
+            key=lambda item: item[1]
+        )
+        if similarity >= REINGEST_SIMILARITY_THRESHOLD:
+            matches[position] = chunk_index
+            del unmatched[chunk_index]
+            diff["near_duplicate"] += 1
+
+    next_index = max((int(chunk_index) for chunk_index in old_chunks), default=-1) + 1
+    chunk_indices, reused, replaced = [], {}, list(unmatched)
+    for position in range(len(new_chunks)):
+        if position in matches:
+            old_chunk = old_chunks[matches[position]]
+            chunk_indices.append(int(matches[position]))
+            if position in unchanged:
+                reused[str(position)] = {
+                    "potential_questions": old_chunk.get("potential_questions", []),
+                    "embedding_ids": old_chunk.get("embedding_ids", [])
+                }
+            else:
+                replaced.append(matches[position])
+        else:
+            chunk_indices.append(next_index)
+            next_index += 1
+            diff["added"] += 1
+
+    diff["removed"] = len(unmatched)
+    return {
+        "chunk_indices": chunk_indices,
+        "reused": reused,
+        "removed_embedding_ids": [embedding_id for chunk_index in replaced for embedding_id in old_chunks[chunk_index].get("embedding_ids", [])],
+        "diff": diff
+    }
+
+
+def _chunk_hash(text: str) -> str:
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+
+def _shingles(text: str, size: int = 3) -> set[str]:
+    words = text.lower().split()
+    return {" ".join(words[start:start + size]) for start in range(max(len(words) - size + 1, 1))}
+
+
+def _jaccard(a: set, b: set) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+# Chunk index of a chunk position; new versions keep the indices of matched chunks
+def _chunk_index(job: dict, position: int) -> int:
+    plan = job["checkpoints"].get("plan")
+    return plan["chunk_indices"][position] if plan else position
+
+
+# Update jobs also use the job ID, so a changed chunk's new embeddings never overwrite the ones the current version uses
+def _embedding_id(job: dict, chunk_index: int, question_idx: int) -> str:
+    if job.get("mode") == IngestionMode.UPDATE.value:
+        return str(uuid.uuid5(EMBEDDING_ID_NAMESPACE, f"{job['doc_id']}:{job['_id']}:{chunk_index}:{question_idx}"))
+    return str(uuid.uuid5(EMBEDDING_ID_NAMESPACE, f"{job['doc_id']}:{chunk_index}:{question_idx}"))
+
+
+async def _update(job: dict, worker_id: str, fields: dict):
+    if not await IngestionJobDAO().update_job(job["_id"], worker_id, fields):
+        raise LeaseLostError(f"Ingestion job {job['_id']} is no longer held by {worker_id}")
+
+
+# Save stage output; top-level checkpoints are mirrored on the in-memory job
+async def _checkpoint(job: dict, worker_id: str, checkpoints: dict, progress: dict = None):
+    fields = {f"checkpoints.{key}": value for key, value in checkpoints.items()}
+    fields.update({f"progress.{key}": value for key, value in (progress or {}).items()})
+    await _update(job, worker_id, fields)
+    for key, value in checkpoints.items():
+        if "." not in key:
+            job["checkpoints"][key] = value
+    job["progress"].update(progress or {})
+
+
+async def _keep_lease(job: dict, worker_id: str):
+    while True:
+        await asyncio.sleep(INGEST_JOB_LEASE_SECONDS / 3)
+        if not await IngestionJobDAO().renew_lease(job["_id"], worker_id, INGEST_JOB_LEASE_SECONDS):
+            return
+
+
+# Retry the job later with backoff, or give up and remove everything it stored
+async def _fail_job(job: dict, worker_id: str, error: Exception):
+    now = datetime.now(timezone.utc)
+    message = f"{type(error).__name__}: {error}"[:500]
+    if job["attempts"] < INGEST_JOB_MAX_ATTEMPTS and not isinstance(error, NON_RETRYABLE_ERRORS):
+        retry_in = INGEST_JOB_RETRY_BACKOFF_SECONDS * 2 ** (job["attempts"] - 1)
+        await IngestionJobDAO().update_job(job["_id"], worker_id, {
+            "status": IngestionStatus.QUEUED.value,
+            "worker_id": None,
+            "lease_until": None,
+            "error": message,
+            "available_at": now + timedelta(seconds=retry_in)
+        })
+        return
+
+    doc_id = job["doc_id"]
+    if job.get("mode") == IngestionMode.UPDATE.value:
+        # The document keeps its current version. Once persisting has started, its chunks may already use the new embeddings.
+        if job["stage"] != IngestionStage.PERSIST.value:
+            await embedding_service.delete_embeddings_by_ids(_new_embedding_ids(job))
+    else:
+        await embedding_service.delete_embeddings_by_doc_id(doc_id)
+        await document_chunk_service.delete_document_chunks_by_doc_id(doc_id)
+        await document_service.delete_document_record(doc_id)
+    await IngestionJobDAO().update_job(job["_id"], worker_id, {
+        "status": IngestionStatus.FAILED.value,
+        "lease_until": None,
+        "error": message,
+        "finished_at": now
+    })
+    # The file is shared with other uploads of the same content, so it is only removed once the job no longer refers to it
+    await document_service.delete_document_file(job["document"]["file_path"])
+
+
+# Embedding IDs of the chunks an update job generated itself
+def _new_embedding_ids(job: dict) -> list[str]:
+    checkpoints = job["checkpoints"]
+    if "plan" not in checkpoints:
+        return []
+    return [
+        _embedding_id(job, _chunk_index(job, int(position)), question_idx)
+        for position, questions in checkpoints.get("potential_questions", {}).items()
+        if position not in checkpoints["plan"]["reused"]
+        for question_idx in range(len(questions))
+    ]
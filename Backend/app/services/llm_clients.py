@@ -0,0 +1,416 @@
+import os
+import re
+import json
+import random
+import asyncio
+import logging
+import httpx
+from abc import ABC, abstractmethod
+from typing import AsyncIterator
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+from google import genai
+from google.genai import types
+
+from app.utils.api_response import UserError
+from app.schemas.api_key_schema import APIKeyProvider
+
+
+# --- CONFIGURATION ---
+LLM_MAX_OUTPUT_TOKENS = int(os.getenv("LLM_MAX_OUTPUT_TOKENS") or 1024)
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS") or 32)
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS") or 16)
+LLM_KEEPALIVE_SECONDS = float(os.getenv("LLM_KEEPALIVE_SECONDS") or 60)
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES") or 2)
+LLM_STREAM_IDLE_TIMEOUT_SECONDS = float(os.getenv("LLM_STREAM_IDLE_TIMEOUT_SECONDS") or 30)    # Reader stall before a stream is closed
+LLM_STREAM_BUFFER_DELTAS = 64
+
+PROVIDER_TIMEOUT_SECONDS = {
+    APIKeyProvider.OPENAI.value: float(os.getenv("OPENAI_TIMEOUT_SECONDS") or 60),
+    APIKeyProvider.GEMINI.value: float(os.getenv("GEMINI_TIMEOUT_SECONDS") or 60),
+    APIKeyProvider.LOCAL.value: float(os.getenv("LOCAL_LLM_TIMEOUT_SECONDS") or 60)
+}
+PROVIDER_MAX_CONCURRENCY = {
+    APIKeyProvider.OPENAI.value: int(os.getenv("OPENAI_MAX_CONCURRENCY") or 16),
+    APIKeyProvider.GEMINI.value: int(os.getenv("GEMINI_MAX_CONCURRENCY") or 16),
+    APIKeyProvider.LOCAL.value: int(os.getenv("LOCAL_LLM_MAX_CONCURRENCY") or 64)
+}
+
+# Local stub provider, only for load testing
+LOCAL_LLM_ENABLED = os.getenv("LOCAL_LLM_ENABLED", "false").lower() == "true"
+LOCAL_LLM_MODELS = ["local-stub"]
+LOCAL_LLM_LATENCY_MS = float(os.getenv("LOCAL_LLM_LATENCY_MS") or 800)            # Median time to first token
+LOCAL_LLM_LATENCY_SIGMA = float(os.getenv("LOCAL_LLM_LATENCY_SIGMA") or 0.5)      # Log-normal spread, 0 = fixed latency
+LOCAL_LLM_TOKENS_PER_SECOND = float(os.getenv("LOCAL_LLM_TOKENS_PER_SECOND") or 50)
+LOCAL_LLM_ERROR_RATE = float(os.getenv("LOCAL_LLM_ERROR_RATE") or 0)
+LOCAL_LLM_ANSWER = os.getenv(
+    "LOCAL_LLM_ANSWER",
+    "Sinh viên cần đạt điểm trung bình học kỳ từ 7.0 trở lên, không bị kỷ luật và hoàn thành đủ số tín chỉ tối thiểu "
+    "trong học kỳ để được xét học bổng khuyến khích học tập.\nNguồn tham khảo:\n- Quy chế học bổng (https://example.com)"
+)
+
+# One long-lived client per (provider, API key), one semaphore per provider
+clients: dict[tuple[str, str], "ProviderClient"] = {}
+provider_semaphores: dict[str, asyncio.Semaphore] = {}
+
+# Marks the end of a stream in its delta queue
+STREAM_END = object()
+
+
+# Raised when the reader of a stream stopped pulling deltas for longer than the idle timeout
+class StreamIdleError(Exception):
+    pass
+
+
+# --- PROVIDER CLIENTS ---
+# Base class for an async LLM provider client
+class ProviderClient(ABC):
+    provider: str
+
+    def __init__(self, api_key: str):
+        self.api_key = api_key
+        self.timeout = PROVIDER_TIMEOUT_SECONDS[self.provider]
+        self.semaphore = _get_semaphore(self.provider)
+        self.in_flight = 0
+        self.retired = False
+        self.closed = False
+
+
+    async def complete(self, model: str, prompt: str) -> str:
+        self.in_flight += 1
+        try:
+            async with self.semaphore:
+                return await self._complete(model, prompt)
+        finally:
+            await self._finish_request()
+
+
+    # The upstream stream is read by a separate task that holds the provider permit for the life of the stream.
+    # If the reader stops pulling deltas, that task closes the stream after the idle timeout and frees the permit.
+    async def stream(self, model: str, prompt: str):
+        queue = asyncio.Queue(maxsize=LLM_STREAM_BUFFER_DELTAS)
+        pump = asyncio.create_task(self._pump_stream(model, prompt, queue))
+        try:
+            while True:
+                item = await queue.get()
+                if item is STREAM_END:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            pump.cancel()
+            await asyncio.gather(pump, return_exceptions=True)
+
+
+    # Close now, or once the requests still using the client have finished
+    async def retire(self):
+        self.retired = True
+        await self._close_if_unused()
+
+
+    @abstractmethod
+    async def list_models(self) -> list[str]:
+        ...
+
+
+    @abstractmethod
+    async def close(self):
+        ...
+
+
+    @abstractmethod
+    async def _complete(self, model: str, prompt: str) -> str:
+        ...
+
+
+    # Open the upstream stream and return its text deltas
+    @abstractmethod
+    async def _open_stream(self, model: str, prompt: str) -> AsyncIterator[str]:
+        ...
+
+
+    async def _pump_stream(self, model: str, prompt: str, queue: asyncio.Queue):
+        self.in_flight += 1
+        try:
+            async with self.semaphore:
+                deltas = await self._open_stream(model, prompt)
+                try:
+                    async for delta in deltas:
+                        if not queue.full():
+                            queue.put_nowait(delta)
+                            continue
+                        try:
+                            await asyncio.wait_for(queue.put(delta), LLM_STREAM_IDLE_TIMEOUT_SECONDS)
+                        except asyncio.TimeoutError:
+                            raise StreamIdleError(f"Stream reader was idle for {LLM_STREAM_IDLE_TIMEOUT_SECONDS}s.")
+                finally:
+                    await deltas.aclose()
+            await queue.put(STREAM_END)
+        except StreamIdleError as e:
+            logging.warning(f"Closed {self.provider} stream: {e}")
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(e)
+        except Exception as e:
+            await queue.put(e)
+        finally:
+            await self._finish_request()
+
+
+    async def _finish_request(self):
+        self.in_flight -= 1
+        await self._close_if_unused()
+
+
+    async def _close_if_unused(self):
+        if self.retired and not self.in_flight and not self.closed:
+            self.closed = True
+            await _close_quietly(self)
+
+
+    @abstractmethod
+    async def list_models(self) -> list[str]:
+        ...
+
+
+    @abstractmethod
+    async def close(self):
+        ...
+
+
+    @abstractmethod
+    async def _complete(self, model: str, prompt: str) -> str:
+        ...
+
+
+    # Open the upstream stream and return its text deltas
+    @abstractmethod
+    async def _open_stream(self, model: str, prompt: str) -> AsyncIterator[str]:
+        ...
+
+
+# OpenAI Responses API client with a pooled keep-alive HTTP client
+class OpenAIClient(ProviderClient):
+    provider = APIKeyProvider.OPENAI.value
+
+    def __init__(self, api_key: str):
+        super().__init__(api_key)
+        self.client = AsyncOpenAI(
+            api_key=api_key,
+            timeout=self.timeout,
+            max_retries=LLM_MAX_RETRIES,
+            http_client=DefaultAsyncHttpxClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=LLM_MAX_CONNECTIONS,
+                    max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=LLM_KEEPALIVE_SECONDS
+                )
+            )
+        )
+
+
+    async def _complete(self, model: str, prompt: str) -> str:
+        response = await self.client.responses.create(
+            model=model,
+            input=prompt,
+            store=False
+        )
+        return response.output_text
+
+
+    async def _open_stream(self, model: str, prompt: str) -> AsyncIterator[str]:
+        stream = await self.client.responses.create(
+            model=model,
+            input=prompt,
+            store=False,
+            stream=True
+        )
+        return self._deltas(stream)
+
+
+    @staticmethod
+    async def _deltas(stream):
+        try:
+            async for event in stream:
+                if event.type == "response.output_text.delta":
+                    yield event.delta
+        finally:
+            await stream.close()
+
+
+    async def list_models(self) -> list[str]:
+        models = await self.client.models.list()
+        return [model.id for model in models.data]
+
+
+    async def close(self):
+        await self.client.close()
+
+
+# Gemini client using the async API of the google-genai SDK
+class GeminiClient(ProviderClient):
+    provider = APIKeyProvider.GEMINI.value
+
+    def __init__(self, api_key: str):
+        super().__init__(api_key)
+        # Each client carries its own key, so no process-global configuration is involved
+        self.client = genai.Client(
+            api_key=api_key,
+            http_options=types.HttpOptions(timeout=int(self.timeout * 1000))
+        ).aio
+        self.config = types.GenerateContentConfig(max_output_tokens=LLM_MAX_OUTPUT_TOKENS)
+
+
+    async def _complete(self, model: str, prompt: str) -> str:
+        response = await self.client.models.generate_content(
+            model=model,
+            contents=prompt,
+            config=self.config
+        )
+        return response.text or ""
+
+
+    async def _open_stream(self, model: str, prompt: str) -> AsyncIterator[str]:
+        stream = await self.client.models.generate_content_stream(
+            model=model,
+            contents=prompt,
+            config=self.config
+        )
+        return self._deltas(stream)
+
+
+    @staticmethod
+    async def _deltas(stream):
+        try:
+            async for chunk in stream:
+                if chunk.text:
+                    yield chunk.text
+        finally:
+            await stream.aclose()
+
+
+    async def list_models(self) -> list[str]:
+        pager = await self.client.models.list()
+        return [model.name.replace("models/", "") async for model in pager]
+
+
+    async def close(self):
+        await self.client.aclose()
+
+
+# In-process stub that imitates provider latency and output formats without network calls
+class LocalClient(ProviderClient):
+    provider = APIKeyProvider.LOCAL.value
+
+    async def _complete(self, model: str, prompt: str) -> str:
+        tokens = self._build_output(prompt)
+        await asyncio.sleep(self._first_token_delay() + len(tokens) / LOCAL_LLM_TOKENS_PER_SECOND)
+        self._maybe_fail()
+        return "".join(tokens)
+
+
+    async def _open_stream(self, model: str, prompt: str) -> AsyncIterator[str]:
+        tokens = self._build_output(prompt)
+        await asyncio.sleep(self._first_token_delay())
+        self._maybe_fail()
+        return self._deltas(tokens)
+
+
+    @staticmethod
+    async def _deltas(tokens: list[str]):
+        for token in tokens:
+            await asyncio.sleep(1 / LOCAL_LLM_TOKENS_PER_SECOND)
+            yield token
+
+
+    async def list_models(self) -> list[str]:
+        return LOCAL_LLM_MODELS
+
+
+    async def close(self):
+        pass
+
+
+    # Potential-question prompts get a valid Python list, everything else the canned answer
+    def _build_output(self, prompt: str) -> list[str]:
+        match = re.search(r"chứa đúng (\d+) chuỗi", prompt)
+        if match:
+            topic = " ".join(re.findall(r"\w+", prompt.split('"""')[1] if '"""' in prompt else prompt)[:8])
+            questions = [f"Câu hỏi {i + 1} về {topic} là gì?" for i in range(int(match.group(1)))]
+            text = json.dumps(questions, ensure_ascii=False)
+        else:
+            text = LOCAL_LLM_ANSWER
+        return re.findall(r"\S+\s*", text)
+
+
+    def _first_token_delay(self) -> float:
+        return random.lognormvariate(0, LOCAL_LLM_LATENCY_SIGMA) * LOCAL_LLM_LATENCY_MS / 1000
+
+
+    def _maybe_fail(self):
+        if random.random() < LOCAL_LLM_ERROR_RATE:
+            raise LocalProviderError("Simulated provider failure")
+
+
+# Error raised by the local stub, shaped like a provider server error
+class LocalProviderError(Exception):
+    status_code = 503
+
+
+PROVIDER_CLIENTS = {
+    APIKeyProvider.OPENAI.value: OpenAIClient,
+    APIKeyProvider.GEMINI.value: GeminiClient,
+    APIKeyProvider.LOCAL.value: LocalClient
+}
+
+
+# --- REGISTRY FUNCTIONS ---
+# Create a standalone client, e.g. to validate a key that is not stored yet
+def create_client(provider: str, api_key: str) -> ProviderClient:
+    client_class = PROVIDER_CLIENTS.get(provider)
+    if client_class is None:
+        raise UserError(f"Unsupported LLM provider: {provider}")
+    if client_class is LocalClient and not LOCAL_LLM_ENABLED:
+        raise UserError("The local LLM provider is disabled. Set LOCAL_LLM_ENABLED=true to use it.")
+    return client_class(api_key)
+
+
+# Get the shared client of an API key, creating it on first use
+def get_client(provider: str, api_key: str) -> ProviderClient:
+    key = (provider, api_key)
+    client = clients.get(key)
+    if client is None:
+        client = create_client(provider, api_key)
+        clients[key] = client
+    return client
+
+
+# Forget the client of an API key; it is closed once its in-flight requests finish
+async def evict_client(provider: str, api_key: str):
+    client = clients.pop((provider, api_key), None)
+    if client is not None:
+        await client.retire()
+
+
+# Close every pooled client on shutdown
+async def close_clients():
+    while clients:
+        _, client = clients.popitem()
+        await _close_quietly(client)
+
+
+# --- SUPPORTING FUNCTIONS ---
+def _get_semaphore(provider: str) -> asyncio.Semaphore:
+    semaphore = provider_semaphores.get(provider)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(PROVIDER_MAX_CONCURRENCY[provider])
+        provider_semaphores[provider] = semaphore
+    return semaphore
+
+
+async def _close_quietly(client: ProviderClient):
+    try:
+        await client.close()
+    except Exception as e:
+        logging.warning(f"Failed to close {client.provider} client: {e}")
@@ -0,0 +1,212 @@
+import os
+import time
+import random
+import asyncio
+import logging
+import httpx
+import openai
+
+from app.services import llm_clients
+
+
+# --- CONFIGURATION ---
+LLM_KEY_POOL_ENABLED = os.getenv("LLM_KEY_POOL_ENABLED", "false").lower() == "true"
+LLM_POOL_MAX_ATTEMPTS = max(int(os.getenv("LLM_POOL_MAX_ATTEMPTS") or 3), 1)       # Keys tried per request, at least one
+LLM_POOL_COOLDOWN_SECONDS = float(os.getenv("LLM_POOL_COOLDOWN_SECONDS") or 5)
+LLM_POOL_MAX_COOLDOWN_SECONDS = float(os.getenv("LLM_POOL_MAX_COOLDOWN_SECONDS") or 300)
+
+# Provider name of the pseudo key that stands for the whole pool
+KEY_POOL_PROVIDER = "Pool"
+
+
+# --- KEY STATE ---
+# Runtime counters and cooldown of a single API key
+class KeyState:
+    def __init__(self):
+        self.in_flight = 0
+        self.requests = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+        self.total_latency_seconds = 0.0
+        self.last_error = None
+
+
+    def is_cooling_down(self, now: float) -> bool:
+        return self.cooldown_until > now
+
+
+    def record_success(self, latency: float):
+        self.total_latency_seconds += latency
+        self.consecutive_failures = 0
+
+
+    def record_failure(self, error: Exception, retryable: bool):
+        self.errors += 1
+        self.last_error = f"{type(error).__name__}: {error}"[:300]
+        if not retryable:
+            return
+        if _status_code(error) == 429:
+            self.rate_limited += 1
+        self.consecutive_failures += 1
+        cooldown = min(
+            LLM_POOL_COOLDOWN_SECONDS * 2 ** (self.consecutive_failures - 1),
+            LLM_POOL_MAX_COOLDOWN_SECONDS
+        )
+        self.cooldown_until = time.monotonic() + cooldown
+
+
+    def get_stats(self) -> dict:
+        now = time.monotonic()
+        completed = self.requests - self.in_flight
+        return {
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "errors": self.errors,
+            "rate_limited": self.rate_limited,
+            "average_latency_seconds": self.total_latency_seconds / (completed - self.errors) if completed > self.errors else 0.0,
+            "cooling_down": self.is_cooling_down(now),
+            "cooldown_remaining_seconds": round(max(0.0, self.cooldown_until - now), 1),
+            "last_error": self.last_error
+        }
+
+
+key_states: dict[str, KeyState] = {}
+
+
+# --- POOL FUNCTIONS ---
+# Build the pseudo key handed to the generate functions when several keys are active
+def build_pool_key(api_keys: list[dict]) -> dict:
+    return {
+        "provider": KEY_POOL_PROVIDER,
+        "using_model": ",".join(sorted(f"{key['provider']}:{key['using_model']}" for key in api_keys)),
+        "keys": api_keys
+    }
+
+
+# Run a prompt on the best available key, failing over to the next one on rate limits and server errors
+async def complete(api_key: dict, prompt: str) -> str:
+    output_text, _ = await complete_with_key(api_key, prompt)
+    return output_text
+
+
+# Same as complete, also returning the key that produced the output
+async def complete_with_key(api_key: dict, prompt: str) -> tuple[str, dict]:
+    last_error = None
+    for candidate in _select_candidates(api_key):
+        state = _get_state(candidate)
+        client = llm_clients.get_client(candidate["provider"], candidate["api_key"])
+        state.in_flight += 1
+        state.requests += 1
+        start = time.perf_counter()
+        try:
+            output_text = await client.complete(candidate["using_model"], prompt)
+        except Exception as e:
+            retryable = is_retryable(e)
+            state.record_failure(e, retryable)
+            if not retryable:
+                raise
+            logging.warning(f"LLM key {candidate.get('name') or candidate.get('id')} failed, failing over: {e}")
+            last_error = e
+            continue
+        finally:
+            state.in_flight -= 1
+        state.record_success(time.perf_counter() - start)
+        return output_text, candidate
+    raise last_error
+
+
+# Stream a prompt on the best available key; failover is only possible before the first delta
+async def stream(api_key: dict, prompt: str):
+    last_error = None
+    for candidate in _select_candidates(api_key):
+        state = _get_state(candidate)
+        client = llm_clients.get_client(candidate["provider"], candidate["api_key"])
+        state.in_flight += 1
+        state.requests += 1
+        start = time.perf_counter()
+        started = False
+        try:
+            async for delta in client.stream(candidate["using_model"], prompt):
+                started = True
+                yield delta
+        except Exception as e:
+            retryable = is_retryable(e)
+            state.record_failure(e, retryable)
+            if started or not retryable:
+                raise
+            logging.warning(f"LLM key {candidate.get('name') or candidate.get('id')} failed, failing over: {e}")
+            last_error = e
+            continue
+        finally:
+            state.in_flight -= 1
+        state.record_success(time.perf_counter() - start)
+        return
+    raise last_error
+
+
+# Get runtime statistics of a key
+def get_key_stats(key_id: str) -> dict:
+    state = key_states.get(key_id)
+    return state.get_stats() if state else KeyState().get_stats()
+
+
+# Get runtime statistics of every key that has served requests
+def get_pool_stats() -> dict:
+    return {
+        "enabled": LLM_KEY_POOL_ENABLED,
+        "keys": {key_id: state.get_stats() for key_id, state in key_states.items()}
+    }
+
+
+# Keys that can serve an API key: every key of the pool, or the key itself
+def get_member_keys(api_key: dict) -> list[dict]:
+    return api_key["keys"] if api_key["provider"] == KEY_POOL_PROVIDER else [api_key]
+
+
+# Forget the runtime state of a deleted key
+def forget_key(key_id: str):
+    key_states.pop(key_id, None)
+
+
+# --- SUPPORTING FUNCTIONS ---
+def _get_state(api_key: dict) -> KeyState:
+    key_id = api_key["id"]
+    state = key_states.get(key_id)
+    if state is None:
+        state = KeyState()
+        key_states[key_id] = state
+    return state
+
+
+# Order keys by weighted least outstanding requests; cooling-down keys are only used as a last resort
+def _select_candidates(api_key: dict) -> list[dict]:
+    api_keys = get_member_keys(api_key)
+    now = time.monotonic()
+
+    def score(key: dict) -> tuple:
+        state = _get_state(key)
+        return (
+            state.is_cooling_down(now),
+            (state.in_flight + 1) / max(key.get("weight") or 1.0, 1e-6),
+            random.random()
+        )
+
+    candidates = sorted(api_keys, key=score)[:LLM_POOL_MAX_ATTEMPTS]
+    if not candidates:
+        raise RuntimeError("The LLM key pool has no keys to run the request on.")
+    return candidates
+
+
+def _status_code(error: Exception) -> int | None:
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    return status if isinstance(status, int) else None
+
+
+# Rate limits, server errors, timeouts and connection failures are worth retrying on another key
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, (openai.APIConnectionError, httpx.TimeoutException, httpx.TransportError, asyncio.TimeoutError)):
+        return True
+    status = _status_code(error)
+    return status is not None and (status == 429 or status >= 500)
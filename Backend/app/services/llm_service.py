@@ -1,19 +1,51 @@
 import os
 import re
+import time
 import asyncio
+import hashlib
 import logging
-from openai import OpenAI
-import google.generativeai as genai
 from cryptography.fernet import Fernet
 from fastapi.encoders import jsonable_encoder
+from app.utils import metrics
 from app.utils.text_process import normalize_text
 from app.schemas.api_key_schema import APIKeyProvider
 logging.getLogger("sentence_transformers").setLevel(logging.WARNING)
 
 from app.daos.api_key_dao import APIKeyDAO
+from app.daos.config_version_dao import ConfigVersionDAO
+from app.daos.llm_output_cache_dao import LLMOutputCacheDAO
+from app.services import llm_clients, llm_pool
 from app.utils.api_response import UserError, DatabaseException
 
 
+# --- CONFIGURATION ---
+API_KEY_CACHE_CHECK_SECONDS = float(os.getenv("API_KEY_CACHE_CHECK_SECONDS") or 5)
+API_KEYS_CONFIG = "api_keys"
+INGEST_LLM_CONCURRENCY = int(os.getenv("INGEST_LLM_CONCURRENCY") or 8)
+INGEST_LLM_RETRIES = int(os.getenv("INGEST_LLM_RETRIES") or 3)
+INGEST_LLM_RETRY_BACKOFF_SECONDS = float(os.getenv("INGEST_LLM_RETRY_BACKOFF_SECONDS") or 1)
+LLM_OUTPUT_CACHE_ENABLED = os.getenv("LLM_OUTPUT_CACHE_ENABLED", "true").lower() == "true"
+
+# Prompt template versions; bump one when its prompt changes so cached outputs of the old prompt are not reused
+POTENTIAL_QUESTIONS_PROMPT_VERSION = "potential_questions:1"
+POTENTIAL_QUESTIONS_APPENDIX_PROMPT_VERSION = "potential_questions_appendix:1"
+
+# Process-local counters of the LLM output cache
+llm_output_cache_stats = {
+    "hits": 0,
+    "misses": 0,
+    "stores": 0
+}
+
+# Process-local cache of the active (decrypted) key configuration
+active_key_cache = {
+    "loaded": False,
+    "value": None,
+    "version": None,
+    "checked_at": 0.0
+}
+
+
 # --- API KEYS SERVICE ---
 # API Key Encryptor
 class APIKeyEncryptor:
@@ -68,6 +100,7 @@ async def get_all_api_keys(page: int, limit: int, keyword: str = None, provider:
     for api_key in api_keys:
         decrypted = encryptor.decrypt(api_key["api_key"])
         api_key["api_key"] = decrypted
+        api_key["stats"] = llm_pool.get_key_stats(api_key["id"])
     return {
         "api_keys": api_keys,
         "total": total,
@@ -86,35 +119,53 @@ async def get_api_key_by_id(key_id: str):
     
     decrypted = encryptor.decrypt(api_key["api_key"])
     api_key["api_key"] = decrypted
+    api_key["stats"] = llm_pool.get_key_stats(api_key["id"])
     return api_key
 
 
-# Get current using API key
+# Get current using API key (a pool of every active key in pool mode)
 async def get_current_api_key():
-    encryptor = APIKeyEncryptor()
+    now = time.monotonic()
+    if active_key_cache["loaded"] and now - active_key_cache["checked_at"] < API_KEY_CACHE_CHECK_SECONDS:
+        return active_key_cache["value"]
     
-    api_key = jsonable_encoder(await APIKeyDAO().get_current_using_api_key())
-    if not api_key:
-        return None
-
-    decrypted = encryptor.decrypt(api_key["api_key"])
-    api_key["api_key"] = decrypted
-    return api_key
+    # The version stamp is read before the keys, so a change made in between triggers another reload
+    version = await ConfigVersionDAO().get_version(API_KEYS_CONFIG)
+    if not active_key_cache["loaded"] or active_key_cache["version"] != version:
+        active_key_cache["value"] = await _load_current_api_key()
+        active_key_cache["version"] = version
+        active_key_cache["loaded"] = True
+    active_key_cache["checked_at"] = now
+    return active_key_cache["value"]
 
 
 # Update an existing API key
 async def update_api_key(key_id: str, update_data: dict):
     encryptor = APIKeyEncryptor()    
+    previous_key = jsonable_encoder(await APIKeyDAO().get_api_key_by_id(key_id))
     updated_key = jsonable_encoder(await APIKeyDAO().update_api_key(key_id, update_data))
+    await invalidate_api_key_cache()
     decrypted = encryptor.decrypt(updated_key["api_key"])
     updated_key["api_key"] = decrypted
     
+    # A changed key or provider gets a new pooled client, so the old one is closed
+    if previous_key:
+        previous_decrypted = encryptor.decrypt(previous_key["api_key"])
+        if (previous_key["provider"], previous_decrypted) != (updated_key["provider"], decrypted):
+            llm_pool.forget_key(key_id)
+            await llm_clients.evict_client(previous_key["provider"], previous_decrypted)
+    
     return updated_key
 
 
 # Delete an API key
 async def delete_api_key(key_id: str):
+    api_key = jsonable_encoder(await APIKeyDAO().get_api_key_by_id(key_id))
     await APIKeyDAO().delete_api_key(key_id)
+    await invalidate_api_key_cache()
+    llm_pool.forget_key(key_id)
+    if api_key:
+        await llm_clients.evict_client(api_key["provider"], APIKeyEncryptor().decrypt(api_key["api_key"]))
     
     
 # Toggle API Key Usage Status
@@ -128,55 +179,85 @@ async def toggle_api_key_status(key_id: str):
         raise UserError("To activate an API key, please provide the model it will be used for")
     
     new_status = not api_key["is_using"]
-    if new_status is True:
+    if new_status is True and not llm_pool.LLM_KEY_POOL_ENABLED:
         await APIKeyDAO().deactivate_all_api_keys()
     update_data = {"is_using": new_status}
     
     updated_key = jsonable_encoder(await APIKeyDAO().update_api_key(key_id, update_data))
+    await invalidate_api_key_cache()
     decrypted = encryptor.decrypt(updated_key["api_key"])
     updated_key["api_key"] = decrypted
     return updated_key
     
     
+# Drop the cached active key here and bump the version stamp so other processes reload it too
+async def invalidate_api_key_cache():
+    active_key_cache["loaded"] = False
+    await ConfigVersionDAO().bump_version(API_KEYS_CONFIG)
+    
+    
+# Get runtime statistics of the API key pool
+async def get_api_key_pool_stats():
+    return llm_pool.get_pool_stats()
+    
+    
+# --- LLM OUTPUT CACHE SERVICE ---
+# Get hit rates of this process, plus stored outputs and their hits across all processes (ingestion workers included)
+async def get_llm_output_cache_stats():
+    return {
+        **get_llm_output_cache_counters(),
+        "entries": await LLMOutputCacheDAO().count_outputs(),
+        "total_hits": await LLMOutputCacheDAO().sum_hits()
+    }
+
+
+# Get process-local cache counters
+def get_llm_output_cache_counters() -> dict:
+    lookups = llm_output_cache_stats["hits"] + llm_output_cache_stats["misses"]
+    return {
+        "enabled": LLM_OUTPUT_CACHE_ENABLED,
+        **llm_output_cache_stats,
+        "hit_rate": llm_output_cache_stats["hits"] / lookups if lookups else 0.0
+    }
+
+
+# Delete cached outputs, optionally only those of one model
+async def purge_llm_output_cache(model: str = None):
+    deleted = await LLMOutputCacheDAO().purge_outputs(model)
+    return {"deleted": deleted}
+    
+    
 # --- MODELS SERVICE ---
 # Get all available models
 async def get_available_models(request: dict):
     provider = request["provider"]
-    api_key = request["api_key"]
     
-    if provider == APIKeyProvider.OPENAI.value:
-        try:
-            # Run API call in thread pool to avoid blocking
-            def fetch_openai_models():
-                openai_client = OpenAI(api_key=api_key)
-                models = openai_client.models.list()
-                models = [model.id for model in models.data]
-                models = [
-                    model for model in models
-                    if re.search(r"gpt", model, re.IGNORECASE) and
-                       not re.search(r"realtime|chatgpt|transcribe|chat|audio|image|preview|codex|instruct", model, re.IGNORECASE)
-                ]
-                return models
-            
-            return await asyncio.to_thread(fetch_openai_models)
-        except Exception as e:
-            raise UserError("Invalid API key or unable to connect to OpenAI.")
-    elif provider == APIKeyProvider.GEMINI.value:
-        try:
-            def fetch_gemini_models():
-                genai.configure(api_key=api_key)
-                models = jsonable_encoder(genai.list_models())
-                models = [model["name"].replace("models/", "") for model in models]
-                models = [
-                    model for model in models
-                    if re.search(r"gemini", model, re.IGNORECASE) and
-                       not re.search(r"embedding|preview|image|exp|audio|live", model, re.IGNORECASE)
-                ]
-                return models
-            
-            return await asyncio.to_thread(fetch_gemini_models)
-        except Exception as ge:
+    # The key may not be stored yet, so use a short-lived client instead of the pooled one
+    client = llm_clients.create_client(provider, request["api_key"])
+    try:
+        models = await client.list_models()
+    except UserError:
+        raise
+    except Exception as e:
+        if provider == APIKeyProvider.GEMINI.value:
             raise UserError("Invalid API key or unable to connect to Google Generative AI.")
+        raise UserError("Invalid API key or unable to connect to OpenAI.")
+    finally:
+        await client.close()
+    
+    if provider == APIKeyProvider.LOCAL.value:
+        return models
+    if provider == APIKeyProvider.OPENAI.value:
+        return [
+            model for model in models
+            if re.search(r"gpt", model, re.IGNORECASE) and
+               not re.search(r"realtime|chatgpt|transcribe|chat|audio|image|preview|codex|instruct", model, re.IGNORECASE)
+        ]
+    return [
+        model for model in models
+        if re.search(r"gemini", model, re.IGNORECASE) and
+           not re.search(r"embedding|preview|image|exp|audio|live", model, re.IGNORECASE)
+    ]
         
         
 # Generate potential questions from text chunks
@@ -201,36 +282,7 @@ async def generate_potential_questions(api_key: dict, context: str, num_question
     - Ví dụ đầu ra:
     ["Câu hỏi 1", "Câu hỏi 2", ..., "Câu hỏi {num_questions}"]
     """
-
-    output_text = []
-    
-    if api_key["provider"] == APIKeyProvider.OPENAI.value:
-        def call_openai():
-            openai_client = OpenAI(api_key=api_key["api_key"])
-            response = openai_client.responses.create(
-                model=api_key["using_model"],
-                input=prompt,
-                store=False
-            )
-            return response.output_text
-        
-        output_text = await asyncio.to_thread(call_openai)
-        output_text = normalize_text(output_text)
-        
-    elif api_key["provider"] == APIKeyProvider.GEMINI.value:
-        def call_gemini():
-            genai.configure(api_key=api_key["api_key"])
-            model = genai.GenerativeModel(api_key["using_model"])
-            response = model.generate_content(
-                prompt,
-                generation_config={"max_output_tokens": 1024}
-            )
-            return response.text
-        
-        output_text = await asyncio.to_thread(call_gemini)
-        output_text = normalize_text(output_text)
-    
-    return output_text
+    return await _complete_cached(api_key, prompt, POTENTIAL_QUESTIONS_PROMPT_VERSION, context, num_questions)
 
 
 # Generate potential questions from text chunks
@@ -256,40 +308,56 @@ async def generate_potential_questions_appendix(api_key: dict, context: str, num
     - Ví dụ đầu ra:
     ["Câu hỏi 1", "Câu hỏi 2", ..., "Câu hỏi {num_questions}"]
     """
-
-    output_text = []
-    
-    if api_key["provider"] == APIKeyProvider.OPENAI.value:
-        def call_openai():
-            openai_client = OpenAI(api_key=api_key["api_key"])
-            response = openai_client.responses.create(
-                model=api_key["using_model"],
-                input=prompt,
-                store=False
-            )
-            return response.output_text
-        
-        output_text = await asyncio.to_thread(call_openai)
-        output_text = normalize_text(output_text)
-        
-    elif api_key["provider"] == APIKeyProvider.GEMINI.value:
-        def call_gemini():
-            genai.configure(api_key=api_key["api_key"])
-            model = genai.GenerativeModel(api_key["using_model"])
-            response = model.generate_content(
-                prompt,
-                generation_config={"max_output_tokens": 1024}
-            )
-            return response.text
-        
-        output_text = await asyncio.to_thread(call_gemini)
-        output_text = normalize_text(output_text)
-    
-    return output_text
-
-
-# Generate answer
-async def generate_answer(api_key: dict, chunks: list[str], question: str, question_language: str) -> str:
+    return await _complete_cached(api_key, prompt, POTENTIAL_QUESTIONS_APPENDIX_PROMPT_VERSION, context, num_questions)
+
+
+# Generate potential questions for every chunk of a document concurrently, in chunk order
+async def generate_potential_questions_for_chunks(
+    api_key: dict,
+    chunks: list[str],
+    num_questions: int,
+    appendix: bool = False
+) -> list[list[str]]:
+    generate = generate_potential_questions_appendix if appendix else generate_potential_questions
+    kind = "appendix" if appendix else "document"
+    semaphore = asyncio.Semaphore(INGEST_LLM_CONCURRENCY)
+    
+    async def generate_with_retry(idx: int, chunk: str) -> list[str]:
+        async with semaphore:
+            for attempt in range(INGEST_LLM_RETRIES + 1):
+                try:
+                    potential_questions = await generate(api_key=api_key, context=chunk, num_questions=num_questions)
+                    if isinstance(potential_questions, list):
+                        return potential_questions
+                    error = ValueError("LLM output is not a list of questions")
+                except Exception as e:
+                    if not llm_pool.is_retryable(e):
+                        raise
+                    error = e
+                if attempt < INGEST_LLM_RETRIES:
+                    delay = INGEST_LLM_RETRY_BACKOFF_SECONDS * 2 ** attempt
+                    logging.warning(f"Generating questions for chunk {idx} failed ({error}), retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+            raise error
+    
+    start = time.perf_counter()
+    tasks = [asyncio.create_task(generate_with_retry(idx, chunk)) for idx, chunk in enumerate(chunks)]
+    try:
+        potential_questions = await asyncio.gather(*tasks)
+    except BaseException:
+        # The batch fails as a whole, so the other chunks' LLM calls are stopped instead of running on unused
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    wall_seconds = time.perf_counter() - start
+    metrics.INGEST_GENERATION_SECONDS.labels(kind=kind).observe(wall_seconds)
+    logging.info(f"Generated potential questions for {len(chunks)} {kind} chunks in {wall_seconds:.1f}s (concurrency {INGEST_LLM_CONCURRENCY})")
+    return potential_questions
+
+
+# Build the RAG answer prompt
+def build_answer_prompt(chunks: list[str], question: str, question_language: str) -> str:
     context = "\n\n".join([f"Đoạn {i+1}: {chunk}" for i, chunk in enumerate(chunks)])
     if question_language == 'vi':
         prompt = f"""
@@ -340,35 +408,21 @@ async def generate_answer(api_key: dict, chunks: list[str], question: str, quest
         - Return exactly **one string** containing the complete answer, which may include a "References:" section if applicable.
         - If there is a "References" section, list the documents used as a list, each item including the title, URL, and no duplicates.
         """
+    return prompt
 
-    output_text = []
-    if api_key["provider"] == APIKeyProvider.OPENAI.value:
-        def call_openai():
-            openai_client = OpenAI(api_key=api_key["api_key"])
-            response = openai_client.responses.create(
-                model=api_key["using_model"],
-                input=prompt,
-                store=False
-            )
-            return response.output_text
-        
-        output_text = await asyncio.to_thread(call_openai)
-        output_text = normalize_text(output_text)
-        
-    elif api_key["provider"] == APIKeyProvider.GEMINI.value:
-        def call_gemini():
-            genai.configure(api_key=api_key["api_key"])
-            model = genai.GenerativeModel(api_key["using_model"])
-            response = model.generate_content(
-                prompt,
-                generation_config={"max_output_tokens": 1024}
-            )
-            return response.text
-        
-        output_text = await asyncio.to_thread(call_gemini)
-        output_text = normalize_text(output_text)
+
+# Generate answer
+async def generate_answer(api_key: dict, chunks: list[str], question: str, question_language: str) -> str:
+    prompt = build_answer_prompt(chunks, question, question_language)
+    return await _complete(api_key, prompt)
+
+
+# Stream answer text deltas as they are generated
+async def stream_answer(api_key: dict, chunks: list[str], question: str, question_language: str):
+    prompt = build_answer_prompt(chunks, question, question_language)
     
-    return output_text
+    async for delta in llm_pool.stream(api_key, prompt):
+        yield delta
 
 
 # Generate general question for a cluster of questions
@@ -392,30 +446,72 @@ async def get_general_question(api_key: dict, questions: list[str]) -> str:
     - Không thêm bất kỳ mô tả, giải thích, hoặc ký tự thừa nào khác ngoài câu hỏi.
     """
 
-    if api_key["provider"] == APIKeyProvider.OPENAI.value:
-        def call_openai():
-            openai_client = OpenAI(api_key=api_key["api_key"])
-            response = openai_client.responses.create(
-                model=api_key["using_model"],
-                input=prompt,
-                store=False
-            )
-            return response.output_text
-        
-        output_text = await asyncio.to_thread(call_openai)
-        output_text = normalize_text(output_text)
-        
-    elif api_key["provider"] == APIKeyProvider.GEMINI.value:
-        def call_gemini():
-            genai.configure(api_key=api_key["api_key"])
-            model = genai.GenerativeModel(api_key["using_model"])
-            response = model.generate_content(
-                prompt,
-                generation_config={"max_output_tokens": 1024}
-            )
-            return response.text
-        
-        output_text = await asyncio.to_thread(call_gemini)
-        output_text = normalize_text(output_text)        
+    return await _complete(api_key, prompt)
+
+
+# --- SUPPORTING FUNCTIONS ---
+# Load and decrypt the active key configuration from the database
+async def _load_current_api_key():
+    encryptor = APIKeyEncryptor()
     
-    return output_text
\ No newline at end of file
+    if llm_pool.LLM_KEY_POOL_ENABLED:
+        api_keys = jsonable_encoder(await APIKeyDAO().get_all_using_api_keys())
+        if not api_keys:
+            return None
+        for api_key in api_keys:
+            api_key["api_key"] = encryptor.decrypt(api_key["api_key"])
+        return llm_pool.build_pool_key(api_keys)
+    
+    api_key = jsonable_encoder(await APIKeyDAO().get_current_using_api_key())
+    if not api_key:
+        return None
+
+    decrypted = encryptor.decrypt(api_key["api_key"])
+    api_key["api_key"] = decrypted
+    return api_key
+
+
+# Run a prompt on the API key, or on the best key of the pool
+async def _complete(api_key: dict, prompt: str) -> str:
+    output_text = await llm_pool.complete(api_key, prompt)
+    return normalize_text(output_text)
+
+
+# Run a question-generation prompt through the persistent output cache, keyed by
+# (chunk text hash, prompt version, model, number of questions); only well-formed lists are cached.
+# With the key pool, an output of any active model is a hit, and an output is stored under the model that produced it.
+async def _complete_cached(api_key: dict, prompt: str, prompt_version: str, context: str, num_questions: int):
+    if not LLM_OUTPUT_CACHE_ENABLED:
+        return await _complete(api_key, prompt)
+    
+    chunk_hash = hashlib.sha256(context.encode("utf-8")).hexdigest()
+    models = list(dict.fromkeys(_model_name(key) for key in llm_pool.get_member_keys(api_key)))
+    cached_output = await LLMOutputCacheDAO().get_output([
+        _output_cache_key(chunk_hash, prompt_version, model, num_questions) for model in models
+    ])
+    if cached_output is not None:
+        llm_output_cache_stats["hits"] += 1
+        return cached_output
+    llm_output_cache_stats["misses"] += 1
+    
+    output_text, served_by = await llm_pool.complete_with_key(api_key, prompt)
+    output = normalize_text(output_text)
+    model = _model_name(served_by)
+    if isinstance(output, list) and len(output) > 0:
+        cache_key = _output_cache_key(chunk_hash, prompt_version, model, num_questions)
+        await LLMOutputCacheDAO().store_output(cache_key, output, {
+            "chunk_hash": chunk_hash,
+            "prompt_version": prompt_version,
+            "model": model,
+            "num_questions": num_questions
+        })
+        llm_output_cache_stats["stores"] += 1
+    return output
+
+
+def _model_name(api_key: dict) -> str:
+    return f"{api_key['provider']}:{api_key['using_model']}"
+
+
+def _output_cache_key(chunk_hash: str, prompt_version: str, model: str, num_questions: int) -> str:
+    return hashlib.sha256(f"{chunk_hash}|{prompt_version}|{model}|{num_questions}".encode("utf-8")).hexdigest()
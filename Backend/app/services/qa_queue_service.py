@@ -0,0 +1,173 @@
+import os
+import math
+import time
+import asyncio
+import logging
+import itertools
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+
+from app.utils import metrics
+from app.services import qa_service
+from app.schemas.qa_schema import QAStatus
+from app.utils.api_response import TooManyRequestsException, ServiceUnavailableException
+
+
+# --- CONFIGURATION ---
+QA_QUEUE_MODE = os.getenv("QA_QUEUE_MODE", "false").lower() == "true"
+QA_QUEUE_SIZE = int(os.getenv("QA_QUEUE_SIZE") or 256)
+QA_QUEUE_WORKERS = int(os.getenv("QA_QUEUE_WORKERS") or 4)
+QA_QUEUE_PER_USER_LIMIT = int(os.getenv("QA_QUEUE_PER_USER_LIMIT") or 2)
+QA_QUEUE_RETRY_AFTER_SECONDS = int(os.getenv("QA_QUEUE_RETRY_AFTER_SECONDS") or 5)
+
+
+# --- QUEUE STATE ---
+# A queued question; lower priority values are served first, then FIFO
+@dataclass(order=True)
+class QAJob:
+    priority: int
+    sequence: int
+    qa_record_id: str = field(compare=False)
+    user_id: str = field(compare=False)
+    run: Callable[[], Awaitable] = field(compare=False)
+    enqueued_at: float = field(compare=False, default_factory=time.perf_counter)
+
+
+queue: asyncio.PriorityQueue | None = None
+workers: list[asyncio.Task] = []
+sequence = itertools.count()
+
+pending = 0                                     # Admitted questions not yet picked up by a worker
+user_jobs: dict[str, int] = {}                  # Queued and running questions per user
+job_events: dict[str, asyncio.Event] = {}       # Set when a question is finished
+interrupted_jobs: list[str] = []                # Questions whose run was cancelled by shutdown
+average_run_seconds = 0.0
+
+
+# --- ADMISSION CONTROL ---
+# Reserve a queue slot for a user, or reject fast; returns the priority of the question
+def admit(user_id: str) -> int:
+    global pending
+    if queue is None:
+        raise ServiceUnavailableException("The question queue is not running.", QA_QUEUE_RETRY_AFTER_SECONDS)
+
+    user_count = user_jobs.get(user_id, 0)
+    if user_count >= QA_QUEUE_PER_USER_LIMIT:
+        metrics.QA_QUEUE_REJECTED_TOTAL.labels(reason="user_limit").inc()
+        raise TooManyRequestsException(
+            f"You already have {user_count} questions being answered. Please wait for them to finish.",
+            QA_QUEUE_RETRY_AFTER_SECONDS
+        )
+    if pending >= QA_QUEUE_SIZE:
+        metrics.QA_QUEUE_REJECTED_TOTAL.labels(reason="queue_full").inc()
+        raise ServiceUnavailableException("The system is busy. Please try again shortly.", _estimate_retry_after())
+
+    pending += 1
+    user_jobs[user_id] = user_count + 1
+    metrics.QA_QUEUE_DEPTH.set(pending)
+    # Users with fewer questions in flight go first
+    return user_count
+
+
+# Give back a reservation that was never enqueued
+def cancel(user_id: str):
+    global pending
+    pending -= 1
+    metrics.QA_QUEUE_DEPTH.set(pending)
+    _release_user(user_id)
+
+
+# Put an admitted question on the queue
+def enqueue(qa_record_id: str, user_id: str, priority: int, run: Callable[[], Awaitable]):
+    job_events[qa_record_id] = asyncio.Event()
+    queue.put_nowait(QAJob(priority, next(sequence), qa_record_id, user_id, run))
+
+
+# Event that is set once the question has been processed by this process, if it is queued here
+def get_job_event(qa_record_id: str) -> asyncio.Event | None:
+    return job_events.get(qa_record_id)
+
+
+# Get queue metrics
+def get_queue_stats() -> dict:
+    return {
+        "enabled": QA_QUEUE_MODE,
+        "depth": pending,
+        "capacity": QA_QUEUE_SIZE,
+        "workers": QA_QUEUE_WORKERS,
+        "users": len(user_jobs),
+        "average_run_seconds": round(average_run_seconds, 3)
+    }
+
+
+# --- WORKERS ---
+def start_workers():
+    global queue
+    queue = asyncio.PriorityQueue()
+    for _ in range(QA_QUEUE_WORKERS):
+        workers.append(asyncio.create_task(_worker()))
+    logging.info(f"QA queue started with {QA_QUEUE_WORKERS} workers and capacity {QA_QUEUE_SIZE}")
+
+
+async def stop_workers():
+    for worker in workers:
+        worker.cancel()
+    await asyncio.gather(*workers, return_exceptions=True)
+    workers.clear()
+
+    # Questions still queued or interrupted here will never be answered, so their subscribers are told they failed
+    abandoned = interrupted_jobs.copy()
+    interrupted_jobs.clear()
+    while queue is not None and not queue.empty():
+        abandoned.append(queue.get_nowait().qa_record_id)
+    for qa_record_id in abandoned:
+        try:
+            await qa_service.update_question_record_status(qa_record_id, QAStatus.FAILED.value)
+        except Exception as e:
+            logging.error(f"Failed to mark abandoned question {qa_record_id} as failed: {e}")
+        event = job_events.pop(qa_record_id, None)
+        if event:
+            event.set()
+
+
+async def _worker():
+    global pending, average_run_seconds
+    while True:
+        job = await queue.get()
+        pending -= 1
+        metrics.QA_QUEUE_DEPTH.set(pending)
+        metrics.QA_QUEUE_WAIT_SECONDS.observe(time.perf_counter() - job.enqueued_at)
+        metrics.QA_QUEUE_IN_PROGRESS.inc()
+
+        start = time.perf_counter()
+        try:
+            await job.run()
+        except asyncio.CancelledError:
+            interrupted_jobs.append(job.qa_record_id)
+            raise
+        except Exception as e:
+            logging.error(f"Queued question {job.qa_record_id} failed: {e}", exc_info=True)
+        finally:
+            run_seconds = time.perf_counter() - start
+            average_run_seconds = run_seconds if average_run_seconds == 0 else 0.9 * average_run_seconds + 0.1 * run_seconds
+            metrics.QA_QUEUE_IN_PROGRESS.dec()
+            _release_user(job.user_id)
+            event = job_events.pop(job.qa_record_id, None)
+            if event:
+                event.set()
+            queue.task_done()
+
+
+# --- SUPPORTING FUNCTIONS ---
+def _release_user(user_id: str):
+    remaining = user_jobs.get(user_id, 1) - 1
+    if remaining > 0:
+        user_jobs[user_id] = remaining
+    else:
+        user_jobs.pop(user_id, None)
+
+
+# Time until a queue slot is likely to free up, from the recent processing time
+def _estimate_retry_after() -> int:
+    estimate = average_run_seconds / max(QA_QUEUE_WORKERS, 1)
+    return max(QA_QUEUE_RETRY_AFTER_SECONDS, math.ceil(estimate))
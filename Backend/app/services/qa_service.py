@@ -1,38 +1,25 @@
 import os
-import asyncio
+import json
+import time
+import random
+import logging
 from fastapi.encoders import jsonable_encoder
-from sentence_transformers import CrossEncoder
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
 
 from app.daos.qa_dao import QADao
+from app.schemas.qa_schema import QAStatus
 from app.utils.api_response import UserError
-from app.services import embedding_service, document_chunk_service, llm_service
-
+from app.utils import metrics
+from app.utils.single_flight import SingleFlight
+from app.utils.text_process import normalize_text
+from app.services import embedding_service, document_chunk_service, llm_service, rerank_service, answer_cache_service, translation_service
 
 
 # --- CONFIGURATION ---
-TRANSLATE_MODEL = os.getenv("TRANSLATE_MODEL", "VietAI/envit5-translation")
-CROSS_ENCODER_MODEL = os.getenv("CROSS_ENCODER_MODEL", "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1")
-
-# Lazy loading for models
-translate_tokenizer = None
-translate_model = None
-cross_encoder_model = None
-
+RERANK_LOG_SAMPLE_RATE = float(os.getenv("RERANK_LOG_SAMPLE_RATE") or 0.01)
 
-def _load_translate_model():
-    global translate_tokenizer, translate_model
-    if translate_tokenizer is None or translate_model is None:
-        translate_tokenizer = AutoTokenizer.from_pretrained(TRANSLATE_MODEL)
-        translate_model = AutoModelForSeq2SeqLM.from_pretrained(TRANSLATE_MODEL)
-    return translate_tokenizer, translate_model
-
-
-def _load_cross_encoder_model():
-    global cross_encoder_model
-    if cross_encoder_model is None:
-        cross_encoder_model = CrossEncoder(CROSS_ENCODER_MODEL)
-    return cross_encoder_model
+# Identical questions asked at the same time share one pipeline run
+answer_flight = SingleFlight()
+coalescing_stats = {"saved_llm_calls": 0}
 
 
 # --- SERVICE FUNCTIONS ---
@@ -41,7 +28,8 @@ async def create_question_record(
     question: str,
     user_id: str,
     user_sub: str,
-    user_faculty: str
+    user_faculty: str,
+    status: str = QAStatus.PROCESSING.value
 ) -> dict:
     question_data = {
         "user_id": user_id,
@@ -50,7 +38,8 @@ async def create_question_record(
         "question": question,
         "answer": None,
         "feedback": None,
-        "manager_answer": None
+        "manager_answer": None,
+        "status": status
     }
     question_record = await QADao().create_qa_record(question_data)
     return question_record
@@ -58,68 +47,158 @@ async def create_question_record(
 
 # Translate question to Vietnamese
 async def translate_to_vietnamese(text: str) -> str:
-    loop = asyncio.get_event_loop()
-    
-    def _translate():
-        tokenizer, model = _load_translate_model()
-        input_text = ["en: " + text]
-        inputs = tokenizer(input_text, return_tensors="pt", padding=True)
-        output = model.generate(
-            inputs.input_ids,
-            max_length=512,
-            num_beams=5,
-            early_stopping=True
-        )
-        translated = tokenizer.batch_decode(output, skip_special_tokens=True)
-        
-        return translated[0]
-    
-    result = await loop.run_in_executor(None, _translate)
+    result = await translation_service.translate_to_vietnamese(text)
     return result
 
 
-# Get answer for the question
-async def get_answer(question: str, question_in_vietnamese: str, user_faculty: str, question_language: str) -> str:
+# Get the active API key or fail
+async def get_active_api_key() -> dict:
     api_key = await llm_service.get_current_api_key()
     if not api_key:
         raise UserError("No active API key found. Please activate an API key to proceed.")
-    
-    embedded_question = await embedding_service.get_embedding(question_in_vietnamese)
-    relevant_potential_question_embeddings = await embedding_service.find_relevant_potential_questions(
-        top_k = 100,
-        embedding_vector = embedded_question,
-        user_faculty = user_faculty
+    return api_key
+
+
+# Get answer for the question
+async def get_answer(question: str, question_in_vietnamese: str, user_faculty: str, question_language: str) -> str:
+    api_key = await get_active_api_key()
+    key = (
+        translation_service.normalize_question(question).lower(),
+        user_faculty,
+        question_language,
+        f"{api_key['provider']}:{api_key['using_model']}"
     )
+    leader = False
+
+    def compute():
+        nonlocal leader
+        leader = True
+        return _compute_answer(api_key, question, question_in_vietnamese, user_faculty, question_language)
+
+    answer, called_llm = await answer_flight.do(key, compute)
+    if not leader and called_llm:
+        coalescing_stats["saved_llm_calls"] += 1
+    return answer
+
+
+# Get coalescing metrics; only followers of a run that called the LLM saved an LLM call
+def get_coalescing_stats() -> dict:
+    return {**answer_flight.get_stats(), **coalescing_stats}
+
+
+# Run the full pipeline for a question; also tells whether the LLM was called or the answer cache was hit
+async def _compute_answer(
+    api_key: dict,
+    question: str,
+    question_in_vietnamese: str,
+    user_faculty: str,
+    question_language: str
+) -> tuple[str, bool]:
+    labels = metrics.qa_labels(question_language, user_faculty, api_key)
     
-    chunks = []
-    for item in relevant_potential_question_embeddings:
-        metadata = item["metadata"]
-        chunk = await document_chunk_service.get_document_chunk_by_index(metadata["doc_id"], metadata["chunk_index"])
-        chunk_content = f"""Tài liệu: {chunk['file_name']}. Nội dung: {chunk['text']}. URL: {chunk['file_url']}"""
-        chunks.append(chunk_content)
-    unique_chunks = set(chunks)
-    chunks = list(unique_chunks)
-    chunks = rerank_chunks(question_in_vietnamese, chunks, top_k=20)
+    with metrics.observe_stage("embedding", labels):
+        embedded_question = await embedding_service.get_embedding(question_in_vietnamese)
+    active_model = f"{api_key['provider']}:{api_key['using_model']}"
+    with metrics.observe_stage("answer_cache", labels):
+        await answer_cache_service.sync_corpus_version()
+        cached_answer = answer_cache_service.get_cached_answer(embedded_question, user_faculty, question_language, active_model)
+    if cached_answer is not None:
+        return cached_answer, False
+    corpus_version = answer_cache_service.get_corpus_version(user_faculty)
     
-    answer = await llm_service.generate_answer(api_key, chunks, question, question_language)
-    return answer
+    chunks, _ = await retrieve_context(question_in_vietnamese, embedded_question, user_faculty, labels)
+    
+    with metrics.observe_stage("llm", labels):
+        answer = await llm_service.generate_answer(api_key, chunks, question, question_language)
+    answer_cache_service.cache_answer(embedded_question, user_faculty, question_language, active_model, answer, corpus_version)
+    return answer, True
 
 
-# Rerank chunks using Cross-Encoder
-def rerank_chunks(question: str, chunks: list[str], top_k: int) -> list[str]:
-    model = _load_cross_encoder_model()
-    scored_chunks = {}
-    for chunk in chunks:
-        score = model.predict([[question, chunk]])[0]
-        scored_chunks[chunk] = float(score)
+# Stream the answer as ("sources" | "token" | "answer", payload) events
+async def stream_answer(question: str, question_in_vietnamese: str, user_faculty: str, question_language: str):
+    api_key = await get_active_api_key()
+    labels = metrics.qa_labels(question_language, user_faculty, api_key)
+    
+    with metrics.observe_stage("embedding", labels):
+        embedded_question = await embedding_service.get_embedding(question_in_vietnamese)
+    active_model = f"{api_key['provider']}:{api_key['using_model']}"
+    with metrics.observe_stage("answer_cache", labels):
+        await answer_cache_service.sync_corpus_version()
+        cached_answer = answer_cache_service.get_cached_answer(embedded_question, user_faculty, question_language, active_model)
+    if cached_answer is not None:
+        yield "sources", []
+        yield "token", cached_answer
+        yield "answer", cached_answer
+        return
+    corpus_version = answer_cache_service.get_corpus_version(user_faculty)
     
-    sorted_scored_chunks = sorted(scored_chunks, key=scored_chunks.get, reverse=True)
-    top_chunks = sorted_scored_chunks[:top_k]
+    chunks, sources = await retrieve_context(question_in_vietnamese, embedded_question, user_faculty, labels)
+    yield "sources", sources
+    
+    answer_parts = []
+    llm_start = time.perf_counter()
+    async for delta in llm_service.stream_answer(api_key, chunks, question, question_language):
+        if not answer_parts:
+            metrics.QA_STAGE_SECONDS.labels(stage="llm_first_token", **labels).observe(time.perf_counter() - llm_start)
+        answer_parts.append(delta)
+        yield "token", delta
+    metrics.QA_STAGE_SECONDS.labels(stage="llm", **labels).observe(time.perf_counter() - llm_start)
+    
+    answer = normalize_text("".join(answer_parts))
+    answer_cache_service.cache_answer(embedded_question, user_faculty, question_language, active_model, answer, corpus_version)
+    yield "answer", answer
+
+
+# Retrieve and rerank context chunks, returning the chunk texts and their sources
+async def retrieve_context(
+    question_in_vietnamese: str,
+    embedded_question: list[float],
+    user_faculty: str,
+    labels: dict
+) -> tuple[list[str], list[dict]]:
+    with metrics.observe_stage("vector_search", labels):
+        relevant_potential_question_embeddings = await embedding_service.find_relevant_potential_questions(
+            top_k = 100,
+            embedding_vector = embedded_question,
+            user_faculty = user_faculty
+        )
     
-    # Logging
-    print("- LOG: Reranked chunks:")
-    for i, chunk in enumerate(top_chunks):
-        print(f"  {i+1}. (score: {scored_chunks[chunk]:.4f}) {chunk}")
+    with metrics.observe_stage("chunk_fetch", labels):
+        resolved_chunks = await document_chunk_service.get_document_chunks_by_hits(relevant_potential_question_embeddings)
+    chunk_sources = {}
+    for chunk in resolved_chunks:
+        chunk_content = build_chunk_content(chunk)
+        chunk_sources.setdefault(chunk_content, {"file_name": chunk["file_name"], "file_url": chunk["file_url"]})
+    with metrics.observe_stage("rerank", labels):
+        chunks = await rerank_chunks(question_in_vietnamese, list(chunk_sources.keys()), top_k=20)
+    
+    sources = []
+    for chunk in chunks:
+        if chunk_sources[chunk] not in sources:
+            sources.append(chunk_sources[chunk])
+    return chunks, sources
+
+
+# Format a resolved chunk as it is passed to the reranker and the LLM
+def build_chunk_content(chunk: dict) -> str:
+    return f"""Tài liệu: {chunk['file_name']}. Nội dung: {chunk['text']}. URL: {chunk['file_url']}"""
+
+
+# Rerank chunks using Cross-Encoder
+async def rerank_chunks(question: str, chunks: list[str], top_k: int) -> list[str]:
+    top_chunks, top_scores = await rerank_service.rerank(question, chunks, top_k)
+    
+    # Sampled structured debug logging
+    if logging.getLogger().isEnabledFor(logging.DEBUG) and random.random() < RERANK_LOG_SAMPLE_RATE:
+        logging.debug(json.dumps({
+            "event": "rerank",
+            "question": question,
+            "candidates": len(chunks),
+            "top": [
+                {"rank": i + 1, "score": round(float(score), 4), "chunk": chunk[:200]}
+                for i, (chunk, score) in enumerate(zip(top_chunks, top_scores))
+            ]
+        }, ensure_ascii=False))
     
     return top_chunks
 
@@ -133,6 +212,11 @@ async def update_question_record_with_answer(
     return jsonable_encoder(updated_record)
 
 
+# Update question record status
+async def update_question_record_status(question_id: str, status: str) -> bool:
+    return await QADao().update_qa_status(question_id, status)
+
+
 # Get all question records
 async def get_all_question_records(
     page: int,
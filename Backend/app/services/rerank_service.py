@@ -0,0 +1,73 @@
+import os
+import asyncio
+import threading
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+from app.utils.inference_backend import load_cross_encoder
+
+
+# --- CONFIGURATION ---
+CROSS_ENCODER_MODEL = os.getenv("CROSS_ENCODER_MODEL", "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1")
+RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE") or 32)
+RERANK_MAX_LENGTH = int(os.getenv("RERANK_MAX_LENGTH") or 512)
+RERANK_WORKERS = int(os.getenv("RERANK_WORKERS") or 1)
+
+# Dedicated executor so reranking never competes with the default thread pool
+rerank_executor = ThreadPoolExecutor(max_workers=RERANK_WORKERS, thread_name_prefix="rerank")
+
+# Lazy loading for model
+cross_encoder_model = None
+_model_lock = threading.Lock()
+
+
+def _load_cross_encoder_model():
+    global cross_encoder_model
+    with _model_lock:
+        if cross_encoder_model is None:
+            cross_encoder_model = load_cross_encoder(CROSS_ENCODER_MODEL, max_length=RERANK_MAX_LENGTH)
+    return cross_encoder_model
+
+
+# --- SERVICE FUNCTIONS ---
+# Score all (question, chunk) pairs in length-sorted mini-batches
+def score_chunks(question: str, chunks: list[str], batch_size: int = RERANK_BATCH_SIZE) -> np.ndarray:
+    scores = np.empty(len(chunks), dtype=np.float32)
+    if not chunks:
+        return scores
+
+    model = _load_cross_encoder_model()
+
+    # Sorting by length keeps padding inside each mini-batch to a minimum
+    order = np.argsort([len(chunk) for chunk in chunks], kind="stable")
+    for start in range(0, len(order), batch_size):
+        batch_indices = order[start:start + batch_size]
+        pairs = [[question, chunks[i]] for i in batch_indices]
+        batch_scores = model.predict(
+            pairs,
+            batch_size=batch_size,
+            show_progress_bar=False,
+            convert_to_numpy=True
+        )
+        scores[batch_indices] = np.asarray(batch_scores, dtype=np.float32).reshape(-1)
+
+    return scores
+
+
+# Get indices of the top K scores, best first
+def top_k_indices(scores: np.ndarray, top_k: int) -> np.ndarray:
+    if top_k <= 0 or scores.size == 0:
+        return np.empty(0, dtype=np.int64)
+    if top_k >= scores.size:
+        return np.argsort(-scores, kind="stable")
+
+    candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+# Rerank chunks on the dedicated executor
+async def rerank(question: str, chunks: list[str], top_k: int) -> tuple[list[str], np.ndarray]:
+    loop = asyncio.get_running_loop()
+    scores = await loop.run_in_executor(rerank_executor, score_chunks, question, chunks)
+    indices = top_k_indices(scores, top_k)
+    return [chunks[i] for i in indices], scores[indices]
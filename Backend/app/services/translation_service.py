@@ -0,0 +1,125 @@
+import os
+import re
+import time
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+
+from app.utils.micro_batcher import MicroBatcher
+from app.utils.inference_backend import load_seq2seq
+
+
+# --- CONFIGURATION ---
+TRANSLATE_MODEL = os.getenv("TRANSLATE_MODEL", "VietAI/envit5-translation")
+TRANSLATE_NUM_BEAMS = int(os.getenv("TRANSLATE_NUM_BEAMS") or 5)                 # 1 = greedy decoding
+TRANSLATE_MAX_LENGTH = int(os.getenv("TRANSLATE_MAX_LENGTH") or 512)
+TRANSLATE_LENGTH_RATIO = float(os.getenv("TRANSLATE_LENGTH_RATIO") or 2.0)
+TRANSLATE_LENGTH_MARGIN = int(os.getenv("TRANSLATE_LENGTH_MARGIN") or 16)
+TRANSLATE_BATCH_SIZE = int(os.getenv("TRANSLATE_BATCH_SIZE") or 8)
+TRANSLATE_BATCH_WAIT_MS = float(os.getenv("TRANSLATE_BATCH_WAIT_MS") or 10)
+TRANSLATE_QUEUE_SIZE = int(os.getenv("TRANSLATE_QUEUE_SIZE") or 256)
+TRANSLATE_CACHE_SIZE = int(os.getenv("TRANSLATE_CACHE_SIZE") or 1024)
+
+# Lazy loading for model
+translate_tokenizer = None
+translate_model = None
+_model_lock = threading.Lock()
+
+translation_cache: OrderedDict[str, str] = OrderedDict()
+translation_stats = {
+    "requests": 0,
+    "cache_hits": 0,
+    "translated": 0,
+    "total_latency_seconds": 0.0,
+    "max_latency_seconds": 0.0,
+    "last_latency_seconds": 0.0
+}
+
+
+def _load_translate_model():
+    global translate_tokenizer, translate_model
+    with _model_lock:
+        if translate_tokenizer is None or translate_model is None:
+            translate_tokenizer, translate_model = load_seq2seq(TRANSLATE_MODEL)
+    return translate_tokenizer, translate_model
+
+
+# Translate a batch of English texts in one generate call
+def _translate_batch(texts: list[str]) -> list[str]:
+    tokenizer, model = _load_translate_model()
+    input_text = ["en: " + text for text in texts]
+    inputs = tokenizer(input_text, return_tensors="pt", padding=True, truncation=True, max_length=TRANSLATE_MAX_LENGTH)
+
+    # Cap the output length relative to the longest input instead of always decoding up to the maximum
+    input_length = int(inputs.attention_mask.sum(dim=1).max())
+    max_length = min(TRANSLATE_MAX_LENGTH, int(input_length * TRANSLATE_LENGTH_RATIO) + TRANSLATE_LENGTH_MARGIN)
+
+    output = model.generate(
+        inputs.input_ids,
+        attention_mask=inputs.attention_mask,
+        max_length=max_length,
+        num_beams=TRANSLATE_NUM_BEAMS,
+        early_stopping=TRANSLATE_NUM_BEAMS > 1
+    )
+    return tokenizer.batch_decode(output, skip_special_tokens=True)
+
+
+translation_batcher = MicroBatcher(
+    process_batch=_translate_batch,
+    max_batch_size=TRANSLATE_BATCH_SIZE,
+    max_wait_ms=TRANSLATE_BATCH_WAIT_MS,
+    max_queue_size=TRANSLATE_QUEUE_SIZE
+)
+
+
+# --- SERVICE FUNCTIONS ---
+# Load the model and run a dummy translation so the first question is not slow
+async def warm_up():
+    start = time.perf_counter()
+    await translation_batcher.submit("Hello")
+    logging.info(f"Translation model {TRANSLATE_MODEL} warmed up in {time.perf_counter() - start:.2f}s")
+
+
+# Translate English text to Vietnamese
+async def translate_to_vietnamese(text: str) -> str:
+    start = time.perf_counter()
+    translation_stats["requests"] += 1
+
+    key = normalize_question(text)
+    if key in translation_cache:
+        translation_cache.move_to_end(key)
+        translation_stats["cache_hits"] += 1
+        translated = translation_cache[key]
+    else:
+        translated = await translation_batcher.submit(key)
+        translation_stats["translated"] += 1
+        translation_cache[key] = translated
+        while len(translation_cache) > TRANSLATE_CACHE_SIZE:
+            translation_cache.popitem(last=False)
+
+    latency = time.perf_counter() - start
+    translation_stats["total_latency_seconds"] += latency
+    translation_stats["max_latency_seconds"] = max(translation_stats["max_latency_seconds"], latency)
+    translation_stats["last_latency_seconds"] = latency
+    logging.info(f"Translated question in {latency * 1000:.1f}ms")
+    return translated
+
+
+# Get translation metrics
+def get_translation_stats() -> dict:
+    requests = translation_stats["requests"]
+    return {
+        **translation_stats,
+        "average_latency_seconds": translation_stats["total_latency_seconds"] / requests if requests else 0.0,
+        "cache_size": len(translation_cache),
+        "num_beams": TRANSLATE_NUM_BEAMS,
+        "batcher": translation_batcher.get_stats()
+    }
+
+
+# --- SUPPORTING FUNCTIONS ---
+# Normalize a question for caching
+def normalize_question(text: str) -> str:
+    text = unicodedata.normalize("NFC", text)
+    return re.sub(r'\s+', ' ', text).strip()
@@ -0,0 +1,86 @@
+import time
+import asyncio
+import logging
+
+from app.databases import chroma
+from app.services import embedding_service, rerank_service, translation_service
+
+
+# --- CONFIGURATION ---
+WARM_UP_QUESTION = "Điều kiện xét học bổng khuyến khích học tập là gì?"
+COMPONENTS = ["mongo", "chroma", "embedding_model", "vector_index", "reranker", "translator"]
+
+component_states = {
+    name: {"status": "pending", "duration_ms": None, "error": None}
+    for name in COMPONENTS
+}
+
+
+# --- SERVICE FUNCTIONS ---
+# Record the outcome of loading a component
+async def track_component(name: str, load, required: bool = False):
+    state = component_states[name]
+    state["status"] = "loading"
+    start = time.perf_counter()
+    try:
+        result = await load()
+    except Exception as e:
+        state["status"] = "failed"
+        state["error"] = str(e)
+        logging.error(f"Warm-up of {name} failed: {e}", exc_info=True)
+        if required:
+            raise
+        return None
+    finally:
+        state["duration_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+    state["status"] = "ready"
+    logging.info(f"Warm-up of {name} finished in {state['duration_ms']}ms")
+    return result
+
+
+# Load every model and index and run a dummy inference through each
+async def warm_up():
+    await track_component("chroma", _open_chroma)
+    embedded_question = await track_component("embedding_model", _warm_up_embedding_model)
+    if embedded_question is not None:
+        await track_component("vector_index", lambda: _touch_vector_index(embedded_question))
+    else:
+        component_states["vector_index"].update(status="failed", error="Embedding model is not available.")
+    await track_component("reranker", _warm_up_reranker)
+    await track_component("translator", translation_service.warm_up)
+
+
+# Get per-component readiness
+def get_readiness() -> dict:
+    return {
+        "ready": all(state["status"] == "ready" for state in component_states.values()),
+        "components": component_states
+    }
+
+
+# --- SUPPORTING FUNCTIONS ---
+# Connect to ChromaDB and open the embeddings collection
+async def _open_chroma():
+    await asyncio.to_thread(chroma.connect_to_chroma)
+
+
+# Load the embedding model and encode a dummy question
+async def _warm_up_embedding_model():
+    return await embedding_service.get_embedding(WARM_UP_QUESTION)
+
+
+# Run a query so the HNSW index is loaded into memory
+async def _touch_vector_index(embedded_question: list[float]):
+    def query():
+        collection = chroma.get_embeddings_collection()
+        count = collection.count()
+        if count > 0:
+            collection.query(query_embeddings=[embedded_question], n_results=min(10, count))
+
+    await asyncio.to_thread(query)
+
+
+# Load the cross-encoder and score a dummy pair
+async def _warm_up_reranker():
+    await rerank_service.rerank(WARM_UP_QUESTION, [WARM_UP_QUESTION], top_k=1)
@@ -0,0 +1,190 @@
+import os
+import sys
+import argparse
+import numpy as np
+from pyvi.ViTokenizer import tokenize
+from transformers import AutoTokenizer
+from sentence_transformers import SentenceTransformer, CrossEncoder, export_dynamic_quantized_onnx_model
+
+from app.utils import inference_backend
+from app.utils.inference_backend import InferenceBackend
+from app.services.embedding_service import EMBEDDING_MODEL
+from app.services.rerank_service import CROSS_ENCODER_MODEL, RERANK_MAX_LENGTH
+from app.services.translation_service import TRANSLATE_MODEL
+
+
+# --- CONFIGURATION ---
+SAMPLE_SENTENCES = [
+    "Điều kiện để sinh viên được xét học bổng khuyến khích học tập là gì?",
+    "Sinh viên bị cảnh báo học vụ khi điểm trung bình học kỳ dưới bao nhiêu?",
+    "Thời gian đăng ký môn học của học kỳ hè kéo dài bao lâu?",
+    "Học phí được miễn giảm cho những đối tượng nào?",
+    "Chuẩn đầu ra ngoại ngữ để được xét tốt nghiệp là gì?",
+    "Sinh viên có được bảo lưu kết quả học tập khi đi nghĩa vụ quân sự không?",
+    "Quy trình phúc khảo bài thi cuối kỳ như thế nào?",
+    "Khoa Công nghệ thông tin tổ chức thực tập doanh nghiệp vào thời gian nào?"
+]
+SAMPLE_CANDIDATES = [
+    "Sinh viên có điểm trung bình học kỳ từ 8.0 trở lên và điểm rèn luyện từ 80 được xét học bổng khuyến khích học tập.",
+    "Học bổng khuyến khích học tập được xét theo từng học kỳ dựa trên kết quả học tập và rèn luyện.",
+    "Sinh viên bị cảnh báo học vụ nếu điểm trung bình học kỳ dưới 4.0.",
+    "Thời gian đăng ký môn học học kỳ hè là hai tuần kể từ ngày thông báo.",
+    "Sinh viên thuộc diện hộ nghèo được miễn giảm học phí theo quy định của Nhà nước.",
+    "Chuẩn đầu ra ngoại ngữ là chứng chỉ IELTS 5.0 hoặc tương đương.",
+    "Sinh viên đi nghĩa vụ quân sự được bảo lưu kết quả học tập.",
+    "Sinh viên nộp đơn phúc khảo trong vòng 7 ngày kể từ ngày công bố điểm.",
+    "Thư viện mở cửa từ 7 giờ đến 21 giờ các ngày trong tuần.",
+    "Sinh viên phải đeo thẻ sinh viên khi vào khuôn viên trường."
+]
+SAMPLE_ENGLISH = [
+    "What are the requirements for the academic encouragement scholarship?",
+    "When does course registration for the summer semester end?",
+    "Who is eligible for a tuition fee reduction?",
+    "How do I request a re-examination of my final exam?"
+]
+
+
+# --- EXPORT ---
+# Export a SentenceTransformer or CrossEncoder model to ONNX fp32 and dynamic int8
+def export_sentence_model(model_class, model_name: str):
+    export_dir = inference_backend.get_export_dir(model_name)
+    model = model_class(model_name, backend="onnx")
+    model.save_pretrained(export_dir)
+    export_dynamic_quantized_onnx_model(
+        model,
+        quantization_config=inference_backend.ONNX_QUANTIZATION,
+        model_name_or_path=export_dir
+    )
+    print(f"Exported {model_name} to {export_dir}")
+
+
+# Export a seq2seq model to ONNX fp32 and quantize each graph to dynamic int8
+def export_seq2seq_model(model_name: str):
+    # Optional dependency, only needed for the ONNX backends
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+    fp32_dir = inference_backend.get_seq2seq_export_dir(model_name, InferenceBackend.ONNX)
+    int8_dir = inference_backend.get_seq2seq_export_dir(model_name, InferenceBackend.ONNX_INT8)
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = ORTModelForSeq2SeqLM.from_pretrained(model_name, export=True)
+    model.save_pretrained(fp32_dir)
+    tokenizer.save_pretrained(fp32_dir)
+
+    quantization_config = getattr(AutoQuantizationConfig, inference_backend.ONNX_QUANTIZATION)(
+        is_static=False,
+        per_channel=False
+    )
+    for file_name in inference_backend.SEQ2SEQ_FILES[InferenceBackend.ONNX].values():
+        quantizer = ORTQuantizer.from_pretrained(fp32_dir, file_name=file_name)
+        quantizer.quantize(save_dir=int8_dir, quantization_config=quantization_config)
+    model.config.save_pretrained(int8_dir)
+    model.generation_config.save_pretrained(int8_dir)
+    tokenizer.save_pretrained(int8_dir)
+    print(f"Exported {model_name} to {fp32_dir} and {int8_dir}")
+
+
+# Export the selected models
+def run_export(models: list[str]):
+    if "embedding" in models:
+        export_sentence_model(SentenceTransformer, EMBEDDING_MODEL)
+    if "reranker" in models:
+        export_sentence_model(CrossEncoder, CROSS_ENCODER_MODEL)
+    if "translator" in models:
+        export_seq2seq_model(TRANSLATE_MODEL)
+
+
+# --- PARITY CHECK ---
+# Cosine similarity between torch and backend embeddings of the same sentences
+def check_embedding(backend: str) -> dict:
+    sentences = [tokenize(sentence) for sentence in SAMPLE_SENTENCES]
+    baseline = inference_backend.load_sentence_transformer(EMBEDDING_MODEL, InferenceBackend.TORCH.value).encode(sentences)
+    candidate = inference_backend.load_sentence_transformer(EMBEDDING_MODEL, backend).encode(sentences)
+
+    baseline = baseline / np.linalg.norm(baseline, axis=1, keepdims=True)
+    candidate = candidate / np.linalg.norm(candidate, axis=1, keepdims=True)
+    cosines = np.sum(baseline * candidate, axis=1)
+    return {"mean_cosine": float(cosines.mean()), "min_cosine": float(cosines.min())}
+
+
+# Ranking agreement between torch and backend reranker scores
+def check_reranker(backend: str, top_k: int = 3) -> dict:
+    baseline_model = inference_backend.load_cross_encoder(CROSS_ENCODER_MODEL, RERANK_MAX_LENGTH, InferenceBackend.TORCH.value)
+    candidate_model = inference_backend.load_cross_encoder(CROSS_ENCODER_MODEL, RERANK_MAX_LENGTH, backend)
+
+    overlaps = []
+    correlations = []
+    for question in SAMPLE_SENTENCES:
+        pairs = [[question, candidate] for candidate in SAMPLE_CANDIDATES]
+        baseline = np.asarray(baseline_model.predict(pairs, show_progress_bar=False))
+        candidate = np.asarray(candidate_model.predict(pairs, show_progress_bar=False))
+
+        baseline_top = set(np.argsort(-baseline)[:top_k])
+        candidate_top = set(np.argsort(-candidate)[:top_k])
+        overlaps.append(len(baseline_top & candidate_top) / top_k)
+
+        # Spearman correlation of the two rankings
+        baseline_ranks = np.argsort(np.argsort(-baseline))
+        candidate_ranks = np.argsort(np.argsort(-candidate))
+        correlations.append(float(np.corrcoef(baseline_ranks, candidate_ranks)[0, 1]))
+
+    return {
+        f"mean_top{top_k}_overlap": float(np.mean(overlaps)),
+        "mean_spearman": float(np.mean(correlations)),
+        "min_spearman": float(np.min(correlations))
+    }
+
+
+# Exact-match rate between torch and backend translations
+def check_translator(backend: str) -> dict:
+    def translate(tokenizer, model):
+        inputs = tokenizer(["en: " + text for text in SAMPLE_ENGLISH], return_tensors="pt", padding=True)
+        output = model.generate(inputs.input_ids, attention_mask=inputs.attention_mask, max_length=128, num_beams=1)
+        return tokenizer.batch_decode(output, skip_special_tokens=True)
+
+    baseline = translate(*inference_backend.load_seq2seq(TRANSLATE_MODEL, InferenceBackend.TORCH.value))
+    candidate = translate(*inference_backend.load_seq2seq(TRANSLATE_MODEL, backend))
+    matches = sum(1 for a, b in zip(baseline, candidate) if a.strip() == b.strip())
+    return {"exact_match_rate": matches / len(SAMPLE_ENGLISH)}
+
+
+# Run the parity checks and report whether all thresholds hold
+def run_check(backend: str, models: list[str], min_cosine: float, min_spearman: float) -> bool:
+    passed = True
+    if "embedding" in models:
+        result = check_embedding(backend)
+        ok = result["min_cosine"] >= min_cosine
+        passed &= ok
+        print(f"[{'PASS' if ok else 'FAIL'}] embedding {result}")
+    if "reranker" in models:
+        result = check_reranker(backend)
+        ok = result["min_spearman"] >= min_spearman
+        passed &= ok
+        print(f"[{'PASS' if ok else 'FAIL'}] reranker {result}")
+    if "translator" in models:
+        result = check_translator(backend)
+        print(f"[INFO] translator {result}")
+    return passed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export models to ONNX and check parity against the torch baseline.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    all_models = ["embedding", "reranker", "translator"]
+
+    export_parser = subparsers.add_parser("export", help="Export fp32 and dynamic int8 ONNX models")
+    export_parser.add_argument("--models", nargs="+", choices=all_models, default=all_models)
+
+    check_parser = subparsers.add_parser("check", help="Compare an ONNX backend with the torch baseline")
+    check_parser.add_argument("--backend", choices=[InferenceBackend.ONNX.value, InferenceBackend.ONNX_INT8.value], default=InferenceBackend.ONNX_INT8.value)
+    check_parser.add_argument("--models", nargs="+", choices=all_models, default=all_models)
+    check_parser.add_argument("--min-cosine", type=float, default=0.99)
+    check_parser.add_argument("--min-spearman", type=float, default=0.9)
+
+    args = parser.parse_args()
+    if args.command == "export":
+        os.makedirs(inference_backend.ONNX_MODEL_DIR, exist_ok=True)
+        run_export(args.models)
+    else:
+        sys.exit(0 if run_check(args.backend, args.models, args.min_cosine, args.min_spearman) else 1)
@@ -1,19 +1,26 @@
+import json
 from typing import Any
 from fastapi import HTTPException, status
 from fastapi.responses import JSONResponse
 
 # --- API RESPONSE ---
-def api_response(status_code: int, message: str, details: Any = None):
+def api_response(status_code: int, message: str, details: Any = None, headers: dict | None = None):
     return JSONResponse(
         status_code=status_code,
         content={
             "status_code": status_code,
             "message": message,
             "details": details
-        }
+        },
+        headers=headers
     )
     
 
+# --- SERVER-SENT EVENTS ---
+def sse_event(event: str, data: Any = None) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+    
+
 # --- CUSSTOM EXCEPTIONS ---
 class UserError(Exception):
     def __init__(self, message: str = "User error occurred"):
@@ -32,4 +39,21 @@ class DatabaseException(Exception):
 
 class AuthException(Exception):
     def __init__(self, message: str = "Unauthorized"):
-        self.message = message
\ No newline at end of file
+        self.message = message
+
+
+class TooManyRequestsException(Exception):
+    def __init__(self, message: str = "Too many requests", retry_after: int = 5):
+        self.message = message
+        self.retry_after = retry_after
+
+
+class ServiceUnavailableException(Exception):
+    def __init__(self, message: str = "Service unavailable", retry_after: int = 5):
+        self.message = message
+        self.retry_after = retry_after
+
+
+class PayloadTooLargeException(Exception):
+    def __init__(self, message: str = "Payload too large"):
+        self.message = message
@@ -0,0 +1,106 @@
+import os
+from enum import Enum
+from sentence_transformers import SentenceTransformer, CrossEncoder
+from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
+
+
+# --- CONFIGURATION ---
+class InferenceBackend(str, Enum):
+    TORCH = "torch"
+    ONNX = "onnx"
+    ONNX_INT8 = "onnx-int8"
+
+
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", InferenceBackend.TORCH.value)
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "onnx_models")
+ONNX_QUANTIZATION = os.getenv("ONNX_QUANTIZATION", "avx2")            # avx2 | avx512 | avx512_vnni | arm64
+
+# File names written by the export CLI (python -m app.tools.onnx_export)
+SENTENCE_ONNX_FILE = "onnx/model.onnx"
+SENTENCE_ONNX_INT8_FILE = f"onnx/model_qint8_{ONNX_QUANTIZATION}.onnx"
+SEQ2SEQ_FILES = {
+    InferenceBackend.ONNX: {
+        "encoder_file_name": "encoder_model.onnx",
+        "decoder_file_name": "decoder_model.onnx",
+        "decoder_with_past_file_name": "decoder_with_past_model.onnx"
+    },
+    InferenceBackend.ONNX_INT8: {
+        "encoder_file_name": "encoder_model_quantized.onnx",
+        "decoder_file_name": "decoder_model_quantized.onnx",
+        "decoder_with_past_file_name": "decoder_with_past_model_quantized.onnx"
+    }
+}
+
+
+# --- SUPPORTING FUNCTIONS ---
+# Resolve the configured inference backend
+def get_backend(backend: str | None = None) -> InferenceBackend:
+    value = backend or INFERENCE_BACKEND
+    try:
+        return InferenceBackend(value)
+    except ValueError:
+        raise ValueError(
+            f"Invalid INFERENCE_BACKEND '{value}'. Supported backends are: "
+            + ", ".join(b.value for b in InferenceBackend)
+        )
+
+
+# Directory holding the exported ONNX files of a model
+def get_export_dir(model_name: str) -> str:
+    return os.path.join(ONNX_MODEL_DIR, model_name.replace("/", "__"))
+
+
+# Directory holding the exported seq2seq model for a backend
+def get_seq2seq_export_dir(model_name: str, backend: InferenceBackend) -> str:
+    return os.path.join(get_export_dir(model_name), backend.value)
+
+
+# Fail early with a hint when a model has not been exported yet; the alias is the export tool's --models choice
+def _require_export(path: str, model_name: str, backend: InferenceBackend, alias: str):
+    if not os.path.exists(path):
+        raise FileNotFoundError(
+            f"No {backend.value} export found for {model_name} at {path}. "
+            f"Run: python -m app.tools.onnx_export export --models {alias}"
+        )
+
+
+# --- LOADERS ---
+# Load a SentenceTransformer embedding model
+def load_sentence_transformer(model_name: str, backend: str | None = None):
+    backend = get_backend(backend)
+    if backend == InferenceBackend.TORCH:
+        return SentenceTransformer(model_name)
+
+    export_dir = get_export_dir(model_name)
+    file_name = SENTENCE_ONNX_FILE if backend == InferenceBackend.ONNX else SENTENCE_ONNX_INT8_FILE
+    _require_export(os.path.join(export_dir, file_name), model_name, backend, "embedding")
+    return SentenceTransformer(export_dir, backend="onnx", model_kwargs={"file_name": file_name})
+
+
+# Load a CrossEncoder reranking model
+def load_cross_encoder(model_name: str, max_length: int, backend: str | None = None):
+    backend = get_backend(backend)
+    if backend == InferenceBackend.TORCH:
+        return CrossEncoder(model_name, max_length=max_length)
+
+    export_dir = get_export_dir(model_name)
+    file_name = SENTENCE_ONNX_FILE if backend == InferenceBackend.ONNX else SENTENCE_ONNX_INT8_FILE
+    _require_export(os.path.join(export_dir, file_name), model_name, backend, "reranker")
+    return CrossEncoder(export_dir, max_length=max_length, backend="onnx", model_kwargs={"file_name": file_name})
+
+
+# Load a seq2seq translation model with its tokenizer
+def load_seq2seq(model_name: str, backend: str | None = None):
+    backend = get_backend(backend)
+    if backend == InferenceBackend.TORCH:
+        return AutoTokenizer.from_pretrained(model_name), AutoModelForSeq2SeqLM.from_pretrained(model_name)
+
+    # Optional dependency, only needed for the ONNX backends
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM
+
+    export_dir = get_seq2seq_export_dir(model_name, backend)
+    files = SEQ2SEQ_FILES[backend]
+    _require_export(os.path.join(export_dir, files["encoder_file_name"]), model_name, backend, "translator")
+    tokenizer = AutoTokenizer.from_pretrained(export_dir)
+    model = ORTModelForSeq2SeqLM.from_pretrained(export_dir, **files)
+    return tokenizer, model
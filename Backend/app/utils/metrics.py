@@ -0,0 +1,120 @@
+import time
+from typing import Callable
+from contextlib import contextmanager
+from prometheus_client import Counter, Gauge, Histogram, REGISTRY
+from prometheus_client.core import GaugeMetricFamily
+
+
+# --- QA PIPELINE METRICS ---
+QA_LABELS = ["language", "faculty", "provider", "model"]
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
+QA_STAGE_SECONDS = Histogram(
+    "qa_stage_duration_seconds",
+    "Duration of each stage of the question-answering pipeline.",
+    ["stage", *QA_LABELS],
+    buckets=LATENCY_BUCKETS
+)
+QA_REQUEST_SECONDS = Histogram(
+    "qa_request_duration_seconds",
+    "End-to-end duration of question-answering requests.",
+    QA_LABELS,
+    buckets=LATENCY_BUCKETS
+)
+QA_REQUESTS_TOTAL = Counter(
+    "qa_requests_total",
+    "Question-answering requests by outcome.",
+    ["outcome", *QA_LABELS]
+)
+
+
+# --- QA QUEUE METRICS ---
+QA_QUEUE_DEPTH = Gauge(
+    "qa_queue_depth",
+    "Questions waiting in the QA queue."
+)
+QA_QUEUE_IN_PROGRESS = Gauge(
+    "qa_queue_in_progress",
+    "Questions being answered by QA queue workers."
+)
+QA_QUEUE_WAIT_SECONDS = Histogram(
+    "qa_queue_wait_seconds",
+    "Time questions spend in the QA queue before a worker picks them up.",
+    buckets=LATENCY_BUCKETS
+)
+QA_QUEUE_REJECTED_TOTAL = Counter(
+    "qa_queue_rejected_total",
+    "Questions rejected by QA queue admission control.",
+    ["reason"]
+)
+
+
+# --- INGESTION METRICS ---
+INGEST_GENERATION_SECONDS = Histogram(
+    "ingest_question_generation_seconds",
+    "Wall time of generating the potential questions of one document.",
+    ["kind"],
+    buckets=(1, 5, 10, 30, 60, 120, 300, 600, 1200, 1800, 3600)
+)
+
+
+# Build the common QA metric labels
+def qa_labels(language: str, faculty: str | None, api_key: dict | None) -> dict:
+    return {
+        "language": language or "unknown",
+        "faculty": faculty or "general",
+        "provider": (api_key or {}).get("provider") or "unknown",
+        "model": (api_key or {}).get("using_model") or "unknown"
+    }
+
+
+# Time a pipeline stage
+@contextmanager
+def observe_stage(stage: str, labels: dict):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        QA_STAGE_SECONDS.labels(stage=stage, **labels).observe(time.perf_counter() - start)
+
+
+# --- SERVICE STATISTICS ---
+# Exposes the in-process statistics dictionaries of services as gauges at scrape time
+class StatsCollector:
+    def __init__(self):
+        self.sources: dict[str, Callable[[], dict]] = {}
+
+
+    def register(self, prefix: str, get_stats: Callable[[], dict]):
+        self.sources[prefix] = get_stats
+
+
+    def collect(self):
+        for prefix, get_stats in self.sources.items():
+            try:
+                stats = get_stats()
+            except Exception:
+                continue
+            for name, value in _flatten(stats, prefix):
+                yield GaugeMetricFamily(name, f"{prefix} statistic", value=value)
+
+
+# Flatten nested numeric statistics into metric names
+def _flatten(stats: dict, prefix: str):
+    for key, value in stats.items():
+        name = f"{prefix}_{key}"
+        if isinstance(value, dict):
+            yield from _flatten(value, name)
+        elif isinstance(value, bool):
+            yield name, float(value)
+        elif isinstance(value, (int, float)):
+            yield name, float(value)
+
+
+stats_collector = StatsCollector()
+REGISTRY.register(stats_collector)
+
+
+# Register a statistics source under a metric prefix
+def register_stats(prefix: str, get_stats: Callable[[], dict]):
+    stats_collector.register(prefix, get_stats)
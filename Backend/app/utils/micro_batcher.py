@@ -0,0 +1,101 @@
+import time
+import asyncio
+from typing import Any, Callable
+
+
+# --- MICRO BATCHER ---
+# Gathers concurrent submissions into batches processed by one blocking function in a worker thread
+class MicroBatcher:
+    def __init__(
+        self,
+        process_batch: Callable[[list[Any]], list[Any]],
+        max_batch_size: int,
+        max_wait_ms: float,
+        max_queue_size: int
+    ):
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_ms / 1000
+        self.max_queue_size = max_queue_size
+        self.queue: asyncio.Queue | None = None
+        self.worker: asyncio.Task | None = None
+        self.stats = {
+            "submitted": 0,
+            "batches": 0,
+            "batched_items": 0,
+            "largest_batch": 0,
+            "failed_batches": 0,
+            "processing_seconds": 0.0
+        }
+
+
+    # Submit an item and wait for its result
+    async def submit(self, item: Any) -> Any:
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((item, future))
+        self.stats["submitted"] += 1
+        return await future
+
+
+    # Start the batching loop on the running event loop
+    def _ensure_worker(self):
+        if self.worker is None or self.worker.done():
+            self.queue = asyncio.Queue(maxsize=self.max_queue_size)
+            self.worker = asyncio.get_running_loop().create_task(self._run())
+
+
+    # Collect batches until the size cap or the wait window is reached
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait_seconds
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            batch = [(item, future) for item, future in batch if not future.done()]
+            if batch:
+                await self._process(batch)
+
+
+    # Run one batch in a worker thread and resolve its futures
+    async def _process(self, batch: list[tuple[Any, asyncio.Future]]):
+        items = [item for item, _ in batch]
+        start = time.perf_counter()
+        try:
+            results = await asyncio.to_thread(self.process_batch, items)
+        except Exception as e:
+            self.stats["failed_batches"] += 1
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self.stats["processing_seconds"] += time.perf_counter() - start
+
+        self.stats["batches"] += 1
+        self.stats["batched_items"] += len(batch)
+        self.stats["largest_batch"] = max(self.stats["largest_batch"], len(batch))
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+
+    # Get batching metrics
+    def get_stats(self) -> dict:
+        batches = self.stats["batches"]
+        return {
+            **self.stats,
+            "queue_depth": self.queue.qsize() if self.queue is not None else 0,
+            "average_batch_size": self.stats["batched_items"] / batches if batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_seconds * 1000,
+            "max_queue_size": self.max_queue_size
+        }
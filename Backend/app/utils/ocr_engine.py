@@ -0,0 +1,125 @@
+import os
+import re
+import time
+import fitz
+import asyncio
+import pytesseract
+import numpy as np
+from collections import deque
+from typing import AsyncIterator
+from pdf2image import convert_from_path
+from concurrent.futures.process import BrokenProcessPool
+
+from app.utils import process_pool
+
+
+# --- CONFIGURATION ---
+OCR_DPI = int(os.getenv("OCR_DPI") or 200)
+OCR_LANGUAGES = os.getenv("OCR_LANGUAGES", "vie+eng")
+OCR_MAX_IN_FLIGHT_PAGES = int(os.getenv("OCR_MAX_IN_FLIGHT_PAGES") or process_pool.PDF_PROCESS_WORKERS)
+
+
+# --- OCR ENGINE ---
+# Stream OCR results page by page in page order. Each page is rendered alone
+# (first_page = last_page) inside a pool process, and at most
+# OCR_MAX_IN_FLIGHT_PAGES pages are submitted at once, which bounds peak memory.
+# Only the given (1-based) page numbers are processed, or every page by default.
+# If the pool breaks, it is replaced once and the in-flight pages are resubmitted.
+async def ocr_pages(file_path: str, page_numbers: list[int] = None) -> AsyncIterator[dict]:
+    if page_numbers is None:
+        page_numbers = list(range(1, await asyncio.to_thread(_count_pages, file_path) + 1))
+    loop = asyncio.get_running_loop()
+    pending = deque()
+    retried = False
+
+    def submit(page_number: int):
+        pool = process_pool.get_process_pool()
+        pending.append((page_number, pool, loop.run_in_executor(
+            pool,
+            _ocr_page,
+            file_path,
+            page_number,
+            OCR_DPI,
+            OCR_LANGUAGES
+        )))
+
+    async def next_page() -> dict:
+        nonlocal retried
+        try:
+            return await pending[0][2]
+        except BrokenProcessPool:
+            process_pool.reset_process_pool(pending[0][1])
+            if retried:
+                raise
+            retried = True
+            broken = list(pending)
+            pending.clear()
+            await asyncio.gather(*(future for _, _, future in broken), return_exceptions=True)
+            for page_number, _, _ in broken:
+                submit(page_number)
+            return await pending[0][2]
+        finally:
+            if pending and pending[0][2].done():
+                pending.popleft()
+
+    try:
+        for page_number in page_numbers:
+            submit(page_number)
+            if len(pending) >= OCR_MAX_IN_FLIGHT_PAGES:
+                yield await next_page()
+        while pending:
+            yield await next_page()
+    finally:
+        for _, _, future in pending:
+            future.cancel()
+
+
+# OCR pages of a scanned PDF; returns the cleaned text of each page by page number and a timing summary
+async def ocr_pdf(file_path: str, page_numbers: list[int] = None) -> tuple[dict[int, str], dict]:
+    start = time.perf_counter()
+    texts, page_seconds, render_seconds, ocr_seconds = {}, {}, [], []
+    async for page in ocr_pages(file_path, page_numbers):
+        texts[page["page"]] = re.sub(r'\s+', ' ', page["text"]).strip()
+        page_seconds[page["page"]] = round(page["render_seconds"] + page["ocr_seconds"], 3)
+        render_seconds.append(page["render_seconds"])
+        ocr_seconds.append(page["ocr_seconds"])
+
+    return texts, {
+        "pages": len(texts),
+        "wall_seconds": round(time.perf_counter() - start, 3),
+        "render": _summarize(render_seconds),
+        "ocr": _summarize(ocr_seconds),
+        "page_seconds": page_seconds
+    }
+
+
+# --- SUPPORTING FUNCTIONS ---
+def _count_pages(file_path: str) -> int:
+    with fitz.open(file_path) as doc:
+        return doc.page_count
+
+
+# Render and OCR a single page; runs in a pool process
+def _ocr_page(file_path: str, page_number: int, dpi: int, languages: str) -> dict:
+    start = time.perf_counter()
+    images = convert_from_path(file_path, dpi=dpi, first_page=page_number, last_page=page_number)
+    rendered = time.perf_counter()
+    text = "".join(pytesseract.image_to_string(image, languages) for image in images)
+    for image in images:
+        image.close()
+    return {
+        "page": page_number,
+        "text": text,
+        "render_seconds": rendered - start,
+        "ocr_seconds": time.perf_counter() - rendered
+    }
+
+
+def _summarize(samples: list[float]) -> dict:
+    if not samples:
+        return {"total_seconds": 0.0, "p50_seconds": None, "max_seconds": None}
+    return {
+        "total_seconds": round(float(np.sum(samples)), 3),
+        "p50_seconds": round(float(np.percentile(samples, 50)), 3),
+        "max_seconds": round(float(np.max(samples)), 3)
+    }
@@ -0,0 +1,99 @@
+import time
+import camelot
+import pdfplumber
+from contextlib import contextmanager
+
+from app.utils import text_process
+
+
+# --- PDF ANALYSIS ---
+# One parse of an appendix PDF: lattice tables are detected once and the
+# description, table rows and text check are all served from that result.
+class PdfAnalysis:
+    def __init__(self, path: str):
+        self.path = path
+        self.timings: dict[str, float] = {}
+        self._tables = None
+
+
+    # Whether the PDF has a text layer
+    def is_text_based(self) -> bool:
+        with self._timed("text_check"):
+            return text_process.is_text_based_pdf(self.path)
+
+
+    # Lattice tables of every page, detected on first use
+    @property
+    def tables(self):
+        if self._tables is None:
+            with self._timed("table_detection"):
+                self._tables = camelot.read_pdf(self.path, pages='all', flavor='lattice')
+        return self._tables
+
+
+    # Normalized table rows of all tables, without duplicate rows
+    def table_rows(self) -> list[list[str]]:
+        tables = self.tables
+        with self._timed("table_rows"):
+            unique_rows = []
+            seen = set()
+            for table in tables:
+                for row in table.df.map(text_process.normalize_cell).values.tolist():
+                    row_tuple = tuple(row)
+                    if row_tuple not in seen:
+                        seen.add(row_tuple)
+                        unique_rows.append(row)
+            return unique_rows
+
+
+    # Text above the first table (or the whole text when there is no table)
+    def description(self) -> str:
+        tables = self.tables
+        with self._timed("description"), pdfplumber.open(self.path) as pdf:
+            if not tables:
+                return '\n\n'.join(page.extract_text() or '' for page in pdf.pages).strip()
+
+            first_table = sorted(tables, key=lambda t: (t.page, -t._bbox[3]))[0]
+            first_page_num = first_table.page
+
+            description_parts = [pdf.pages[page_idx].extract_text() or '' for page_idx in range(first_page_num - 1)]
+
+            page = pdf.pages[first_page_num - 1]
+            cam_x0, cam_y0_bottom, cam_x1, cam_y1_top = first_table._bbox
+            plumb_y0_top = page.height - cam_y1_top
+            cropped_page = page.crop((0, 0, page.width, plumb_y0_top))
+            description_parts.append(cropped_page.extract_text() or '')
+
+            return '\n\n'.join(description_parts).strip()
+
+
+    # Accumulate the time spent in a phase
+    @contextmanager
+    def _timed(self, phase: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[phase] = round(self.timings.get(phase, 0.0) + time.perf_counter() - start, 3)
+
+
+# Raised for scanned appendices, whose tables cannot be read from the text layer
+class AppendixNotTextBasedError(Exception):
+    pass
+
+
+# Extract description and table rows of an appendix PDF; runs in a pool process
+def analyze_appendix(path: str) -> dict:
+    start = time.perf_counter()
+    analysis = PdfAnalysis(path)
+    if not analysis.is_text_based():
+        raise AppendixNotTextBasedError("Appendix must be a text-based PDF.")
+
+    description = text_process.normalize_text(analysis.description())
+    tables = analysis.table_rows()
+    analysis.timings["total"] = round(time.perf_counter() - start, 3)
+    return {
+        "description": description,
+        "tables": tables,
+        "timings": analysis.timings
+    }
@@ -0,0 +1,50 @@
+import os
+import asyncio
+import multiprocessing
+from typing import Any, Callable
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+
+# --- CONFIGURATION ---
+PDF_PROCESS_WORKERS = int(os.getenv("PDF_PROCESS_WORKERS") or os.cpu_count() or 1)
+
+# Lazily started pool for CPU-bound PDF work (OCR, table detection); spawned so children do not inherit model threads
+process_pool: ProcessPoolExecutor | None = None
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    global process_pool
+    if process_pool is None:
+        process_pool = ProcessPoolExecutor(
+            max_workers=PDF_PROCESS_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return process_pool
+
+
+# Drop a pool that broke (a worker died), so the next call starts a fresh one. Only the given pool is dropped,
+# in case a concurrent caller already replaced it.
+def reset_process_pool(broken_pool: ProcessPoolExecutor):
+    global process_pool
+    if process_pool is broken_pool:
+        process_pool = None
+    broken_pool.shutdown(wait=False, cancel_futures=True)
+
+
+# Run a picklable function in the process pool, retrying once on a fresh pool if the pool broke
+async def run_in_process(func: Callable[..., Any], *args) -> Any:
+    loop = asyncio.get_running_loop()
+    pool = get_process_pool()
+    try:
+        return await loop.run_in_executor(pool, func, *args)
+    except BrokenProcessPool:
+        reset_process_pool(pool)
+        return await loop.run_in_executor(get_process_pool(), func, *args)
+
+
+def shutdown_process_pool():
+    global process_pool
+    if process_pool is not None:
+        process_pool.shutdown(wait=False, cancel_futures=True)
+        process_pool = None
@@ -37,6 +37,7 @@ def api_key_serialize(api_key) -> dict:
         "provider": api_key.get("provider"),
         "is_using": api_key.get("is_using", False),
         "using_model": api_key.get("using_model"),
+        "weight": api_key.get("weight", 1.0),
         "created_at": api_key.get("created_at").isoformat() if api_key.get("created_at") else None,
         "updated_at": api_key.get("updated_at").isoformat() if api_key.get("updated_at") else None
     }
@@ -81,6 +82,7 @@ def qa_session_serialize(qa_session) -> dict:
         "answer": qa_session.get("answer"),
         "feedback": qa_session.get("feedback"),
         "manager_answer": qa_session.get("manager_answer"),
+        "status": qa_session.get("status"),
         "start_date": qa_session.get("start_date").isoformat() if qa_session.get("start_date") else None,
         "end_date": qa_session.get("end_date").isoformat() if qa_session.get("end_date") else None,
         "created_at": qa_session.get("created_at").isoformat() if qa_session.get("created_at") else None,
@@ -98,4 +100,26 @@ def popular_question_statistics_serialize(statistics) -> dict:
         "is_display": statistics.get("is_display", False),
         "created_at": statistics.get("created_at").isoformat() if statistics.get("created_at") else None,
         "updated_at": statistics.get("updated_at").isoformat() if statistics.get("updated_at") else None
-    }
\ No newline at end of file
+    }
+
+# Ingestion Job
+def ingestion_job_serialize(job) -> dict:
+    return {
+        "id": str(job["_id"]),
+        "kind": job.get("kind"),
+        "mode": job.get("mode", "create"),
+        "doc_id": job.get("doc_id"),
+        "file_name": job.get("document", {}).get("file_name"),
+        "faculty": job.get("document", {}).get("faculty"),
+        "uploaded_by": job.get("document", {}).get("uploaded_by"),
+        "status": job.get("status"),
+        "stage": job.get("stage"),
+        "progress": job.get("progress", {}),
+        "timings": job.get("timings", {}),
+        "attempts": job.get("attempts", 0),
+        "error": job.get("error"),
+        "extraction_report": job.get("checkpoints", {}).get("extract", {}).get("pages"),
+        "created_at": job.get("created_at").isoformat() if job.get("created_at") else None,
+        "updated_at": job.get("updated_at").isoformat() if job.get("updated_at") else None,
+        "finished_at": job.get("finished_at").isoformat() if job.get("finished_at") else None
+    }
@@ -0,0 +1,40 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+
+# --- SINGLE FLIGHT ---
+# Runs one computation per key at a time; concurrent callers with the same key share its result
+class SingleFlight:
+    def __init__(self):
+        self.in_flight: dict[Hashable, asyncio.Task] = {}
+        self.stats = {
+            "calls": 0,
+            "computed": 0,
+            "coalesced": 0
+        }
+
+
+    async def do(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        self.stats["calls"] += 1
+        task = self.in_flight.get(key)
+        if task is None:
+            # A separate task keeps the computation alive when the first caller disconnects
+            task = asyncio.create_task(compute())
+            self.in_flight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+            self.stats["computed"] += 1
+        else:
+            self.stats["coalesced"] += 1
+        return await asyncio.shield(task)
+
+
+    def get_stats(self) -> dict:
+        return {**self.stats, "in_flight": len(self.in_flight)}
+
+
+    def _finish(self, key: Hashable, task: asyncio.Task):
+        if self.in_flight.get(key) is task:
+            del self.in_flight[key]
+        # Mark the exception as retrieved in case every caller has gone away
+        if not task.cancelled():
+            task.exception()
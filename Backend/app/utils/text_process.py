@@ -1,15 +1,31 @@
+import os
 import re
 import ast
 import json
+import time
 import fitz
-import camelot
-import pdfplumber
 from tiktoken import get_encoding
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+
+from app.utils import token_chunker
+from app.schemas.ingestion_schema import PageExtractionMethod
 
 
 # --- CONFIGURATION ---
 enc = get_encoding("cl100k_base")
+PDF_MIN_TEXT_DENSITY = float(os.getenv("PDF_MIN_TEXT_DENSITY") or 1.0)          # Text-layer characters per square inch of a text page
+PDF_OCR_IMAGE_COVERAGE = float(os.getenv("PDF_OCR_IMAGE_COVERAGE") or 0.3)      # Share of a sparse page covered by images that makes it a scan
+
+# Chapter, article, section and numbering markers of regulations, tried in order when splitting text
+LEGAL_SEPARATORS = [
+    "CHƯƠNG", "Chương",
+    "ĐIỀU", "Điều",
+    "MỤC", "Mục",
+    "I.", "II.", "III.", "IV.", "V.", "VI.", "VII.", "VIII.", "IX.", "X.", "XI.", "XII.", "XIII.", "XIV.", "XV.", "XVI.", "XVII.", "XVIII.", "XIX.", "XX.",
+    "1.", "2.", "3.", "4.", "5.", "6.", "7.", "8.", "9.", "10.", "11.", "12.", "13.", "14.", "15.", "16.", "17.", "18.", "19.", "20.",
+    "(1)", "(2)", "(3)", "(4)", "(5)", "(6)", "(7)", "(8)", "(9)", "(10)", "(11)", "(12)", "(13)", "(14)", "(15)", "(16)", "(17)", "(18)", "(19)", "(20)",
+    ";", ".", "\n\n", "\n", " ", ""
+]
 
 
 # --- SUPPORTING FUNCTIONS ---
@@ -51,78 +67,6 @@ def normalize_text(text: str):
     return data
 
 
-# Extract appendix description from PDF
-def extract_appendix_description(path: str) -> str:
-    tables = camelot.read_pdf(path, pages='all', flavor='lattice')
-    
-    if not tables:
-        with pdfplumber.open(path) as pdf:
-            return '\n\n'.join(page.extract_text() or '' for page in pdf.pages).strip()
-    
-    tables_sorted = sorted(tables, key=lambda t: (t.page, -t._bbox[3]))
-    first_table = tables_sorted[0]
-    first_page_num = first_table.page
-    
-    with pdfplumber.open(path) as pdf:
-        description_parts = []
-        
-        for page_idx in range(first_page_num - 1):
-            page = pdf.pages[page_idx]
-            text = page.extract_text() or ''
-            description_parts.append(text)
-        
-        page = pdf.pages[first_page_num - 1]
-        page_height = page.height
-        
-        cam_x0, cam_y0_bottom, cam_x1, cam_y1_top = first_table._bbox
-        plumb_y0_top = page_height - cam_y1_top
-        
-        cropped_page = page.crop((0, 0, page.width, plumb_y0_top))
-        above_text = cropped_page.extract_text() or ''
-        description_parts.append(above_text)
-        
-        full_description = '\n\n'.join(description_parts).strip()
-        
-    return full_description
-
-
-# Merge small chunks into larger ones
-async def merge_chunks(chunks: list[str], target_max_length: int) -> list[str]:
-    # First pass: merge small chunks
-    merged_chunks = []
-    current_chunk = ""
-    for chunk in chunks:
-        if len(enc.encode(current_chunk + " " + chunk)) <= target_max_length:
-            if current_chunk:
-                current_chunk += " " + chunk
-            else:
-                current_chunk = chunk
-        else:
-            if current_chunk:
-                merged_chunks.append(current_chunk.strip())
-            current_chunk = chunk
-    if current_chunk:
-        merged_chunks.append(current_chunk.strip())
-
-    # Second pass: ensure no chunks are too small
-    final_chunks = []
-    buffer = ""
-    for chunk in merged_chunks:
-        if len(enc.encode(chunk)) < target_max_length * 0.5:
-            if buffer:
-                buffer += " " + chunk
-            else:
-                buffer = chunk
-        else:
-            if buffer:
-                final_chunks.append(buffer.strip())
-                buffer = ""
-            final_chunks.append(chunk.strip())
-    if buffer:
-        final_chunks.append(buffer.strip())
-    return final_chunks
-
-
 # check if PDF is text-based
 def is_text_based_pdf(file_path: str) -> bool:
     try:
@@ -138,28 +82,55 @@ def is_text_based_pdf(file_path: str) -> bool:
         raise RuntimeError("Failed to process PDF file.") from e
     
     
-# Split text into chunks for embedding
+# Classify every page by text-layer density and image coverage, keeping the text layer of text pages.
+# Pages with a dense text layer are text pages; sparse pages mostly covered by images are sent to OCR.
+def classify_pdf_pages(file_path: str) -> list[dict]:
+    pages = []
+    try:
+        with fitz.open(file_path) as doc:
+            for page in doc:
+                start = time.perf_counter()
+                text = re.sub(r'\s+', ' ', page.get_text()).strip()
+                page_area = abs(page.rect)
+                text_density = len(text) / (page_area / 72 ** 2) if page_area else 0.0
+                image_coverage = _image_coverage(page)
+
+                if text_density >= PDF_MIN_TEXT_DENSITY or (text and image_coverage < PDF_OCR_IMAGE_COVERAGE):
+                    method = PageExtractionMethod.TEXT
+                elif image_coverage >= PDF_OCR_IMAGE_COVERAGE:
+                    method = PageExtractionMethod.OCR
+                else:
+                    method = PageExtractionMethod.EMPTY
+
+                pages.append({
+                    "page": page.number + 1,
+                    "method": method.value,
+                    "text": text if method == PageExtractionMethod.TEXT else "",
+                    "text_layer_chars": len(text),
+                    "text_density": round(text_density, 2),
+                    "image_coverage": round(image_coverage, 3),
+                    "seconds": round(time.perf_counter() - start, 3)
+                })
+    except Exception as e:
+        raise RuntimeError("Failed to process PDF file.") from e
+    return pages
+
+
+# Share of the page area covered by images
+def _image_coverage(page: fitz.Page) -> float:
+    page_area = abs(page.rect)
+    if not page_area:
+        return 0.0
+    covered = sum(abs(fitz.Rect(image["bbox"]) & page.rect) for image in page.get_image_info())
+    return min(covered / page_area, 1.0)
+    
+    
+# Split text into chunks for embedding: the text is tokenized once, split on the legal separators by token counts
+# of slices, then small chunks are merged by running token counts
 async def split_text_into_chunks(text: str, words_per_chunk: int, overlap: int) -> list[str]:
-    text = text.strip()
-    chunks = []
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=words_per_chunk,
-        chunk_overlap=overlap,
-        separators=[
-            "CHƯƠNG", "Chương",
-            "ĐIỀU", "Điều",
-            "MỤC", "Mục",
-            "I.", "II.", "III.", "IV.", "V.", "VI.", "VII.", "VIII.", "IX.", "X.", "XI.", "XII.", "XIII.", "XIV.", "XV.", "XVI.", "XVII.", "XVIII.", "XIX.", "XX.",
-            "1.", "2.", "3.", "4.", "5.", "6.", "7.", "8.", "9.", "10.", "11.", "12.", "13.", "14.", "15.", "16.", "17.", "18.", "19.", "20.",
-            "(1)", "(2)", "(3)", "(4)", "(5)", "(6)", "(7)", "(8)", "(9)", "(10)", "(11)", "(12)", "(13)", "(14)", "(15)", "(16)", "(17)", "(18)", "(19)", "(20)",
-            ";", ".", "\n\n", "\n", " ", ""
-            
-        ],
-        length_function=lambda x: len(enc.encode(x))
-    )
-    chunks = splitter.split_text(text)
-    chunks = await merge_chunks(chunks, target_max_length=words_per_chunk)
-    return chunks
+    document = token_chunker.TokenizedText(text.strip(), enc)
+    spans = token_chunker.split_spans(document, LEGAL_SEPARATORS, chunk_size=words_per_chunk, chunk_overlap=overlap)
+    return token_chunker.merge_spans(document, spans, target_max_length=words_per_chunk)
 
 
 # Split appendix description and tables into chunks
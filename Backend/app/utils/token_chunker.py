@@ -0,0 +1,214 @@
+import regex
+from bisect import bisect_left
+from collections import deque
+from tiktoken import Encoding
+
+
+# --- TOKENIZED TEXT ---
+# A document tokenized once, answering exact token counts of any slice from token offsets.
+# BPE never merges across the pieces of the cl100k_base pre-tokenizer, and a space after a non-space always starts a
+# new piece, whatever surrounds it. So between the first and the last such space of a slice, the slice has the
+# document's tokens; only the words before and after them are re-encoded.
+class TokenizedText:
+    def __init__(self, text: str, encoding: Encoding):
+        self.text = text
+        self.encoding = encoding
+        self.pattern = regex.compile(encoding._pat_str)
+        self.piece_tokens: dict[str, int] = {}
+        _, self.token_offsets = encoding.decode_with_offsets(encoding.encode_ordinary(text))
+
+
+    # Number of tokens of text[start:end]
+    def count(self, start: int, end: int) -> int:
+        head_end = self._next_piece_start(start + 1, end)
+        tail_start = self._previous_piece_start(start + 1, end)
+        if head_end is None or head_end >= tail_start:
+            return self._count_pieces(start, end)
+
+        interior = bisect_left(self.token_offsets, tail_start) - bisect_left(self.token_offsets, head_end)
+        return self._count_pieces(start, head_end) + interior + self._count_pieces(tail_start, end)
+
+
+    # First space after a non-space in [start, end)
+    def _next_piece_start(self, start: int, end: int) -> int | None:
+        position = self.text.find(" ", start, end)
+        while position != -1 and self.text[position - 1].isspace():
+            position = self.text.find(" ", position + 1, end)
+        return position if position != -1 else None
+
+
+    # Last space after a non-space in [start, end)
+    def _previous_piece_start(self, start: int, end: int) -> int | None:
+        position = self.text.rfind(" ", start, end)
+        while position != -1 and self.text[position - 1].isspace():
+            position = self.text.rfind(" ", start, position)
+        return position if position != -1 else None
+
+
+    def _count_pieces(self, start: int, end: int) -> int:
+        return sum(self._count_piece(match.group()) for match in self.pattern.finditer(self.text, start, end))
+
+
+    # Number of tokens of any string
+    def count_string(self, text: str) -> int:
+        return sum(self._count_piece(match.group()) for match in self.pattern.finditer(text))
+
+
+    # BPE of a single pre-tokenizer piece, cached since most pieces are repeated words
+    def _count_piece(self, piece: str) -> int:
+        if piece not in self.piece_tokens:
+            self.piece_tokens[piece] = len(self.encoding._encode_single_piece(piece))
+        return self.piece_tokens[piece]
+
+
+# --- SPLITTING ---
+# Recursive separator splitting on character offsets, with the chunk boundaries of langchain's
+# RecursiveCharacterTextSplitter (separators kept at the start of each split, chunks stripped).
+# Returns (start, end, stripped) spans; unstripped spans are pieces no separator could split further.
+def split_spans(document: TokenizedText, separators: list[str], chunk_size: int, chunk_overlap: int) -> list[tuple[int, int, bool]]:
+    if chunk_overlap > chunk_size:
+        raise ValueError(f"Got a larger chunk overlap ({chunk_overlap}) than chunk size ({chunk_size}), should be smaller.")
+    return _split_range(document, 0, len(document.text), separators, chunk_size, chunk_overlap)
+
+
+def _split_range(
+    document: TokenizedText,
+    start: int,
+    end: int,
+    separators: list[str],
+    chunk_size: int,
+    chunk_overlap: int
+) -> list[tuple[int, int, bool]]:
+    # First separator found in the range
+    separator, new_separators = separators[-1], []
+    for idx, candidate in enumerate(separators):
+        if not candidate:
+            separator = candidate
+            break
+        if document.text.find(candidate, start, end) != -1:
+            separator, new_separators = candidate, separators[idx + 1:]
+            break
+
+    final_spans, good_splits = [], []
+    for split_start, split_end in _separator_splits(document.text, separator, start, end):
+        length = document.count(split_start, split_end)
+        if length < chunk_size:
+            good_splits.append((split_start, split_end, length))
+            continue
+        if good_splits:
+            final_spans.extend(_merge_splits(document.text, good_splits, chunk_size, chunk_overlap))
+            good_splits = []
+        if not new_separators:
+            final_spans.append((split_start, split_end, False))
+        else:
+            final_spans.extend(_split_range(document, split_start, split_end, new_separators, chunk_size, chunk_overlap))
+    if good_splits:
+        final_spans.extend(_merge_splits(document.text, good_splits, chunk_size, chunk_overlap))
+    return final_spans
+
+
+# Merge consecutive splits up to the chunk size, carrying up to the overlap into the next chunk
+def _merge_splits(text: str, splits: list[tuple[int, int, int]], chunk_size: int, chunk_overlap: int) -> list[tuple[int, int, bool]]:
+    spans = []
+    current = deque()
+    total = 0
+    for split in splits:
+        length = split[2]
+        if total + length > chunk_size and current:
+            span = _strip_span(text, current[0][0], current[-1][1])
+            if span:
+                spans.append(span)
+            while total > chunk_overlap or (total + length > chunk_size and total > 0):
+                total -= current.popleft()[2]
+        current.append(split)
+        total += length
+    if current:
+        span = _strip_span(text, current[0][0], current[-1][1])
+        if span:
+            spans.append(span)
+    return spans
+
+
+# Split a range before every non-overlapping occurrence of the separator, or into characters for the empty separator
+def _separator_splits(text: str, separator: str, start: int, end: int) -> list[tuple[int, int]]:
+    if not separator:
+        return [(position, position + 1) for position in range(start, end)]
+
+    cuts = [start]
+    position = text.find(separator, start, end)
+    while position != -1:
+        cuts.append(position)
+        position = text.find(separator, position + len(separator), end)
+    cuts.append(end)
+    return [(cut_start, cut_end) for cut_start, cut_end in zip(cuts, cuts[1:]) if cut_end > cut_start]
+
+
+def _strip_span(text: str, start: int, end: int) -> tuple[int, int, bool] | None:
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return (start, end, True) if end > start else None
+
+
+# --- MERGING ---
+# Join chunks with spaces while the result stays within the target, then fold chunks under half the target into
+# their neighbours, keeping token counts as running sums instead of re-encoding every candidate
+def merge_spans(document: TokenizedText, spans: list[tuple[int, int, bool]], target_max_length: int) -> list[str]:
+    text = document.text
+
+    # First pass: merge small chunks
+    merged_chunks = []
+    # Token counts of the current chunk are summed while all its chunks are stripped, so it ends in a non-space
+    current_chunk, current_tokens, current_stripped = "", 0, True
+    for start, end, stripped in spans:
+        chunk = text[start:end]
+        # A stripped chunk preceded by a single space in the document is counted with that space as a slice
+        if stripped and start > 0 and text[start - 1] == " ":
+            joined_tokens = document.count(start - 1, end)
+        else:
+            joined_tokens = document.count_string(" " + chunk)
+
+        if not current_chunk:
+            candidate_tokens = joined_tokens
+        elif current_stripped:
+            # Text ending in a non-space keeps its pieces when more text is appended after a space
+            candidate_tokens = current_tokens + joined_tokens
+        else:
+            candidate_tokens = document.count_string(current_chunk + " " + chunk)
+
+        if candidate_tokens <= target_max_length:
+            if current_chunk:
+                current_chunk += " " + chunk
+                current_tokens = candidate_tokens
+                current_stripped = current_stripped and stripped
+            else:
+                current_chunk = chunk
+                current_tokens = document.count(start, end)
+                current_stripped = stripped
+        else:
+            if current_chunk:
+                merged_chunks.append((current_chunk.strip(), current_tokens, current_stripped))
+            current_chunk, current_tokens, current_stripped = chunk, document.count(start, end), stripped
+    if current_chunk:
+        merged_chunks.append((current_chunk.strip(), current_tokens, current_stripped))
+
+    # Second pass: ensure no chunks are too small
+    final_chunks = []
+    buffer = ""
+    for chunk, tokens, stripped in merged_chunks:
+        if not stripped:
+            tokens = document.count_string(chunk)
+        if tokens < target_max_length * 0.5:
+            if buffer:
+                buffer += " " + chunk
+            else:
+                buffer = chunk
+        else:
+            if buffer:
+                final_chunks.append(buffer.strip())
+                buffer = ""
+            final_chunks.append(chunk.strip())
+    if buffer:
+        final_chunks.append(buffer.strip())
+    return final_chunks
@@ -0,0 +1,39 @@
+import signal
+import asyncio
+import logging
+import argparse
+
+from app.databases import chroma
+from app.utils.process_pool import shutdown_process_pool
+from app.services import ingestion_service, llm_clients
+from app.databases.mongo import connect_to_mongo, close_mongo_connection
+
+
+# --- WORKER PROCESS ---
+# Process ingestion jobs until SIGINT/SIGTERM; running jobs are handed back and resumed by the next worker
+async def run(concurrency: int):
+    await connect_to_mongo()
+    await asyncio.to_thread(chroma.connect_to_chroma)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    ingestion_service.start_workers(concurrency)
+    try:
+        await stop.wait()
+    finally:
+        logging.info("Stopping ingestion workers")
+        await ingestion_service.stop_workers()
+        shutdown_process_pool()
+        await llm_clients.close_clients()
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run document ingestion jobs (extract, chunk, generate, embed, persist).")
+    parser.add_argument("--concurrency", type=int, default=ingestion_service.INGEST_WORKERS, help="Jobs processed at the same time")
+    args = parser.parse_args()
+
+    asyncio.run(run(args.concurrency))